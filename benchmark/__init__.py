@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ CsvLayersList benchmark
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Benchmarks of the scan, selection, header analysis, planning and import stages,
+ run from the plugin directory with: python -m benchmark.run_benchmarks --help
+"""
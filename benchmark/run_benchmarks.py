@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ RunBenchmarks
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Times every stage of the plugin on a generated tree and appends the results to a JSON history.
+ The stages needing Qt or QGIS are skipped when they can't be imported.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from core.scanner import ScanNode, iter_scan
+from core.selection import Selection
+from core.check_states import CheckStates, CHECKED, UNCHECKED
+from core.headers import analyze_headers
+from core.coordinates import analyze_groups, fields_for_header
+from core.planner import ImportPlan
+from core.uri import layer_name, layer_provider, layer_uri
+
+from .tree_generator import TreeSpec, generate_tree, synthetic_paths
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the history is kept with the user files, not in the source tree of the plugin
+DEFAULT_HISTORY = os.path.join(os.path.expanduser('~'), '.cache', 'csv_batch_import', 'benchmark_history.json')
+
+
+class SkipStage(Exception):
+    """Raised by a stage that can't run in this environment."""
+
+
+class Context:
+    """State shared by the stages, the scan fills the tree used by the next ones."""
+
+    def __init__(self, root_path, synthetic_count, layer_sample):
+        self.root_path = root_path
+        self.synthetic_count = synthetic_count
+        self.layer_sample = layer_sample
+        self.root = None
+        self.paths = []
+        self.nodes = []
+        self.report = None
+        self.fields = {}
+
+
+def stage_scan(context):
+    """Single pass scan of the generated tree."""
+    root = ScanNode(context.root_path)
+    for _ in iter_scan(root):
+        pass
+    context.root = root
+    context.nodes = list(root.iter_files())
+    context.paths = [node.path for node in context.nodes]
+    return len(context.paths)
+
+
+def stage_tree_population(context):
+    """Registration of every scanned node in the dialog tree model, then the rows of the expanded root."""
+    try:
+        from qgis.PyQt.QtWidgets import QApplication
+    except ImportError:
+        raise SkipStage('Qt is not available')
+    # the model is a module of the plugin package, it's imported with relative imports
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    try:
+        ScanTreeModel = importlib.import_module(os.path.basename(PLUGIN_DIR) + '.scan_tree_model').ScanTreeModel
+    finally:
+        sys.path.pop(0)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    model = ScanTreeModel()
+    model.set_root(context.root)
+    for node in context.root.iter_subtree():
+        if node.is_dir:
+            model.add_children(node)
+    root_index = model.node_index(context.root)
+    while model.canFetchMore(root_index):
+        model.fetchMore(root_index)
+    count = len(model.checks)
+    model.clear()
+    return count
+
+
+def stage_check_propagation(context):
+    """Uncheck then check of the root directory, the check states of every node below it are set and every
+    node is deselected then selected. The first file is unchecked last so its parents become partially checked."""
+    checks = CheckStates()
+    checks.register(context.root, CHECKED)
+    for node in context.root.iter_subtree():
+        if node.is_dir:
+            checks.add_children(node)
+    selection = Selection()
+    selection.select_subtree(context.root)
+
+    checks.set_subtree(context.root, UNCHECKED)
+    checks.update_parents(context.root)
+    selection.deselect_subtree(context.root)
+    checks.set_subtree(context.root, CHECKED)
+    checks.update_parents(context.root)
+    selection.select_subtree(context.root)
+    count = len(selection)
+    for node in context.root.iter_files():
+        checks.set_subtree(node, UNCHECKED)
+        checks.update_parents(node)
+        break
+    return count
+
+
+def stage_header_analysis(context):
+    """Dialect and header of every file read with the thread pool, then the coordinates detection of every schema."""
+    context.report = analyze_headers(context.paths)
+    context.fields = {}
+    detected_xy, field_types = analyze_groups(context.report, context.paths)
+    for header, paths in context.report.groups(context.paths).items():
+        fields = fields_for_header(header, None, None, detected_xy[header])
+        for path in paths:
+            context.fields[path] = fields
+    return len(context.paths)
+
+
+def stage_planning(context):
+    """Plan of the layer tree of the scanned files, from their ScanNode chains, every file attached in reverse order."""
+    plan = ImportPlan(context.paths, context.nodes)
+    for path in reversed(context.paths):
+        plan.attach_file(path)
+    return len(context.paths)
+
+
+def stage_planning_synthetic(context):
+    """Plan of the layer tree of a large list of synthetic paths, nothing is read from the disk."""
+    if not context.synthetic_count:
+        raise SkipStage('no synthetic paths requested')
+    paths = synthetic_paths(context.synthetic_count)
+    plan = ImportPlan(paths)
+    for path in paths:
+        plan.attach_file(path)
+    return len(paths)
+
+
+def stage_layer_creation(context):
+    """Delimited text layers of a sample of the files with detected coordinates."""
+    try:
+        from qgis.core import QgsApplication, QgsVectorLayer
+    except ImportError:
+        raise SkipStage('QGIS is not available')
+    if QgsApplication.instance() is None:
+        application = QgsApplication([], False)
+        application.initQgis()
+    paths = [path for path in context.paths if context.fields.get(path, (None, None))[0] is not None]
+    paths = paths[:context.layer_sample]
+    dialects = context.report.dialects if context.report is not None else {}
+    vrt_dir = os.path.join(tempfile.gettempdir(), 'csv_batch_import_bench_vrt')
+    for path in paths:
+        uri = layer_uri(path, 'EPSG:4326', *context.fields[path], dialects.get(path), vrt_dir)
+        QgsVectorLayer(uri, layer_name(path), layer_provider(path))
+    return len(paths)
+
+
+# stages in the order they run, the later ones use the results of the earlier ones
+STAGES = (
+    ('scan', stage_scan),
+    ('tree_population', stage_tree_population),
+    ('check_propagation', stage_check_propagation),
+    ('header_analysis', stage_header_analysis),
+    ('planning', stage_planning),
+    ('planning_synthetic', stage_planning_synthetic),
+    ('layer_creation', stage_layer_creation),
+)
+
+
+def run_stage(function, context, repeat):
+    """The function runs the stage repeat times and returns the best time and the number of items."""
+    best = None
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = function(context)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, items
+
+
+def run_benchmarks(spec, repeat=3, synthetic_count=100000, layer_sample=200, stages=None, root_path=None):
+    """The function generates the tree of spec (or uses root_path when given), runs the stages and returns
+    the results record."""
+    temp_dir = None
+    if root_path is None:
+        temp_dir = tempfile.mkdtemp(prefix='csv_batch_import_bench_')
+        root_path = os.path.join(temp_dir, 'tree')
+        generate_tree(root_path, spec)
+    context = Context(root_path, synthetic_count, layer_sample)
+    results = {}
+    try:
+        for name, function in STAGES:
+            # the scan always runs, the next stages need its tree
+            if stages and name not in stages and name != 'scan':
+                continue
+            try:
+                seconds, items = run_stage(function, context, repeat)
+            except SkipStage as e:
+                results[name] = {'skipped': str(e)}
+                continue
+            results[name] = {'seconds': round(seconds, 6), 'items': items,
+                             'items_per_second': round(items / seconds, 1) if seconds else None}
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'version': plugin_version(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'spec': spec.to_dict() if temp_dir is not None else {'root_path': root_path},
+        'synthetic_paths': synthetic_count,
+        'repeat': repeat,
+        'stages': results,
+    }
+
+
+def plugin_version():
+    """The function returns the version of the plugin from metadata.txt."""
+    try:
+        with open(os.path.join(PLUGIN_DIR, 'metadata.txt')) as file:
+            for line in file:
+                if line.startswith('version='):
+                    return line.split('=', 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+def git_commit():
+    """The function returns the current commit of the plugin repository, or None outside of git."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PLUGIN_DIR,
+                                       stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(history_path):
+    """The function returns the list of the records of the history file, empty when it doesn't exist."""
+    try:
+        with open(history_path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return []
+
+
+def previous_record(history, record):
+    """The function returns the last record of the history run on the same tree, or None."""
+    for previous in reversed(history):
+        if previous.get('spec') == record['spec'] and previous.get('synthetic_paths') == record['synthetic_paths']:
+            return previous
+    return None
+
+
+def report(record, previous=None):
+    """The function returns the results as text, compared with the previous record when given."""
+    lines = ['{} {} ({})'.format(record['date'], record['version'], record['commit'] or 'no commit')]
+    for name, result in record['stages'].items():
+        if 'skipped' in result:
+            lines.append('  {:<20} skipped: {}'.format(name, result['skipped']))
+            continue
+        line = '  {:<20} {:>10.4f} s {:>9} items'.format(name, result['seconds'], result['items'])
+        before = previous['stages'].get(name, {}) if previous is not None else {}
+        if before.get('seconds'):
+            line += '  {:+.1f}% vs {}'.format(100.0 * (result['seconds'] / before['seconds'] - 1),
+                                              previous['commit'] or previous['date'])
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the CSV Batch Import plugin.')
+    parser.add_argument('--depth', type=int, default=3, help='directory levels under the root')
+    parser.add_argument('--fan-out', type=int, default=4, help='sub directories of every directory')
+    parser.add_argument('--files-per-dir', type=int, default=10, help='CSV/TSV files in every directory')
+    parser.add_argument('--min-rows', type=int, default=10, help='minimum number of rows of a file')
+    parser.add_argument('--max-rows', type=int, default=200, help='maximum number of rows of a file')
+    parser.add_argument('--tsv-ratio', type=float, default=0.2, help='share of TSV files')
+    parser.add_argument('--broken-ratio', type=float, default=0.05, help='share of broken files')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated tree')
+    parser.add_argument('--root', help='benchmark an existing tree instead of a generated one')
+    parser.add_argument('--synthetic-paths', type=int, default=100000,
+                        help='number of paths of the synthetic planning stage, 0 to skip it')
+    parser.add_argument('--layer-sample', type=int, default=200, help='number of layers created')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of every stage, the best one is kept')
+    parser.add_argument('--stages', nargs='*', choices=[name for name, function in STAGES],
+                        help='stages to run, all by default')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON file the results are appended to')
+    parser.add_argument('--no-history', action='store_true', help="don't write the results")
+    args = parser.parse_args(argv)
+
+    spec = TreeSpec(args.depth, args.fan_out, args.files_per_dir, args.min_rows, args.max_rows,
+                    args.tsv_ratio, args.broken_ratio, args.seed)
+    record = run_benchmarks(spec, args.repeat, args.synthetic_paths, args.layer_sample, args.stages, args.root)
+    history = load_history(args.history)
+    print(report(record, previous_record(history, record)))
+    if not args.no_history:
+        history.append(record)
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'w') as file:
+            json.dump(history, file, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
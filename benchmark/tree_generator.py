@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ TreeGenerator
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Generator of synthetic directory trees of CSV/TSV files for the benchmarks.
+"""
+
+import os
+import random
+
+# the schemas used by the generated files, the sensors of a tree share a few of them
+SCHEMAS = (
+    ('id', 'x', 'y', 'value'),
+    ('station', 'longitude', 'latitude', 'temperature', 'humidity'),
+    ('fid', 'easting', 'northing', 'depth', 'quality', 'comment'),
+)
+# other files found in real trees, ignored by the scanner
+OTHER_FILES = ('readme.txt', 'metadata.xml')
+# kinds of broken files
+BROKEN_KINDS = ('empty', 'header_only', 'bad_coordinates', 'wrong_delimiter')
+
+
+class TreeSpec:
+    """Shape of a generated tree."""
+
+    def __init__(self, depth=3, fan_out=4, files_per_dir=10, min_rows=10, max_rows=200,
+                 tsv_ratio=0.2, broken_ratio=0.05, seed=0):
+        """Constructor.
+
+        :param depth: Number of directory levels under the root.
+        :type depth: int
+
+        :param fan_out: Number of sub directories of every directory above the last level.
+        :type fan_out: int
+
+        :param files_per_dir: Number of CSV/TSV files in every directory.
+        :type files_per_dir: int
+
+        :param min_rows: Minimum number of data rows of a file, the file sizes follow the number of rows.
+        :type min_rows: int
+
+        :param max_rows: Maximum number of data rows of a file.
+        :type max_rows: int
+
+        :param tsv_ratio: Share of the files written as TSV.
+        :type tsv_ratio: float
+
+        :param broken_ratio: Share of the files that can't be loaded, see BROKEN_KINDS.
+        :type broken_ratio: float
+
+        :param seed: Seed of the random generator, the same spec always generates the same tree.
+        :type seed: int
+        """
+        self.depth = depth
+        self.fan_out = fan_out
+        self.files_per_dir = files_per_dir
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.tsv_ratio = tsv_ratio
+        self.broken_ratio = broken_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        """The function returns the spec as a dict, stored with the results."""
+        return dict(vars(self))
+
+    def directory_count(self):
+        """The function returns the number of directories of the tree, the root included."""
+        return sum(self.fan_out ** level for level in range(self.depth + 1))
+
+    def file_count(self):
+        """The function returns the number of CSV/TSV files of the tree."""
+        return self.directory_count() * self.files_per_dir
+
+
+def write_file(path, schema, rows, delimiter, rng, broken_kind=None):
+    """The function writes one CSV/TSV file with random coordinates, or a broken file of the given kind."""
+    with open(path, 'w', newline='') as file:
+        if broken_kind == 'empty':
+            return
+        file.write(delimiter.join(schema) + '\n')
+        if broken_kind == 'header_only':
+            return
+        # a comma separated content in a .tsv file, or the other way around
+        if broken_kind == 'wrong_delimiter':
+            delimiter = ',' if delimiter == '\t' else ';'
+        lines = []
+        for i in range(rows):
+            values = [str(i), '{:.6f}'.format(rng.uniform(-180, 180)), '{:.6f}'.format(rng.uniform(-90, 90))]
+            values += ['{:.2f}'.format(rng.random() * 100) for _ in schema[3:]]
+            if broken_kind == 'bad_coordinates':
+                values[1] = values[2] = 'n/a'
+            lines.append(delimiter.join(values))
+        file.write('\n'.join(lines) + '\n')
+
+
+def generate_tree(root_path, spec):
+    """The function writes the tree described by spec under root_path and returns the paths of the
+    CSV/TSV files and the paths of the broken ones."""
+    rng = random.Random(spec.seed)
+    paths = []
+    broken = []
+    directories = [(root_path, 0)]
+    while directories:
+        dir_path, level = directories.pop()
+        os.makedirs(dir_path, exist_ok=True)
+        for name in OTHER_FILES[:rng.randint(0, len(OTHER_FILES))]:
+            with open(os.path.join(dir_path, name), 'w') as file:
+                file.write('not a CSV file\n')
+
+        for i in range(spec.files_per_dir):
+            is_tsv = rng.random() < spec.tsv_ratio
+            path = os.path.join(dir_path, 'sensor_{:04d}.{}'.format(i, 'tsv' if is_tsv else 'csv'))
+            broken_kind = rng.choice(BROKEN_KINDS) if rng.random() < spec.broken_ratio else None
+            write_file(path, rng.choice(SCHEMAS), rng.randint(spec.min_rows, spec.max_rows),
+                       '\t' if is_tsv else ',', rng, broken_kind)
+            paths.append(path)
+            if broken_kind is not None:
+                broken.append(path)
+
+        if level < spec.depth:
+            for i in range(spec.fan_out):
+                directories.append((os.path.join(dir_path, 'dir_{:03d}'.format(i)), level + 1))
+    return sorted(paths), sorted(broken)
+
+
+def synthetic_paths(count, depth=4, fan_out=10, root_path=os.sep + 'synthetic'):
+    """The function returns count file paths spread over a tree of the given depth and fan out,
+    without touching the disk. It's used to time the pure Python stages on very large trees."""
+    paths = []
+    for i in range(count):
+        parts = [root_path]
+        index = i
+        for _ in range(depth):
+            index //= fan_out
+            parts.append('dir_{:03d}'.format(index % fan_out))
+        parts.append('sensor_{:07d}.csv'.format(i))
+        paths.append(os.path.join(*parts))
+    return sorted(paths)
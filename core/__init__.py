@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ CsvLayersList core
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Pure Python part of the plugin, nothing in this package imports Qt or QGIS.
+"""
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Archives
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Compressed inputs, .csv.gz/.tsv.gz files and the members of zip archives are
+ streamed in place, nothing is extracted to the disk. The member of an archive is
+ addressed by the path of the archive followed by its path inside the archive,
+ like /data/bundle.zip/2023/sensor.csv, and read by GDAL through /vsizip/.
+"""
+
+import gzip
+import os
+import zipfile
+import zlib
+
+# extensions of the gzip compressed files kept by the scanner
+GZIP_EXTENSIONS = ('.csv.gz', '.tsv.gz')
+# extension of the archives shown as virtual folders
+ZIP_EXTENSION = '.zip'
+
+# errors raised while reading a file, a corrupted archive may fail in the middle of the stream
+READ_ERRORS = (OSError, EOFError, zlib.error, zipfile.BadZipFile)
+
+
+# path named like an archive as key and True when it's an archive, False for a directory, the scanner
+# registers the archives it finds so the uri, provider and GDAL path of their members need no stat
+_archive_paths = {}
+
+
+def register_archive(path):
+    """The function records the path of a zip archive found by the scanner, ScanNode.is_archive."""
+    _archive_paths[path] = True
+
+
+def is_archive(path):
+    """The function returns True when the path named like a zip archive is one, the paths the scanner
+    didn't register are checked on the disk once."""
+    known = _archive_paths.get(path)
+    if known is None:
+        # a real directory may be named like an archive
+        known = _archive_paths[path] = os.path.isfile(path)
+    return known
+
+
+def split_archive_path(path):
+    """The function returns the path of the zip archive containing the given path and the path
+    of the member inside it with forward slashes, or (None, path) for a path outside of archives."""
+    start = 0
+    lower_path = path.lower()
+    while True:
+        index = lower_path.find(ZIP_EXTENSION + os.sep, start)
+        if index < 0:
+            return None, path
+        archive_path = path[:index + len(ZIP_EXTENSION)]
+        if is_archive(archive_path):
+            return archive_path, path[len(archive_path) + 1:].replace(os.sep, '/')
+        start = index + 1
+
+
+def is_gzip(path):
+    return path.lower().endswith('.gz')
+
+
+def is_compressed(path):
+    """The function returns True for the gzip files and the members of zip archives, the delimited
+    text provider can't read them, they are loaded by GDAL."""
+    return is_gzip(path) or split_archive_path(path)[0] is not None
+
+
+def strip_extension(name):
+    """The function returns the file name without its extension, both of them for .csv.gz files."""
+    if is_gzip(name):
+        name = name[:-len('.gz')]
+    return os.path.splitext(name)[0]
+
+
+def text_extension(path):
+    """The function returns the extension of the uncompressed file, '.csv' for a.csv.gz."""
+    if is_gzip(path):
+        path = path[:-len('.gz')]
+    return os.path.splitext(path)[1].lower()
+
+
+class _MemberGzipFile(gzip.GzipFile):
+    """Gzip file read from a member of a zip archive, the member is closed with it."""
+
+    def close(self):
+        fileobj = self.fileobj
+        super().close()
+        if fileobj is not None:
+            fileobj.close()
+
+
+def open_binary(path):
+    """The function opens the file for reading in binary mode, gzip files are uncompressed and
+    the members of zip archives are read from the archive as they are streamed."""
+    archive_path, member = split_archive_path(path)
+    if archive_path is None:
+        return gzip.open(path, 'rb') if is_gzip(path) else open(path, 'rb')
+
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as e:
+        raise OSError('{}: {}'.format(archive_path, e))
+    try:
+        file = archive.open(member)
+    except KeyError:
+        raise OSError('{} is not in {}'.format(member, archive_path))
+    finally:
+        # the member keeps the archive file open until it's closed
+        archive.close()
+    if is_gzip(path):
+        return _MemberGzipFile(fileobj=file, mode='rb')
+    return file
+
+
+def gdal_path(path):
+    """The function returns the path GDAL reads the file from, through /vsizip/ and /vsigzip/ when needed."""
+    archive_path, member = split_archive_path(path)
+    if archive_path is not None:
+        path = '/vsizip/{}/{}'.format(archive_path, member)
+    if is_gzip(path):
+        path = '/vsigzip/' + path
+    return path
+
+
+def zip_members(archive_path, extensions):
+    """The function lists the members of the zip archive having one of the given extensions,
+    only the central directory at the end of the archive is read.
+
+    :returns: List of (member path with forward slashes, compressed size) of the members.
+    :rtype: list
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            infos = archive.infolist()
+    except READ_ERRORS:
+        return []
+    return [(info.filename, info.compress_size) for info in infos
+            if not info.is_dir() and info.filename.endswith(extensions)]
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ CheckStates
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Tri-state check states of the scanned tree, stored in flat arrays indexed by ScanNode.index.
+"""
+
+# check states, same values as Qt.CheckState
+UNCHECKED = 0
+PARTIALLY_CHECKED = 1
+CHECKED = 2
+
+
+class CheckStates:
+    """Check state of every node of a ScanNode tree the dialog knows of.
+
+    A node is known once its parent's children are added, it then has a position (ScanNode.index)
+    in the arrays. Checking a directory checks everything under it in one pass, then the states
+    of its parents are computed bottom-up: a directory with both checked and unchecked entries
+    under it is partially checked."""
+
+    def __init__(self):
+        """Constructor."""
+        self.clear()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def clear(self):
+        """The function forgets every node."""
+        # ScanNode of every position
+        self.nodes = []
+        # check state of every node
+        self.states = bytearray()
+        # 1 for the directories whose children are known, the scan hasn't reached the others yet
+        self.known = bytearray()
+
+    def register(self, node, state):
+        """The function gives the node the next position in the arrays."""
+        node.index = len(self.nodes)
+        self.nodes.append(node)
+        self.states.append(state)
+        self.known.append(0)
+
+    def is_known(self, node):
+        return 0 <= node.index < len(self.nodes) and self.nodes[node.index] is node
+
+    def is_dir_known(self, node):
+        """The function returns True for the known directories whose children are known too."""
+        return self.is_known(node) and self.known[node.index] == 1
+
+    def state(self, node):
+        return self.states[node.index]
+
+    def add_children(self, node):
+        """The function registers the children of the known directory node once they are scanned, they get
+        the check state of the directory, the new entries of a partially checked directory are unchecked."""
+        state = self.states[node.index]
+        if state == PARTIALLY_CHECKED:
+            state = UNCHECKED
+        for child in node.children:
+            if not self.is_known(child):
+                self.register(child, state)
+        self.known[node.index] = 1
+
+    def forget_subtree(self, node):
+        """The function forgets the node and all the known nodes under it once they are removed from the tree.
+        Their positions aren't given to other nodes, the arrays keep their size."""
+        for current in node.iter_subtree():
+            if self.is_known(current):
+                self.nodes[current.index] = None
+                current.index = -1
+
+    def set_subtree(self, node, state):
+        """The function sets the check state of the node and of all the known nodes under it in one pass.
+
+        :returns: The known directories of the subtree, the node included.
+        :rtype: list
+        """
+        states = self.states
+        known = self.known
+        dirs = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            i = current.index
+            states[i] = state
+            # all the children of a known directory are known
+            if current.is_dir and known[i]:
+                stack.extend(current.children)
+                dirs.append(current)
+        return dirs
+
+    def update_parents(self, node):
+        """The function computes the check states of the parents of the node from their children, bottom-up.
+        It stops at the first parent whose state didn't change, the ones above it can't change either.
+
+        :returns: The parents whose state changed, the closest first.
+        :rtype: list
+        """
+        states = self.states
+        changed = []
+        parent = node.parent
+        while parent is not None and self.is_dir_known(parent):
+            child_states = {states[child.index] for child in parent.children}
+            state = child_states.pop() if len(child_states) == 1 else PARTIALLY_CHECKED
+            if state == states[parent.index]:
+                break
+            states[parent.index] = state
+            changed.append(parent)
+            parent = parent.parent
+        return changed
+
+    def update_dir(self, node):
+        """The function computes the check state of the known directory from its children after they changed,
+        for instance once it's listed again, then the states of its parents. An empty directory keeps its state.
+
+        :returns: The directories whose state changed, the node first.
+        :rtype: list
+        """
+        if not node.children or not self.is_dir_known(node):
+            return []
+        states = self.states
+        child_states = {states[child.index] for child in node.children}
+        state = child_states.pop() if len(child_states) == 1 else PARTIALLY_CHECKED
+        if state == states[node.index]:
+            return []
+        states[node.index] = state
+        return [node] + self.update_parents(node)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Coordinates
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Automatic detection of the X/Y columns from their names and a bounded sample of rows.
+"""
+
+import csv
+import re
+from itertools import islice
+
+from .archives import READ_ERRORS
+from .field_types import infer_field_types
+from .sniffing import sniff_file, open_text, csv_reader
+
+# maximum number of rows read from a file to check the values of its columns
+SAMPLE_ROWS = 200
+# minimum share of the non empty sampled values that must be numbers
+NUMERIC_RATIO = 0.95
+
+# common names of the coordinate columns, best match first
+X_NAMES = ('x', 'lon', 'lng', 'long', 'longitude', 'easting', 'east', 'xcoord', 'coordx', 'pointx')
+Y_NAMES = ('y', 'lat', 'latitude', 'northing', 'north', 'ycoord', 'coordy', 'pointy')
+# names that only make sense for geographic coordinates
+GEOGRAPHIC_NAMES = ('lon', 'lng', 'long', 'longitude', 'lat', 'latitude')
+
+
+def read_sample(path, max_rows=SAMPLE_ROWS, dialect=None):
+    """The function returns up to max_rows rows of the file, the header excluded.
+
+    :param dialect: Dialect of the file, sniffed when not given.
+    :type dialect: Dialect
+    """
+    if dialect is None:
+        dialect = sniff_file(path)
+    try:
+        with open_text(path, dialect) as file:
+            reader = csv_reader(file, dialect)
+            if dialect.has_header:
+                next(reader, None)
+            return list(islice(reader, max_rows))
+    except READ_ERRORS + (UnicodeDecodeError, csv.Error):
+        return []
+
+
+def normalize_name(column):
+    """The function lowers the column name and removes everything but letters and digits."""
+    return re.sub(r'[^0-9a-z]', '', column.lower())
+
+
+def name_score(column, names):
+    """The function scores how much the column name looks like one of the given names,
+    2 for an exact match, 1 when it starts or ends with one of them and 0 otherwise."""
+    name = normalize_name(column)
+    if name in names:
+        return 2
+    # single letters would match almost anything
+    if any(len(known) > 1 and (name.startswith(known) or name.endswith(known)) for known in names):
+        return 1
+    return 0
+
+
+def column_range(rows, index):
+    """The function returns (min, max) of the sampled values of the column, or None when
+    the column isn't numeric or has no value."""
+    values = []
+    non_numeric = 0
+    for row in rows:
+        if index >= len(row):
+            continue
+        value = row[index].strip()
+        if not value:
+            continue
+        try:
+            values.append(float(value))
+        except ValueError:
+            non_numeric += 1
+    if not values or len(values) < NUMERIC_RATIO * (len(values) + non_numeric):
+        return None
+    return min(values), max(values)
+
+
+def detect_xy(header, rows):
+    """The function returns the (x, y) column names that most likely hold the coordinates,
+    or None when no pair of numeric columns looks like coordinates.
+
+    :param header: Column names of the file.
+    :type header: tuple
+
+    :param rows: Sampled rows of the file.
+    :type rows: list
+    """
+    ranges = {index: column_range(rows, index) for index in range(len(header))} if rows else {}
+    best = None
+    best_score = 0
+    for x_index, x_column in enumerate(header):
+        x_score = name_score(x_column, X_NAMES)
+        if not x_score:
+            continue
+        for y_index, y_column in enumerate(header):
+            y_score = name_score(y_column, Y_NAMES)
+            if not y_score or y_index == x_index:
+                continue
+            score = x_score + y_score
+            if rows:
+                x_range = ranges[x_index]
+                y_range = ranges[y_index]
+                # both columns must hold numbers
+                if x_range is None or y_range is None:
+                    continue
+                is_geographic = normalize_name(x_column) in GEOGRAPHIC_NAMES \
+                    or normalize_name(y_column) in GEOGRAPHIC_NAMES
+                in_degrees = -180 <= x_range[0] and x_range[1] <= 180 and -90 <= y_range[0] and y_range[1] <= 90
+                # longitude/latitude names with values out of range are swapped or wrong columns
+                if is_geographic and not in_degrees:
+                    continue
+                if in_degrees:
+                    score += 1
+            if score > best_score:
+                best = (x_column, y_column)
+                best_score = score
+    return best
+
+
+def fields_for_header(header, x_field, y_field, detected):
+    """The function returns the coordinate columns used for a file, the chosen columns when the file has them,
+    otherwise the columns detected for its header. The chosen columns are returned when nothing better is known.
+
+    :param header: Column names of the file, None when they aren't known.
+    :type header: tuple
+
+    :param detected: The (x, y) columns detected for the header, or None.
+    :type detected: tuple
+    """
+    if header is None or (x_field in header and y_field in header) or detected is None:
+        return x_field, y_field
+    return detected
+
+
+def analyze_groups(report, paths, is_canceled=None):
+    """The function reads a bounded sample of the first file of each schema group of the paths, it's enough
+    to detect the coordinate columns and infer the column types of the whole group.
+
+    :param report: Headers and dialects of the files.
+    :type report: SchemaReport
+
+    :param is_canceled: Optional function returning True once the analysis should stop.
+    :type is_canceled: function
+
+    :returns: Dicts of the detected (x, y) columns and of the inferred (column, type) pairs,
+        both with the header of the group as key and None when nothing was found.
+    :rtype: tuple
+    """
+    detected_xy = {}
+    field_types = {}
+    for header, group_paths in report.groups(paths).items():
+        if is_canceled is not None and is_canceled():
+            break
+        sample = read_sample(group_paths[0], dialect=report.dialects.get(group_paths[0]))
+        detected_xy[header] = detect_xy(header, sample)
+        field_types[header] = infer_field_types(header, sample)
+    return detected_xy, field_types
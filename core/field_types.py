@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ FieldTypes
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Column types of a schema group inferred from a bounded sample of rows, given to the
+ delimited text provider so it doesn't scan every file to detect them itself.
+"""
+
+import math
+
+# field types of the delimited text provider uri, from the narrowest to the widest
+INTEGER = 'integer'
+LONGLONG = 'longlong'
+DOUBLE = 'double'
+TEXT = 'text'
+
+# range of the values of an integer field
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+
+def value_type(value):
+    """The function returns the narrowest field type holding the stripped, non empty value."""
+    try:
+        number = int(value)
+    except ValueError:
+        pass
+    else:
+        return INTEGER if INT_MIN <= number <= INT_MAX else LONGLONG
+    try:
+        number = float(value)
+    except ValueError:
+        return TEXT
+    # nan and inf are read as text by the provider
+    return DOUBLE if math.isfinite(number) else TEXT
+
+
+def column_type(rows, index):
+    """The function returns the field type of the column from its sampled values, a column without
+    any value is text."""
+    result = None
+    for row in rows:
+        if index >= len(row):
+            continue
+        value = row[index].strip()
+        if not value:
+            continue
+        current = value_type(value)
+        if current == TEXT:
+            return TEXT
+        if result is None or current == DOUBLE or (current == LONGLONG and result == INTEGER):
+            result = current
+    return result or TEXT
+
+
+def infer_field_types(header, rows):
+    """The function returns the (column, type) pairs of the header from the sampled rows, or None when
+    there's no row to infer them from.
+
+    :param header: Column names of the files of the schema group.
+    :type header: tuple
+
+    :param rows: Sampled rows of the first file of the group.
+    :type rows: list
+    """
+    if not header or not rows:
+        return None
+    return tuple((column, column_type(rows, index)) for index, column in enumerate(header))
+
+
+def with_coordinate_types(field_types, x_field, y_field):
+    """The function returns the (column, type) pairs with the coordinate columns read as double, a sample
+    of whole numbers would make them integer and the decimals of the other rows would be lost.
+
+    :param field_types: (column, type) pairs inferred for the schema group.
+    :type field_types: tuple
+    """
+    return tuple((column, DOUBLE if column in (x_field, y_field) else field_type)
+                 for column, field_type in field_types)
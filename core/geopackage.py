@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ GeoPackage
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Helpers of the GeoPackage import target, a GeoPackage is an SQLite database.
+"""
+
+import os
+import re
+import sqlite3
+
+from .archives import strip_extension
+
+
+def table_names(paths, top_level_path):
+    """The function returns a unique GeoPackage table name for every file, built from its path
+    relative to top_level_path so files with the same name in different directories don't collide.
+
+    :returns: Full path as key and table name as value.
+    :rtype: dict
+    """
+    names = {}
+    # table names are case insensitive in SQLite
+    used = set()
+    for path in paths:
+        relative_path = strip_extension(os.path.relpath(path, top_level_path))
+        name = re.sub(r'[^0-9A-Za-z_]+', '_', relative_path).strip('_') or 'layer'
+        if name[0].isdigit() or name.lower().startswith(('gpkg', 'rtree', 'sqlite')):
+            name = 't_' + name
+        unique_name = name
+        i = 1
+        while unique_name.lower() in used:
+            i += 1
+            unique_name = '{}_{}'.format(name, i)
+        used.add(unique_name.lower())
+        names[path] = unique_name
+    return names
+
+
+def quote_identifier(name):
+    """The function quotes a table or column name for SQLite."""
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def create_attribute_indexes(gpkg_path, tables, fields):
+    """The function creates an index on each of the given fields of every table having them,
+    all the indexes are created in one transaction.
+
+    :param tables: Names of the tables to index.
+    :type tables: list
+
+    :param fields: Names of the columns to index.
+    :type fields: list
+
+    :returns: Number of indexes created.
+    :rtype: int
+    """
+    created = 0
+    connection = sqlite3.connect(gpkg_path)
+    try:
+        with connection:
+            for table in tables:
+                info = connection.execute('PRAGMA table_info({})'.format(quote_identifier(table)))
+                columns = {row[1] for row in info}
+                for field in fields:
+                    if field not in columns:
+                        continue
+                    index_name = 'idx_{}_{}'.format(table, re.sub(r'[^0-9A-Za-z_]+', '_', field))
+                    connection.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+                        quote_identifier(index_name), quote_identifier(table), quote_identifier(field)))
+                    created += 1
+    finally:
+        connection.close()
+    return created
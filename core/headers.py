@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Headers
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Header analysis of the whole tree, only the first line of every file is read.
+"""
+
+import csv
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .archives import READ_ERRORS
+from .sniffing import sniff_file, open_text, csv_reader
+
+# header reads wait on the disk or the network, not on the CPU
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def read_header(path, dialect=None):
+    """The function reads the first line of the file and returns its column names as a tuple,
+    the tuple is the schema fingerprint of the file. None is returned for empty or unreadable files.
+    Files without header get the field_1, field_2... names given by the delimited text provider.
+
+    :param dialect: Dialect of the file, sniffed when not given.
+    :type dialect: Dialect
+    """
+    if dialect is None:
+        dialect = sniff_file(path)
+    try:
+        with open_text(path, dialect) as file:
+            header = next(csv_reader(file, dialect), None)
+    except READ_ERRORS + (UnicodeDecodeError, csv.Error):
+        return None
+    if not header:
+        return None
+    if not dialect.has_header:
+        return tuple('field_{}'.format(i + 1) for i in range(len(header)))
+    return tuple(header)
+
+
+def analyze_file(path):
+    """The function sniffs the dialect of the file then reads its header, returns (header, dialect)."""
+    dialect = sniff_file(path)
+    return read_header(path, dialect), dialect
+
+
+class SchemaReport:
+    """Headers of the scanned files grouped by schema fingerprint."""
+
+    def __init__(self, headers=None, dialects=None):
+        """Constructor.
+
+        :param headers: Full path of the file as key and its header tuple (or None) as value.
+        :type headers: dict
+
+        :param dialects: Full path of the file as key and its sniffed Dialect as value.
+        :type dialects: dict
+        """
+        self.headers = headers if headers is not None else {}
+        self.dialects = dialects if dialects is not None else {}
+
+    def groups(self, paths):
+        """The function groups the given paths by schema fingerprint, largest group first.
+        Files without a readable header are left out."""
+        groups = {}
+        for path in paths:
+            header = self.headers.get(path)
+            if header is not None:
+                groups.setdefault(header, []).append(path)
+        return dict(sorted(groups.items(), key=lambda item: -len(item[1])))
+
+    def column_counts(self, paths):
+        """The function returns a Counter with the number of the given files containing each column."""
+        # count the fingerprints first, the columns of each group are then counted once
+        fingerprints = Counter(self.headers.get(path) for path in paths)
+        counts = Counter()
+        for header, count in fingerprints.items():
+            if header is not None:
+                for column in set(header):
+                    counts[column] += count
+        return counts
+
+    def candidate_columns(self, paths):
+        """The function returns (column, count) pairs of the columns that can be used as coordinates
+        for the given files, count is the number of files containing the column. The columns contained
+        by every file come first, the callers tell the user about the ones missing from some files."""
+        counts = self.column_counts(paths)
+        # most common first, then in the order of the first header containing them
+        order = {}
+        for header in self.groups(paths):
+            for column in header:
+                order.setdefault(column, len(order))
+        return sorted(counts.items(), key=lambda item: (-item[1], order.get(item[0], 0)))
+
+
+def analyze_headers(paths, max_workers=MAX_WORKERS, is_canceled=None, set_progress=None):
+    """The function sniffs the dialect and reads the header of every given file with a bounded thread pool
+    and returns a SchemaReport. The analysis stops early when is_canceled returns True.
+
+    :param paths: Full paths of the files to analyze.
+    :type paths: list
+
+    :param max_workers: Maximum number of headers read at the same time.
+    :type max_workers: int
+
+    :param is_canceled: Optional function returning True when the analysis must stop.
+    :type is_canceled: function
+
+    :param set_progress: Optional function called with the percentage of files done.
+    :type set_progress: function
+    """
+    headers = {}
+    dialects = {}
+    total = len(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(path, executor.submit(analyze_file, path)) for path in paths]
+        for i, (path, future) in enumerate(futures):
+            if is_canceled is not None and is_canceled():
+                for _, pending in futures:
+                    pending.cancel()
+                break
+            headers[path], dialects[path] = future.result()
+            if set_progress is not None:
+                set_progress(100.0 * (i + 1) / total)
+    return SchemaReport(headers, dialects)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ MemoryBudget
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Memory accounting of the layers loaded on demand.
+"""
+
+from collections import OrderedDict
+
+# default budget of the layers loaded on demand, in MB
+DEFAULT_BUDGET_MB = 512
+
+
+class MemoryBudget:
+    """Estimated memory of the loaded layers, in least recently used order."""
+
+    def __init__(self, limit):
+        """Constructor.
+
+        :param limit: Memory the loaded layers may use, in bytes.
+        :type limit: int
+        """
+        self.limit = limit
+        self.used = 0
+        # key of the layer as key and its estimated memory as value, least recently used first
+        self._sizes = OrderedDict()
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __contains__(self, key):
+        return key in self._sizes
+
+    def touch(self, key, size=0):
+        """The function marks the layer as the most recently used one, adding it with the given size if it's new."""
+        if key in self._sizes:
+            self._sizes.move_to_end(key)
+        else:
+            self._sizes[key] = size
+            self.used += size
+
+    def discard(self, key):
+        """The function removes the layer from the budget if it's in it."""
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self.used -= size
+
+    def evictions(self, is_pinned=None):
+        """The function returns the keys of the layers to unload, least recently used first, to get back
+        under the limit. Pinned layers are never returned, so the limit may still be exceeded.
+
+        :param is_pinned: Optional function telling if the layer of the given key must be kept.
+        :type is_pinned: function
+        """
+        to_free = self.used - self.limit
+        keys = []
+        for key, size in self._sizes.items():
+            if to_free <= 0:
+                break
+            if is_pinned is not None and is_pinned(key):
+                continue
+            keys.append(key)
+            to_free -= size
+        return keys
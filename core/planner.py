@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Planner
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Import planner, it turns the selected paths into the group/file plan of the layer tree.
+ The layer tree builder only creates the nodes the plan tells it to.
+"""
+
+import os
+
+from .archives import strip_extension
+
+
+def top_level_path(paths_list):
+    """The function returns the directory holding all the given files, the top level group of the tree."""
+    # handle if only one file is selected
+    if len(paths_list) == 1:
+        return os.path.normpath(os.path.dirname(paths_list[0]))
+    # find the common path among all the paths
+    return os.path.normpath(os.path.commonpath(paths_list))
+
+
+class PlanGroup:
+    """Group of the layer tree standing for a directory."""
+
+    __slots__ = ('path', 'name', 'parent', 'rank', 'slot', 'child_count', 'attached', 'counts')
+
+    def __init__(self, path, name, parent, rank):
+        self.path = path
+        self.name = name
+        # PlanGroup containing this group, None for the top level group
+        self.parent = parent
+        # index of the first file under the group in the selected paths
+        self.rank = rank
+        # position of the group among the planned children of its parent
+        self.slot = 0
+        # number of planned children, sub groups and files
+        self.child_count = 0
+        # True once the group is attached to its parent
+        self.attached = False
+        # Fenwick tree of the attached children by slot, created with the first attached child
+        self.counts = None
+
+
+class PlanFile:
+    """Layer of the layer tree standing for a file."""
+
+    __slots__ = ('path', 'name', 'group', 'rank', 'slot')
+
+    def __init__(self, path, name, group, rank):
+        self.path = path
+        self.name = name
+        # PlanGroup of the directory of the file
+        self.group = group
+        # index of the file in the selected paths
+        self.rank = rank
+        # position of the file among the planned children of its group
+        self.slot = 0
+
+
+def plan_key(path):
+    """The function returns the key sorting the files like the layer tree shows them: the directory names
+    compared one by one, so "2023" comes before "2023 backup", and in every directory its sub directories
+    before its files, like the scanner and the dialog list them. Every directory and its sub directories
+    stay contiguous in the sorted keys."""
+    head, name = os.path.split(path)
+    return tuple((0, part) for part in head.split(os.sep) if part) + ((1, name),)
+
+
+def plan_keys(paths_list, nodes=None):
+    """The function returns the plan_key of every path. The key of a directory is built once and shared by
+    its files: from the names of the ScanNode chain of the file when it's given, the path of the root node
+    is the only one split, otherwise from the directory path split once.
+
+    :param nodes: Optional ScanNode (or None) of every path, in the same order.
+    :type nodes: list
+    """
+    # directory path, or id of the directory ScanNode, as key and its key as value
+    dir_keys = {}
+    keys = []
+    for path, node in zip(paths_list, nodes or [None] * len(paths_list)):
+        if node is not None and node.parent is not None:
+            # climb to the first directory whose key is known
+            chain = []
+            parent = node.parent
+            while parent.parent is not None and id(parent) not in dir_keys:
+                chain.append(parent)
+                parent = parent.parent
+            key = dir_keys.get(id(parent))
+            if key is None:
+                key = dir_keys[id(parent)] = tuple((0, part) for part in parent.name.split(os.sep) if part)
+            for directory in reversed(chain):
+                key = dir_keys[id(directory)] = key + ((0, directory.name),)
+            keys.append(key + ((1, node.name),))
+            continue
+        head, name = os.path.split(path)
+        key = dir_keys.get(head)
+        if key is None:
+            key = dir_keys[head] = tuple((0, part) for part in head.split(os.sep) if part)
+        keys.append(key + ((1, name),))
+    return keys
+
+
+class ImportPlan:
+    """Groups and files of the layer tree of the selected paths, sub directories before files.
+
+    The paths are sorted once by plan_key and walked as a prefix trie: a file in the same directory
+    as the previous one reuses its group, otherwise only the directories missing from the current
+    branch get their group, so the work grows with the number of distinct directories, not with
+    files x depth, and nothing is read from the disk.
+
+    The files may be attached in any order, for instance as their layers finish loading in the
+    background. Every child knows its final position among the planned children of its group,
+    the index it's inserted at is the number of attached children before it, counted by a Fenwick
+    tree of the group, so the final tree is always the same. Groups are only attached with their
+    first file, a directory whose files all fail to load doesn't show up."""
+
+    def __init__(self, paths_list, nodes=None):
+        """Constructor.
+
+        :param paths_list: Full paths of the selected CSV/TSV files.
+        :type paths_list: list
+
+        :param nodes: Optional ScanNode (or None) of every path, in the same order, the directory
+            names are read from them instead of the paths.
+        :type nodes: list
+        """
+        keys = sorted(zip(plan_keys(paths_list, nodes), paths_list))
+        # the common directory of all the files is the common directory of the first and last ones
+        depth = 0
+        if keys:
+            first, last = keys[0][0], keys[-1][0]
+            while depth < min(len(first), len(last)) - 1 and first[depth] == last[depth]:
+                depth += 1
+            top_path = os.path.dirname(keys[0][1])
+            for _ in range(len(first) - 1 - depth):
+                top_path = os.path.dirname(top_path)
+        else:
+            top_path = os.sep
+        self.top_level_path = os.path.normpath(top_path)
+        self.top_level_group = PlanGroup(self.top_level_path, os.path.basename(self.top_level_path), None, 0)
+        # directory path as key and its PlanGroup as value
+        self.groups = {self.top_level_path: self.top_level_group}
+        # file path as key and its PlanFile as value, in the sorted order
+        self.files = {}
+
+        # groups of the current branch of the trie from the top level group, and the key of its directory
+        branch = [self.top_level_group]
+        branch_key = first[:depth] if keys else ()
+        for rank, (key, path) in enumerate(keys):
+            dir_key = key[:-1]
+            if dir_key != branch_key:
+                # keep the groups of the directories shared with the previous file
+                shared = depth
+                while shared < min(len(dir_key), len(branch_key)) and dir_key[shared] == branch_key[shared]:
+                    shared += 1
+                del branch[shared - depth + 1:]
+                group = branch[-1]
+                for _, folder_name in dir_key[shared:]:
+                    group_path = os.path.join(group.path, folder_name)
+                    child = self.groups[group_path] = PlanGroup(group_path, folder_name, group, rank)
+                    child.slot = group.child_count
+                    group.child_count += 1
+                    group = child
+                    branch.append(group)
+                branch_key = dir_key
+            group = branch[-1]
+            file = self.files[path] = PlanFile(path, strip_extension(key[-1][1]), group, rank)
+            file.slot = group.child_count
+            group.child_count += 1
+
+    def insert_index(self, group, slot):
+        """The function records the child of the given slot attached to the group and returns its index,
+        the number of children attached before it."""
+        counts = group.counts
+        if counts is None:
+            counts = group.counts = [0] * (group.child_count + 1)
+        index = 0
+        i = slot
+        while i > 0:
+            index += counts[i]
+            i -= i & -i
+        i = slot + 1
+        while i < len(counts):
+            counts[i] += 1
+            i += i & -i
+        return index
+
+    def attach_group(self, group):
+        """The function attaches the group and its missing parents, returns the (parent, index, group)
+        insertions to do, parents first. Nothing is returned for an attached group."""
+        # a group is attached together with its first child, so only groups with children are attached
+        if group.parent is None or group.attached:
+            return []
+        group.attached = True
+        insertions = self.attach_group(group.parent)
+        insertions.append((group.parent, self.insert_index(group.parent, group.slot), group))
+        return insertions
+
+    def attach_file(self, path):
+        """The function attaches the file and the groups missing above it.
+
+        :returns: List of (parent PlanGroup, index, PlanGroup or PlanFile) to insert in this order,
+            the missing groups first and the file last.
+        :rtype: list
+        """
+        file = self.files[path]
+        insertions = self.attach_group(file.group)
+        insertions.append((file.group, self.insert_index(file.group, file.slot), file))
+        return insertions
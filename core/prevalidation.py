@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Prevalidation
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Pre-flight validation of the coordinate columns, the X/Y values are streamed
+ in large chunks and checked with NumPy without building any layer.
+"""
+
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy ships with QGIS, the validation is skipped on the rare builds without it
+    np = None
+
+from .archives import READ_ERRORS
+from .sniffing import sniff_file, open_text, csv_reader
+
+# number of rows converted at once
+CHUNK_ROWS = 65536
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def is_available():
+    """The function checks if NumPy can be used for the validation."""
+    return np is not None
+
+
+class FileStats:
+    """Coordinate statistics of one file."""
+
+    __slots__ = ('path', 'rows', 'non_numeric', 'nan', 'out_of_bounds', 'bbox', 'error')
+
+    def __init__(self, path):
+        self.path = path
+        # number of data rows
+        self.rows = 0
+        # rows with a coordinate that isn't a number
+        self.non_numeric = 0
+        # rows with an empty or NaN coordinate
+        self.nan = 0
+        # rows with coordinates outside the area of use of the CRS
+        self.out_of_bounds = 0
+        # (xmin, ymin, xmax, ymax) of the valid coordinates, None when there's none
+        self.bbox = None
+        # reason the file can't be loaded at all
+        self.error = None
+
+    @property
+    def valid_rows(self):
+        """Number of rows with valid coordinates."""
+        return self.rows - self.non_numeric - self.nan - self.out_of_bounds
+
+    @property
+    def is_valid(self):
+        """The file can be loaded when it has at least one row with valid coordinates."""
+        return self.error is None and self.valid_rows > 0
+
+
+def to_float(values):
+    """The function converts a list of strings to a float64 array, empty strings become NaN.
+
+    :returns: The array and the mask of the values that aren't numbers.
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    strings = np.char.strip(np.asarray(values, dtype=str))
+    empty = strings == ''
+    try:
+        # one vectorized conversion for the usual case of clean numbers
+        array = np.where(empty, 'nan', strings).astype(np.float64)
+        return array, np.zeros(len(values), dtype=bool)
+    except ValueError:
+        pass
+    # the chunk has bad values, convert it value by value to find them
+    array = np.full(len(values), np.nan)
+    non_numeric = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(strings):
+        if empty[i]:
+            continue
+        try:
+            array[i] = float(value)
+        except ValueError:
+            non_numeric[i] = True
+    return array, non_numeric
+
+
+def validate_file(path, x_field, y_field, bounds=None, chunk_rows=CHUNK_ROWS, dialect=None):
+    """The function streams the X/Y columns of the file in chunks and counts the non numeric, NaN and
+    out of bounds values, it also computes the bounding box of the valid coordinates.
+
+    :param bounds: Optional (xmin, ymin, xmax, ymax) area of use of the CRS, in the CRS units.
+    :type bounds: tuple
+
+    :param dialect: Dialect of the file, sniffed when not given.
+    :type dialect: Dialect
+    """
+    stats = FileStats(path)
+    xmin = ymin = np.inf
+    xmax = ymax = -np.inf
+    if dialect is None:
+        dialect = sniff_file(path)
+    try:
+        with open_text(path, dialect) as file:
+            reader = csv_reader(file, dialect)
+            header = next(reader, None) or []
+            if not dialect.has_header:
+                # the first line is data, the columns get the names given by the delimited text provider
+                reader = chain([header], reader)
+                header = ['field_{}'.format(i + 1) for i in range(len(header))]
+            if x_field not in header or y_field not in header:
+                stats.error = 'missing column {}'.format(x_field if x_field not in header else y_field)
+                return stats
+            x_index = header.index(x_field)
+            y_index = header.index(y_field)
+
+            while True:
+                chunk = list(islice(reader, chunk_rows))
+                if not chunk:
+                    break
+                xs, x_bad = to_float([row[x_index] if x_index < len(row) else '' for row in chunk])
+                ys, y_bad = to_float([row[y_index] if y_index < len(row) else '' for row in chunk])
+
+                non_numeric = x_bad | y_bad
+                nan = ~non_numeric & (np.isnan(xs) | np.isnan(ys))
+                valid = ~(non_numeric | nan)
+                if bounds is not None:
+                    inside = (xs >= bounds[0]) & (ys >= bounds[1]) & (xs <= bounds[2]) & (ys <= bounds[3])
+                    out_of_bounds = valid & ~inside
+                    valid &= inside
+                    stats.out_of_bounds += int(out_of_bounds.sum())
+
+                stats.rows += len(chunk)
+                stats.non_numeric += int(non_numeric.sum())
+                stats.nan += int(nan.sum())
+                if valid.any():
+                    xmin = min(xmin, xs[valid].min())
+                    ymin = min(ymin, ys[valid].min())
+                    xmax = max(xmax, xs[valid].max())
+                    ymax = max(ymax, ys[valid].max())
+    except READ_ERRORS + (UnicodeDecodeError, csv.Error) as e:
+        stats.error = str(e)
+        return stats
+
+    if stats.valid_rows > 0:
+        stats.bbox = (float(xmin), float(ymin), float(xmax), float(ymax))
+    return stats
+
+
+def validate_files(jobs, bounds=None, max_workers=MAX_WORKERS, is_canceled=None, set_progress=None, dialects=None):
+    """The function validates the given files with a bounded thread pool.
+
+    :param jobs: List of (path, x_field, y_field) of the files to validate.
+    :type jobs: list
+
+    :param dialects: Optional full path of the file as key and its sniffed Dialect as value.
+    :type dialects: dict
+
+    :returns: List of FileStats in the order of the jobs, shorter when canceled.
+    :rtype: list
+    """
+    results = []
+    total = len(jobs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dialects = dialects or {}
+        futures = [executor.submit(validate_file, path, x_field, y_field, bounds, CHUNK_ROWS, dialects.get(path))
+                   for path, x_field, y_field in jobs]
+        for i, future in enumerate(futures):
+            if is_canceled is not None and is_canceled():
+                for pending in futures:
+                    pending.cancel()
+                break
+            results.append(future.result())
+            if set_progress is not None:
+                set_progress(100.0 * (i + 1) / total)
+    return results
+
+
+def summarize(results):
+    """The function returns a short text summary of the validation results."""
+    valid = [stats for stats in results if stats.is_valid]
+    rows = sum(stats.rows for stats in results)
+    lines = [
+        '{} of {} files have valid coordinates'.format(len(valid), len(results)),
+        '{} rows: {} non numeric, {} empty or NaN, {} outside the CRS area of use'.format(
+            rows,
+            sum(stats.non_numeric for stats in results),
+            sum(stats.nan for stats in results),
+            sum(stats.out_of_bounds for stats in results)),
+    ]
+    boxes = [stats.bbox for stats in valid if stats.bbox is not None]
+    if boxes:
+        lines.append('Extent: {:.6g}, {:.6g} : {:.6g}, {:.6g}'.format(
+            min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes)))
+    return '\n'.join(lines)
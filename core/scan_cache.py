@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ScanCache
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Persistent SQLite cache of the scanned directory listings and file headers.
+
+ A directory listing is reused while the mtime of the directory is unchanged,
+ which is the case as long as no entry is added, removed or renamed in it.
+ Headers and sniffed dialects are reused while the size and mtime recorded for the file match
+ the ones read from the disk, a file rewritten in place doesn't change the mtime of its directory.
+"""
+
+import json
+import os
+import sqlite3
+
+from .sniffing import Dialect
+
+# schema version, the tables are recreated when it changes
+CACHE_VERSION = 3
+
+# kind of the entries stored in a listing
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_DIR_LINK = 2
+KIND_ZIP = 3
+
+# paths looked up by one query, below the default limit of the SQLite variables
+QUERY_PATHS = 500
+
+
+def stat_files(files):
+    """The function returns the (path, size, mtime) of the given files as they are on the disk now, the
+    listing of a directory read from the cache keeps the size and mtime of the files rewritten in place.
+    The files that can't be stat'ed, like the members of zip archives, keep the given values.
+
+    :param files: List of (path, size, mtime) of the scanned files.
+    :type files: list
+    """
+    result = []
+    for path, size, mtime in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            result.append((path, size, mtime))
+        else:
+            result.append((path, stat.st_size, stat.st_mtime))
+    return result
+
+
+class ScanCache:
+    """SQLite cache shared by the scan and the header analysis.
+
+    A connection can only be used by the thread that created it, every background
+    task opens its own ScanCache and closes it when it's done."""
+
+    def __init__(self, db_path):
+        """Constructor.
+
+        :param db_path: Path of the SQLite database, created when it doesn't exist.
+        :type db_path: str
+        """
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=10)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != CACHE_VERSION:
+            self.connection.executescript('''
+                DROP TABLE IF EXISTS dirs;
+                DROP TABLE IF EXISTS headers;
+                CREATE TABLE dirs (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    extensions TEXT NOT NULL,
+                    entries TEXT NOT NULL);
+                CREATE TABLE headers (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    header TEXT,
+                    dialect TEXT);
+                PRAGMA user_version = {};
+            '''.format(CACHE_VERSION))
+
+    def close(self):
+        """The function commits the pending changes and closes the database."""
+        self.connection.commit()
+        self.connection.close()
+
+    def commit(self):
+        self.connection.commit()
+
+    def get_listing(self, dir_path, mtime_ns, extensions):
+        """The function returns the cached entries of the directory as a list of (name, kind, size, mtime),
+        or None when the directory isn't cached or changed since it was cached."""
+        row = self.connection.execute(
+            'SELECT mtime_ns, extensions, entries FROM dirs WHERE path = ?', (dir_path,)).fetchone()
+        if row is None or row[0] != mtime_ns or row[1] != '|'.join(extensions):
+            return None
+        return json.loads(row[2])
+
+    def put_listing(self, dir_path, mtime_ns, extensions, entries):
+        """The function stores the entries of the directory, a list of (name, kind, size, mtime)."""
+        self.connection.execute(
+            'INSERT OR REPLACE INTO dirs (path, mtime_ns, extensions, entries) VALUES (?, ?, ?, ?)',
+            (dir_path, mtime_ns, '|'.join(extensions), json.dumps(entries, separators=(',', ':'))))
+
+    def get_headers(self, files):
+        """The function returns the cached headers and dialects of the given files whose size and mtime didn't change.
+
+        :param files: List of (path, size, mtime) of the files.
+        :type files: list
+
+        :returns: Full path as key and header tuple (or None for unreadable files) as value,
+            and full path as key and Dialect as value.
+        :rtype: (dict, dict)
+        """
+        headers = {}
+        dialects = {}
+        stats = {path: (size, mtime) for path, size, mtime in files}
+        paths = list(stats)
+        for start in range(0, len(paths), QUERY_PATHS):
+            chunk = paths[start:start + QUERY_PATHS]
+            rows = self.connection.execute(
+                'SELECT path, size, mtime, header, dialect FROM headers WHERE path IN ({})'.format(
+                    ','.join('?' * len(chunk))), chunk)
+            for path, size, mtime, header, dialect in rows:
+                if stats[path] == (size, mtime) and dialect is not None:
+                    headers[path] = tuple(json.loads(header)) if header is not None else None
+                    dialects[path] = Dialect.from_dict(json.loads(dialect))
+        return headers, dialects
+
+    def put_headers(self, files, headers, dialects):
+        """The function stores the headers and dialects of the given files, a list of (path, size, mtime)."""
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO headers (path, size, mtime, header, dialect) VALUES (?, ?, ?, ?, ?)',
+            ((path, size, mtime, json.dumps(headers[path]) if headers.get(path) is not None else None,
+              json.dumps(dialects[path].to_dict()))
+             for path, size, mtime in files if path in headers and path in dialects))
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Scanner
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Single pass directory scanner, every directory is listed once with os.scandir
+ and every CSV/TSV file is stat'ed once. The later stages read the entry type,
+ size and mtime from the ScanNode tree instead of asking the filesystem again.
+ Zip archives are listed from their central directory and show up as folders.
+"""
+
+import os
+from fnmatch import fnmatch
+
+from .archives import GZIP_EXTENSIONS, ZIP_EXTENSION, register_archive, zip_members
+from .scan_cache import KIND_FILE, KIND_DIR, KIND_DIR_LINK, KIND_ZIP
+
+# extensions of the files kept by the scanner
+CSV_EXTENSIONS = ('.csv', '.tsv') + GZIP_EXTENSIONS
+
+
+class ScanNode:
+    """A directory or a CSV/TSV file found by the scanner."""
+
+    __slots__ = ('name', 'path', 'parent', 'is_dir', 'is_archive', 'size', 'mtime', 'children', 'index')
+
+    def __init__(self, name, parent=None, is_dir=True, size=0, mtime=0.0, is_archive=False):
+        """Constructor.
+
+        :param name: Base name of the entry, or the full normalized path for the root node.
+        :type name: str
+
+        :param parent: Directory node containing this entry, None for the root node.
+        :type parent: ScanNode
+
+        :param is_dir: True for directories, False for files.
+        :type is_dir: bool
+
+        :param size: Size of the file in bytes as stored on the disk, the compressed size for compressed
+            files and archive members, 0 for directories.
+        :type size: int
+
+        :param mtime: Modification time of the file, the one of the archive for its members, 0 for directories.
+        :type mtime: float
+
+        :param is_archive: True for zip archives, they are directories whose children are the members.
+        :type is_archive: bool
+        """
+        self.name = name
+        # full path built once from the parent path, every consumer reads it instead of joining names again
+        self.path = name if parent is None else os.path.join(parent.path, name)
+        self.parent = parent
+        self.is_dir = is_dir
+        self.is_archive = is_archive
+        self.size = size
+        self.mtime = mtime
+        # directories keep their sub directories first then their files, files have no children
+        self.children = [] if is_dir else None
+        # position of the node in the arrays of the dialog tree model, -1 until the model knows it
+        self.index = -1
+
+    def __repr__(self):
+        return 'ScanNode({!r}, is_dir={})'.format(self.path, self.is_dir)
+
+    def in_archive(self):
+        """The function returns True for the virtual folders and files inside a zip archive."""
+        node = self.parent
+        while node is not None:
+            if node.is_archive:
+                return True
+            node = node.parent
+        return False
+
+    def iter_subtree(self):
+        """The function yields the node and all its descendants, parents before their children."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children:
+                stack.extend(reversed(node.children))
+
+    def iter_files(self):
+        """The function yields all file nodes under the node."""
+        return (node for node in self.iter_subtree() if not node.is_dir)
+
+
+def scan_directory(node, extensions=CSV_EXTENSIONS, cache=None):
+    """The function lists the directory of the given node once with os.scandir and adds its
+    sub directories and files having one of the given extensions as children of the node.
+    Directories that can't be listed are left empty like os.walk does. Zip archives are
+    added as directories, their members are listed by scan_archive.
+
+    When a ScanCache is given and the mtime of the directory didn't change since it was cached,
+    the cached listing is used and the directory is stat'ed only once.
+
+    :returns: The sub directories to scan next, symbolic links to directories are listed
+        but not followed like os.walk.
+    :rtype: list
+    """
+    dir_path = node.path
+    mtime_ns = None
+    if cache is not None:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return []
+        entries = cache.get_listing(dir_path, mtime_ns, extensions)
+        if entries is not None:
+            return _add_children(node, entries)
+
+    try:
+        entries = _list_entries(dir_path, extensions)
+    except OSError:
+        return []
+
+    if cache is not None:
+        cache.put_listing(dir_path, mtime_ns, extensions, entries)
+    return _add_children(node, entries)
+
+
+def _list_entries(dir_path, extensions):
+    """The function lists the directory once with os.scandir and returns the (name, kind, size, mtime)
+    entries of its sub directories, of its files having one of the given extensions and of its zip
+    archives. OSError is raised when the directory itself can't be listed."""
+    entries = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            try:
+                # the entry type comes from the directory listing on most platforms, no stat needed
+                if entry.is_dir():
+                    entries.append((entry.name, KIND_DIR_LINK if entry.is_symlink() else KIND_DIR, 0, 0.0))
+                elif entry.name.endswith(extensions):
+                    # the only stat call for this file
+                    stat = entry.stat()
+                    entries.append((entry.name, KIND_FILE, stat.st_size, stat.st_mtime))
+                elif entry.name.lower().endswith(ZIP_EXTENSION):
+                    stat = entry.stat()
+                    entries.append((entry.name, KIND_ZIP, stat.st_size, stat.st_mtime))
+            except OSError:
+                # broken link or entry removed while listing
+                continue
+    return entries
+
+
+def _add_children(node, entries):
+    """The function sets the children of the node from a list of (name, kind, size, mtime) entries,
+    sub directories first, and returns the sub directories to scan next."""
+    dirs = []
+    files = []
+    to_scan = []
+    for name, kind, size, mtime in entries:
+        if kind == KIND_FILE:
+            files.append(ScanNode(name, node, False, size, mtime))
+        elif kind == KIND_ZIP:
+            child = ScanNode(name, node, True, size, mtime, is_archive=True)
+            # the paths of its members are split without checking the archive on the disk again
+            register_archive(child.path)
+            dirs.append(child)
+            to_scan.append(child)
+        else:
+            child = ScanNode(name, node, True)
+            dirs.append(child)
+            if kind == KIND_DIR:
+                to_scan.append(child)
+    node.children = dirs + files
+    return to_scan
+
+
+def scan_archive(node, extensions=CSV_EXTENSIONS):
+    """The function sets the whole subtree of the zip archive of the given node, the folders of the
+    archive become virtual directory nodes. Only the central directory of the archive is read.
+
+    :returns: The virtual directory nodes of the archive, the archive node included, parents
+        before their children.
+    :rtype: list
+    """
+    node.children = []
+    # virtual folder path inside the archive as key and its node as value
+    folders = {'': node}
+    for member, size in zip_members(node.path, extensions):
+        folder_path, _, name = member.rpartition('/')
+        parent = folders.get(folder_path)
+        if parent is None:
+            parent = node
+            sub_path = ''
+            # create the missing folders from the top of the archive
+            for folder_name in folder_path.split('/'):
+                sub_path = sub_path + '/' + folder_name if sub_path else folder_name
+                folder = folders.get(sub_path)
+                if folder is None:
+                    folder = folders[sub_path] = ScanNode(folder_name, parent, True)
+                    parent.children.append(folder)
+                parent = folder
+        parent.children.append(ScanNode(name, parent, False, size, node.mtime))
+    # sub directories first like scan_directory
+    for folder in folders.values():
+        folder.children.sort(key=lambda child: not child.is_dir)
+    return [descendant for descendant in node.iter_subtree() if descendant.is_dir]
+
+
+def iter_scan(root, extensions=CSV_EXTENSIONS, is_canceled=None, cache=None):
+    """The function scans the tree under the root node, it yields every directory node once its
+    children are known, parents before their children. The root node is the first yielded node.
+
+    :param root: Node of the directory to scan, its name is the full normalized path.
+    :type root: ScanNode
+
+    :param extensions: Extensions of the files to keep.
+    :type extensions: tuple
+
+    :param is_canceled: Optional function returning True when the scan must stop.
+    :type is_canceled: function
+
+    :param cache: Optional cache of the directory listings.
+    :type cache: ScanCache
+    """
+    stack = [root]
+    while stack:
+        if is_canceled is not None and is_canceled():
+            return
+        node = stack.pop()
+        if node.is_archive:
+            # the whole archive is listed at once, its folders are yielded like directories
+            yield from scan_archive(node, extensions)
+            continue
+        sub_dirs = scan_directory(node, extensions, cache)
+        yield node
+        # keep the listing order, first sub directory is scanned first
+        stack.extend(reversed(sub_dirs))
+
+
+def rescan_directory(node, extensions=CSV_EXTENSIONS):
+    """The function lists the directory of the given node again and applies the difference to its
+    children. Unchanged children keep their node and their order, so anything attached to them stays
+    valid, the new sub directories come after the kept ones and the new files after the kept files.
+    New sub directories are scanned completely. When the directory can't be listed the children are
+    kept, a transient error like a share being remounted doesn't look like every entry was removed.
+
+    :returns: The added and the removed child nodes.
+    :rtype: (list, list)
+    """
+    try:
+        entries = _list_entries(node.path, extensions)
+    except OSError:
+        return [], []
+    fresh = ScanNode(node.name, node.parent)
+    to_scan = {id(child) for child in _add_children(fresh, entries)}
+    fresh_children = {child.name: child for child in fresh.children}
+
+    kept = []
+    removed = []
+    for old_child in node.children:
+        child = fresh_children.get(old_child.name)
+        # an entry replaced by another kind of entry is removed then added again, so is a changed archive
+        if child is not None and old_child.is_dir == child.is_dir and old_child.is_archive == child.is_archive \
+                and not (child.is_archive and (old_child.size, old_child.mtime) != (child.size, child.mtime)):
+            if not child.is_dir:
+                old_child.size = child.size
+                old_child.mtime = child.mtime
+            del fresh_children[old_child.name]
+            kept.append(old_child)
+        else:
+            removed.append(old_child)
+
+    # the entries left are the new ones, in the listing order
+    added = list(fresh_children.values())
+    for child in added:
+        child.parent = node
+        if id(child) in to_scan:
+            # consume the scan to fill the new sub directory
+            for _ in iter_scan(child, extensions):
+                pass
+    # sub directories first like scan_directory
+    node.children = [child for child in kept if child.is_dir] + [child for child in added if child.is_dir] + \
+        [child for child in kept if not child.is_dir] + [child for child in added if not child.is_dir]
+    return added, removed
+
+
+def split_patterns(text):
+    """The function splits a list of glob patterns separated by semicolons or commas."""
+    return [pattern.strip() for pattern in text.replace(',', ';').split(';') if pattern.strip()]
+
+
+def match_patterns(paths, root_path, patterns):
+    """The function keeps the files whose base name or path relative to root_path matches one of the glob
+    patterns, all the files are kept when there's no pattern. The relative paths use forward slashes."""
+    if not patterns:
+        return list(paths)
+    matched = []
+    for path in paths:
+        relative_path = os.path.relpath(path, root_path).replace(os.sep, '/')
+        name = os.path.basename(path)
+        if any(fnmatch(name, pattern) or fnmatch(relative_path, pattern) for pattern in patterns):
+            matched.append(path)
+    return matched
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Selection
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Selection model shared by the browse, check/uncheck and run stages.
+"""
+
+
+class Selection:
+    """Files chosen by the user, kept in insertion order with O(1) membership.
+
+    They are stored in a dict with the full path as key and the ScanNode (or None) as value,
+    so adding, removing and checking a path never scans a list."""
+
+    def __init__(self):
+        """Constructor."""
+        self._files = {}
+
+    def __len__(self):
+        """Number of selected files."""
+        return len(self._files)
+
+    def __bool__(self):
+        return bool(self._files)
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def clear(self):
+        """The function removes all the selected files."""
+        self._files.clear()
+
+    def add_file(self, path, node=None):
+        """The function adds a file at the end of the selection if it's not selected yet."""
+        if path not in self._files:
+            self._files[path] = node
+
+    def discard_file(self, path):
+        """The function removes a file from the selection if it's selected."""
+        self._files.pop(path, None)
+
+    def file_paths(self):
+        """The function returns the paths of the selected files in the order they were selected."""
+        return list(self._files)
+
+    def file_nodes(self):
+        """The function returns (path, node) pairs of the selected files in the order they were selected."""
+        return list(self._files.items())
+
+    def select_subtree(self, node):
+        """The function adds every file found under the directory node to the selection, the paths are
+        the ones stored on the nodes.
+
+        :param node: Scanned directory node.
+        :type node: ScanNode
+        """
+        for child in node.iter_files():
+            self.add_file(child.path, child)
+
+    def deselect_subtree(self, node):
+        """The function removes every file found under the directory node from the selection."""
+        for child in node.iter_files():
+            self._files.pop(child.path, None)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Sniffing
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Detection of the delimiter, quote character, encoding and header of a file from
+ its first few KB, so semicolon, pipe or UTF-16 files load on the first attempt.
+"""
+
+import codecs
+import csv
+import io
+
+from .archives import READ_ERRORS, open_binary, text_extension
+
+# number of bytes read from the start of a file to sniff its dialect
+SNIFF_BYTES = 16 * 1024
+# delimiters the sniffer chooses from
+DELIMITERS = ',;\t|'
+
+# byte order marks, the longest ones first since the UTF-32 LE mark starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class Dialect:
+    """How a CSV/TSV file is written, as detected by sniff_file."""
+
+    __slots__ = ('delimiter', 'quotechar', 'encoding', 'has_header')
+
+    def __init__(self, delimiter=',', quotechar='"', encoding='utf-8', has_header=True):
+        """Constructor.
+
+        :param encoding: Python codec name of the file, 'utf-8-sig' or 'utf-16' when it starts with a BOM.
+        :type encoding: str
+
+        :param has_header: False when the first line of the file holds values instead of column names.
+        :type has_header: bool
+        """
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.encoding = encoding
+        self.has_header = has_header
+
+    def __eq__(self, other):
+        return isinstance(other, Dialect) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return 'Dialect({!r}, {!r}, {!r}, {!r})'.format(self.delimiter, self.quotechar, self.encoding, self.has_header)
+
+    def to_dict(self):
+        """The function returns the dialect as a dict, stored as JSON in the scan cache."""
+        return {'delimiter': self.delimiter, 'quotechar': self.quotechar,
+                'encoding': self.encoding, 'has_header': self.has_header}
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(values['delimiter'], values['quotechar'], values['encoding'], values['has_header'])
+
+
+def default_dialect(path):
+    """The function returns the dialect given by the extension of the file alone."""
+    return Dialect('\t' if text_extension(path) == '.tsv' else ',')
+
+
+def open_text(path, dialect):
+    """The function opens the file as text with the encoding of the dialect, for csv.reader.
+    Compressed files are uncompressed as they are read."""
+    return io.TextIOWrapper(open_binary(path), encoding=dialect.encoding, errors='replace', newline='')
+
+
+def csv_reader(file, dialect):
+    """The function returns a csv.reader of the opened file with the delimiter and quote of the dialect."""
+    return csv.reader(file, delimiter=dialect.delimiter, quotechar=dialect.quotechar)
+
+
+def detect_encoding(data):
+    """The function returns the encoding of the bytes read from the start of a file and their text."""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding, codecs.getincrementaldecoder(encoding)(errors='replace').decode(data)
+    # UTF-16 without BOM has a NUL byte in every ASCII character
+    if len(data) >= 4 and data.count(b'\x00') * 3 > len(data):
+        encoding = 'utf-16-le' if data[1:2] == b'\x00' else 'utf-16-be'
+        return encoding, codecs.getincrementaldecoder(encoding)(errors='replace').decode(data)
+    try:
+        # the read may end in the middle of a character, final=False keeps it out
+        return 'utf-8', codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+    except UnicodeDecodeError:
+        # one byte encodings never fail, latin-1 is the most common one of the old files
+        return 'latin-1', data.decode('latin-1')
+
+
+def is_number(value):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def sniff_file(path, read_bytes=SNIFF_BYTES):
+    """The function detects the dialect of the file from its first read_bytes bytes. The dialect given
+    by the extension is returned for empty or unreadable files."""
+    dialect = default_dialect(path)
+    try:
+        with open_binary(path) as file:
+            data = file.read(read_bytes)
+    except READ_ERRORS:
+        return dialect
+    if not data:
+        return dialect
+    dialect.encoding, text = detect_encoding(data)
+    lines = text.splitlines()
+    # the last line may be cut by the bounded read
+    if len(data) == read_bytes and len(lines) > 1:
+        lines = lines[:-1]
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return dialect
+
+    sample = '\n'.join(lines)
+    try:
+        sniffed = csv.Sniffer().sniff(sample, delimiters=DELIMITERS)
+        delimiter = sniffed.delimiter
+        quotechar = sniffed.quotechar or '"'
+    except csv.Error:
+        delimiter = None
+        quotechar = '"'
+    # the sniffer may pick a character that isn't in the first line, count them instead
+    if delimiter is None or delimiter not in lines[0]:
+        counts = [(lines[0].count(candidate), candidate) for candidate in DELIMITERS]
+        count, candidate = max(counts)
+        delimiter = candidate if count else dialect.delimiter
+    dialect.delimiter = delimiter
+    dialect.quotechar = quotechar
+
+    # a first line of numbers only is data, not column names
+    first_row = next(csv.reader([lines[0]], delimiter=delimiter, quotechar=quotechar), [])
+    values = [value.strip() for value in first_row if value.strip()]
+    dialect.has_header = not values or not all(is_number(value) for value in values)
+    return dialect
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Timing
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Per phase wall time of the scan and import stages, progress of a running import,
+ and optional cProfile capture.
+"""
+
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+
+
+def format_bytes(size):
+    """The function returns a size in bytes as a short human readable text."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return '{:.1f} {}'.format(size, unit) if unit != 'B' else '{} B'.format(size)
+        size /= 1024.0
+
+
+def format_duration(seconds):
+    """The function returns a duration as a short human readable text, like 3 min 05 s."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return '{} s'.format(seconds)
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return '{} min {:02d} s'.format(minutes, seconds)
+    hours, minutes = divmod(minutes, 60)
+    return '{} h {:02d} min'.format(hours, minutes)
+
+
+class Progress:
+    """Files and bytes done out of the totals of a run, with the measured throughput and
+    the estimated time left. The estimate follows the bytes, the file count when they are unknown."""
+
+    def __init__(self, total_files, total_bytes=0, clock=time.perf_counter):
+        """Constructor.
+
+        :param clock: Function returning the current time in seconds, time.perf_counter by default.
+        :type clock: function
+        """
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.clock = clock
+        self.started = clock()
+
+    def advance(self, size=0, files=1):
+        """The function counts files done, loaded or failed, and their size."""
+        self.files += files
+        self.bytes += size
+
+    @property
+    def elapsed(self):
+        return self.clock() - self.started
+
+    @property
+    def fraction(self):
+        """Share of the run done, between 0 and 1."""
+        if self.total_bytes:
+            return min(1.0, self.bytes / self.total_bytes)
+        return min(1.0, self.files / self.total_files) if self.total_files else 1.0
+
+    def rate(self):
+        """The function returns the measured throughput in bytes per second, or None before any time passed."""
+        elapsed = self.elapsed
+        return self.bytes / elapsed if elapsed > 0 else None
+
+    def eta(self):
+        """The function returns the estimated seconds left, or None until something is done."""
+        fraction = self.fraction
+        if fraction <= 0:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+    def __str__(self):
+        text = '{}/{} files'.format(self.files, self.total_files)
+        rate = self.rate()
+        if rate is not None:
+            text += ', {}/s'.format(format_bytes(rate))
+        eta = self.eta()
+        if eta is not None and self.files < self.total_files:
+            text += ', {} left'.format(format_duration(eta))
+        return text
+
+    def summary(self, canceled=False):
+        """The function returns the final report of the run with its measured throughput."""
+        elapsed = self.elapsed
+        text = '{} of {} files, {} in {}'.format(self.files, self.total_files, format_bytes(self.bytes),
+                                                format_duration(elapsed))
+        if elapsed > 0:
+            text += ' ({}/s, {:.1f} files/s)'.format(format_bytes(self.bytes / elapsed), self.files / elapsed)
+        if canceled:
+            text += ', canceled'
+        return text
+
+
+class Phase:
+    """Wall time, number of files and bytes of one phase."""
+
+    __slots__ = ('name', 'started', 'seconds', 'files', 'bytes')
+
+    def __init__(self, name, seconds=0.0, files=0, size=0):
+        self.name = name
+        self.started = None
+        self.seconds = seconds
+        self.files = files
+        self.bytes = size
+
+    def __str__(self):
+        text = '{}: {:.3f} s'.format(self.name, self.seconds)
+        if self.files:
+            text += ', {} files'.format(self.files)
+        if self.bytes:
+            text += ', {}'.format(format_bytes(self.bytes))
+        return text
+
+
+class PhaseTimer:
+    """Times the phases of a run and reports each one to a log function once it's done."""
+
+    def __init__(self, log=None):
+        """Constructor.
+
+        :param log: Optional function called with the text of every finished phase.
+        :type log: function
+        """
+        self.log = log
+        self.phases = []
+
+    def start(self, name):
+        """The function starts a phase, it's reported when it's stopped."""
+        phase = Phase(name)
+        phase.started = time.perf_counter()
+        return phase
+
+    def stop(self, phase, files=None, size=None):
+        """The function stops the phase, sets its counts when given and reports it."""
+        if phase.started is not None:
+            phase.seconds += time.perf_counter() - phase.started
+            phase.started = None
+        if files is not None:
+            phase.files = files
+        if size is not None:
+            phase.bytes = size
+        self.add(phase)
+        return phase
+
+    def record(self, name, seconds, files=0, size=0):
+        """The function reports a phase timed by the caller, for instance the sum of many short calls."""
+        return self.add(Phase(name, seconds, files, size))
+
+    def add(self, phase):
+        self.phases.append(phase)
+        if self.log is not None:
+            self.log(str(phase))
+        return phase
+
+    @contextmanager
+    def measure(self, name):
+        """The function times the block, the counts may be set on the yielded phase."""
+        phase = self.start(name)
+        try:
+            yield phase
+        finally:
+            self.stop(phase)
+
+    def summary(self):
+        """The function returns the text of all the phases reported so far, one per line."""
+        return '\n'.join(str(phase) for phase in self.phases)
+
+
+class RunProfiler:
+    """cProfile capture of a run, the stats are written as a pstats file once it's stopped.
+    Only the calls made on the thread that started it are profiled."""
+
+    def __init__(self):
+        self.profile = None
+
+    @property
+    def is_running(self):
+        return self.profile is not None
+
+    def start(self):
+        """The function starts profiling, nothing happens when it's already running."""
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self, stats_path):
+        """The function stops profiling and writes the stats to stats_path, returns the path or None
+        when it wasn't running."""
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+        self.profile.dump_stats(stats_path)
+        self.profile = None
+        return stats_path
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Union
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Merge of the files sharing a schema into one OGR VRT union layer, the files are
+ read in place, nothing is copied.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+from .sniffing import default_dialect
+from .vrt import ogr_readable, source_layer, write_vrt
+
+# merge modes, index of the items of merge_cmbBox
+MERGE_NONE = 0
+MERGE_DIRECTORY = 1
+MERGE_TREE = 2
+
+# attribute of the union layers holding the file of every feature
+SOURCE_FIELD = 'source_file'
+# name of the union layer inside each VRT file
+UNION_LAYER = 'union'
+
+
+class UnionGroup:
+    """Files merged into one layer, they share the directory (or tree), the header and the coordinate columns."""
+
+    __slots__ = ('directory', 'header', 'x_field', 'y_field', 'dialect', 'name', 'paths')
+
+    def __init__(self, directory, header, x_field, y_field, dialect=None):
+        self.directory = directory
+        self.header = header
+        self.x_field = x_field
+        self.y_field = y_field
+        # dialect of the first file, the others share its delimiter and header line
+        self.dialect = dialect
+        # name of the union layer, unique in its directory
+        self.name = os.path.basename(directory)
+        self.paths = []
+
+    @property
+    def path(self):
+        """Path standing for the group in the import plan, the file itself when it's alone, otherwise
+        a file of its directory named after the group, so the union layers are sorted with the others."""
+        if len(self.paths) == 1:
+            return self.paths[0]
+        return os.path.join(self.directory, self.name)
+
+
+def union_groups(paths, headers, fields_for_file, mode, top_level_path, dialects=None):
+    """The function groups the given files by directory (or whole tree), header and coordinate columns,
+    in the order of their first file. Files without a known header are left alone in their group, so are
+    the files the OGR CSV driver can't read right, they are loaded by the delimited text provider with their
+    encoding and quote character.
+
+    :param headers: Full path of the file as key and its header tuple (or None) as value.
+    :type headers: dict
+
+    :param fields_for_file: Function returning the (x, y) coordinate columns of a file.
+    :type fields_for_file: function
+
+    :param mode: MERGE_DIRECTORY or MERGE_TREE.
+    :type mode: int
+
+    :param dialects: Optional full path of the file as key and its sniffed Dialect as value,
+        the extension gives the delimiter of the other files.
+    :type dialects: dict
+
+    :returns: List of UnionGroup.
+    :rtype: list
+    """
+    groups = {}
+    dialects = dialects or {}
+    for path in paths:
+        header = headers.get(path)
+        directory = os.path.dirname(path) if mode == MERGE_DIRECTORY else top_level_path
+        x_field, y_field = fields_for_file(path)
+        dialect = dialects.get(path) or default_dialect(path)
+        # files with different delimiters can't share a layer definition
+        key = (directory, header, x_field, y_field, dialect.delimiter, dialect.has_header) \
+            if header is not None and ogr_readable(dialect) else path
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = UnionGroup(directory, header, x_field, y_field, dialect)
+        group.paths.append(path)
+
+    # number of union layers of each directory, to tell their names apart, a file alone keeps its own name
+    dir_counts = {}
+    for group in groups.values():
+        if len(group.paths) > 1:
+            count = dir_counts[group.directory] = dir_counts.get(group.directory, 0) + 1
+            if count > 1:
+                group.name = '{} #{}'.format(group.name, count)
+    return list(groups.values())
+
+
+def union_vrt(group, crs):
+    """The function returns the OGR VRT document of the union layer of the group. Every file is a
+    source layer named after its full path, the union layer stores it in SOURCE_FIELD.
+    The columns are read as strings by the OGR CSV driver, like they are in the files.
+
+    :param crs: Auth id of the coordinate reference system of the coordinates.
+    :type crs: str
+    """
+    data_source = ET.Element('OGRVRTDataSource')
+    union = ET.SubElement(data_source, 'OGRVRTUnionLayer', name=UNION_LAYER)
+    for path in group.paths:
+        source_layer(union, path, path, crs, group.x_field, group.y_field, group.dialect)
+    ET.SubElement(union, 'SourceLayerFieldName').text = SOURCE_FIELD
+    ET.SubElement(union, 'GeometryType').text = 'wkbPoint'
+    ET.SubElement(union, 'LayerSRS').text = crs
+    return ET.tostring(data_source, encoding='unicode')
+
+
+def write_union_vrt(group, crs, directory):
+    """The function writes the VRT document of the group to directory and returns its path."""
+    return write_vrt(union_vrt(group, crs), directory)
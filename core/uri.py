@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Uri
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ Names and delimited text provider uris of the CSV/TSV files.
+"""
+
+import os
+from urllib.parse import quote
+
+from .archives import is_compressed, strip_extension
+from .field_types import with_coordinate_types
+from .vrt import FILE_LAYER, file_vrt, write_vrt
+
+# names of the encodings for the delimited text provider, the BOM variants are handled by Qt
+PROVIDER_ENCODINGS = {
+    'utf-8': 'UTF-8',
+    'utf-8-sig': 'UTF-8',
+    'utf-16': 'UTF-16',
+    'utf-16-le': 'UTF-16LE',
+    'utf-16-be': 'UTF-16BE',
+    'utf-32': 'UTF-32',
+    'latin-1': 'ISO-8859-1',
+}
+
+
+def layer_name(path):
+    """The function returns the name of the layer of the file, its base name without extension."""
+    return strip_extension(os.path.basename(path))
+
+
+def layer_provider(path):
+    """The function returns the data provider of the layer of the file, the compressed files are read by GDAL."""
+    return 'ogr' if is_compressed(path) else 'delimitedtext'
+
+
+def layer_uri(path, crs, x_field, y_field, dialect=None, vrt_dir=None, field_types=None):
+    """The function returns the uri of the layer of the file for the provider given by layer_provider.
+    The compressed files are read in place through an OGR VRT document written to vrt_dir,
+    the field types only apply to the delimited text provider.
+
+    :param vrt_dir: Directory of the VRT documents, required when the file is compressed.
+    :type vrt_dir: str
+    """
+    if is_compressed(path):
+        vrt_path = write_vrt(file_vrt(path, crs, x_field, y_field, dialect), vrt_dir)
+        return f'{vrt_path}|layername={FILE_LAYER}'
+    return delimited_text_uri(path, crs, x_field, y_field, dialect, field_types)
+
+
+def fast_open_options(field_types):
+    """The function returns the uri options opening the file without the scans of the provider: the given
+    field types instead of its type detection, a spatial index and no file watcher."""
+    options = ''.join(f"&field={quote(column, safe='')}:{field_type}" for column, field_type in field_types)
+    return options + "&detectTypes=no&spatialIndex=yes&watchFile=no"
+
+
+def delimited_text_uri(path, crs, x_field, y_field, dialect=None, field_types=None):
+    """The function returns the delimited text provider uri of the file.
+
+    :param crs: Auth id of the coordinate reference system of the coordinates.
+    :type crs: str
+
+    :param dialect: Sniffed dialect of the file, the delimiter is taken from the extension when not given.
+    :type dialect: Dialect
+
+    :param field_types: (column, type) pairs inferred for the schema group of the file, the coordinate
+        columns are always double. The provider detects the types itself when not given.
+    :type field_types: tuple
+    """
+    options = fast_open_options(with_coordinate_types(field_types, x_field, y_field)) if field_types else ''
+    # the column names are quoted like the ones of the field types, a space, & or # would end the value
+    coordinates = f"&crs={crs}&xField={quote(str(x_field), safe='')}&yField={quote(str(y_field), safe='')}"
+    if dialect is None:
+        # check file type and change delimiter accordingly
+        delimiter = '\\t' if path.endswith('.tsv') else ','
+        return f"file:///{path}?delimiter={delimiter}{coordinates}{options}"
+
+    delimiter = '\\t' if dialect.delimiter == '\t' else quote(dialect.delimiter, safe='')
+    uri = f"file:///{path}?delimiter={delimiter}"
+    if dialect.quotechar != '"':
+        uri += f"&quote={quote(dialect.quotechar, safe='')}"
+    encoding = PROVIDER_ENCODINGS.get(dialect.encoding, dialect.encoding)
+    if encoding != 'UTF-8':
+        uri += f"&encoding={encoding}"
+    if not dialect.has_header:
+        uri += "&useHeader=no"
+    return uri + coordinates + options
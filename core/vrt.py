@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Vrt
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+ OGR VRT documents of the files read by GDAL instead of the delimited text provider,
+ the point geometry is built from the coordinate columns by the VRT driver.
+"""
+
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+
+from .archives import gdal_path, strip_extension
+
+# SEPARATOR open option of the OGR CSV driver for each delimiter
+SEPARATORS = {',': 'COMMA', ';': 'SEMICOLON', '\t': 'TAB', '|': 'PIPE'}
+# name of the layer of the single file VRT documents
+FILE_LAYER = 'layer'
+# encodings of the files read by the OGR CSV driver, it has no open option to read the others
+OGR_ENCODINGS = ('utf-8', 'utf-8-sig')
+
+
+def ogr_readable(dialect):
+    """The function returns True when the OGR CSV driver reads the files of the dialect right, it only
+    decodes UTF-8 and only knows the double quote, it has no open option for the others."""
+    return dialect.encoding in OGR_ENCODINGS and dialect.quotechar == '"'
+
+
+def archives_dir(settings_dir):
+    """The function returns the directory of the VRT documents reading the compressed files,
+    under the QGIS settings directory, the same for the dialog and the Processing algorithm."""
+    return os.path.join(settings_dir, 'csv_batch_import', 'archives')
+
+
+def unions_dir(settings_dir):
+    """The function returns the directory of the VRT documents of the union layers,
+    under the QGIS settings directory."""
+    return os.path.join(settings_dir, 'csv_batch_import', 'unions')
+
+
+def source_layer(parent, name, path, crs, x_field, y_field, dialect=None):
+    """The function adds the OGRVRTLayer reading the CSV/TSV file to the parent element and returns it.
+
+    :param dialect: Sniffed dialect of the file, the OGR CSV driver guesses it when not given.
+    :type dialect: Dialect
+    """
+    layer = ET.SubElement(parent, 'OGRVRTLayer', name=name)
+    ET.SubElement(layer, 'SrcDataSource', relativeToVRT='0', shared='0').text = gdal_path(path)
+    open_options = []
+    if dialect is not None:
+        if dialect.delimiter != ',' and dialect.delimiter in SEPARATORS:
+            open_options.append(('SEPARATOR', SEPARATORS[dialect.delimiter]))
+        if not dialect.has_header:
+            open_options.append(('HEADERS', 'NO'))
+    if open_options:
+        options = ET.SubElement(layer, 'OpenOptions')
+        for key, value in open_options:
+            ET.SubElement(options, 'OOI', key=key).text = value
+    ET.SubElement(layer, 'SrcLayer').text = strip_extension(os.path.basename(path))
+    ET.SubElement(layer, 'GeometryType').text = 'wkbPoint'
+    ET.SubElement(layer, 'LayerSRS').text = crs
+    ET.SubElement(layer, 'GeometryField', encoding='PointFromColumns', x=str(x_field), y=str(y_field))
+    return layer
+
+
+def file_vrt(path, crs, x_field, y_field, dialect=None):
+    """The function returns the OGR VRT document of one file, its layer is FILE_LAYER."""
+    data_source = ET.Element('OGRVRTDataSource')
+    source_layer(data_source, FILE_LAYER, path, crs, x_field, y_field, dialect)
+    return ET.tostring(data_source, encoding='unicode')
+
+
+def write_vrt(document, directory):
+    """The function writes the VRT document to directory and returns its path.
+    The file name is a hash of the document, loading the same files again reuses it."""
+    os.makedirs(directory, exist_ok=True)
+    vrt_path = os.path.join(directory, hashlib.sha1(document.encode('utf-8')).hexdigest() + '.vrt')
+    if not os.path.exists(vrt_path):
+        with open(vrt_path, 'w', encoding='utf-8') as file:
+            file.write(document)
+    return vrt_path
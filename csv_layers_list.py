@@ -1,17 +1,46 @@
-from PyQt5.QtWidgets import QTreeWidgetItem, QFileDialog, QAction
+from PyQt5.QtWidgets import QFileDialog, QAction
 from PyQt5.QtCore import Qt
 from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
-from qgis.PyQt.QtGui import QIcon, QColor
-from qgis.PyQt.QtWidgets import QAction, QDialog
+from qgis.PyQt.QtGui import QBrush, QIcon
+from qgis.PyQt.QtWidgets import QAction, QDialog, QMessageBox
 from qgis.gui import QgsProjectionSelectionDialog, QgsMessageBar
-from qgis.core import QgsVectorLayer, QgsProject, QgsLayerTreeGroup, QgsLayerTreeLayer, QgsCoordinateReferenceSystem
+from qgis.core import QgsVectorLayer, QgsProject, QgsCoordinateReferenceSystem, QgsApplication, \
+    QgsMessageLog, QgsFeedback, Qgis
 
 import os.path
-import csv
+import time
+from functools import partial
 # Initialize Qt resources from file resources.py
 from .resources import *
 # Import the code for the dialog
 from .csv_layers_list_dialog import CsvLayersListDialog
+from .scan_task import ScanTask
+from .scan_tree_model import ScanTreeModel
+from .header_task import HeaderTask
+from .core.selection import Selection
+from .core.scanner import rescan_directory
+from .core.coordinates import fields_for_header
+from .core.prevalidation import is_available as prevalidation_available, summarize
+from .prevalidation_task import PrevalidationTask, crs_bounds
+from .core.geopackage import table_names
+from .geopackage_task import GeoPackageExportTask
+from .core.uri import layer_name, layer_provider, layer_uri
+from .core.archives import is_compressed
+from .core.vrt import archives_dir, ogr_readable, unions_dir
+from .core.union import MERGE_NONE, union_groups, write_union_vrt, UNION_LAYER
+from .tree_watcher import TreeWatcher
+from .layer_tasks import ParallelLayerLoader, ImportJob
+from .import_progress import ImportProgressBar
+from .layer_tree_builder import LayerTreeBuilder
+from .core.planner import top_level_path
+from .core.timing import PhaseTimer, Progress, RunProfiler
+from .lazy_layers import LazyLayerTree, remove_placeholders
+from .csv_layers_list_provider import CsvLayersListProvider
+from .core.memory_budget import DEFAULT_BUDGET_MB
+
+# index of the import targets in target_cmbBox
+TARGET_LAYERS = 0
+TARGET_GEOPACKAGE = 1
 
 
 class CsvLayersList:
@@ -28,18 +57,57 @@ class CsvLayersList:
         # Save reference to the QGIS interface
         # keep full path
         self.path = ''
-        # keep part of path not in the tree
-        self.remaining_path = ''
-        # keep all csv files chosen by user
-        self.csv_lst = []
-        # Keep all folder that will be added to group tree
-        self.dir_list = []
+        # keep all csv files and folders chosen by user
+        self.selection = Selection()
         # store x coordinate
         self.x_field = ''
         # store y coordinate
         self.y_field = ''
+        # store authid of the crs chosen by user
+        self.crs = ''
+        # open the layers with the column types inferred for their schema group
+        self.fast_open = False
         # store recent crs
         self.recent_crs_lst = []
+        # model of csv_tree, it reads the scanned nodes directly
+        self.tree_model = None
+        # keep full path as key and its scan node as value, used instead of asking the filesystem
+        self.scan_index = {}
+        # keep the running background scan
+        self.scan_task = None
+        # watch the scanned directories when the user asks for it
+        self.tree_watcher = None
+        # keep the running header analysis and the headers of the scanned files grouped by schema
+        self.header_task = None
+        self.schema_report = None
+        # keep the running analysis of the files added to the watched directories and the ones waiting for it
+        self.header_update_task = None
+        self.pending_header_files = {}
+        # schema fingerprint as key and detected (x, y) coordinate columns as value
+        self.detected_xy = {}
+        # schema fingerprint as key and inferred (column, type) pairs as value
+        self.field_types = {}
+        # keep the running coordinates validation
+        self.prevalidation_task = None
+        # keep the running import, sequential or parallel, and the tree it fills
+        self.layer_loader = None
+        self.tree_builder = None
+        # progress of the running import in the message bar, the size of its files and the ones that failed
+        self.import_progress = None
+        self.import_sizes = {}
+        self.import_failed = []
+        # keep the running GeoPackage export
+        self.export_task = None
+        # keep the trees imported on demand, their layers are loaded later
+        self.lazy_trees = []
+        # wall time of the scan and import phases, reported to the message log
+        self.timer = PhaseTimer(self.log_message)
+        self.scan_phase = None
+        self.header_phase = None
+        self.prevalidation_phase = None
+        self.import_phase = None
+        # cProfile capture of an import, enabled by the csv_batch_import/profile_imports setting
+        self.profiler = RunProfiler()
         # create root of tree
         self.root_group = QgsProject.instance().layerTreeRoot()
 
@@ -155,8 +223,14 @@ class CsvLayersList:
 
         return action
 
+    def initProcessing(self):
+        """Register the Processing provider of the plugin, also called by qgis_process without any GUI."""
+        self.provider = CsvLayersListProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
+        self.initProcessing()
 
         icon_path = ':/plugins/csv_layers_list/icon.png'
         self.add_action(
@@ -164,6 +238,9 @@ class CsvLayersList:
             text=self.tr(u'CSV Batch Import'),
             callback=self.run,
             parent=self.iface.mainWindow())
+        # placeholders of the trees imported on demand aren't saved with the project
+        QgsProject.instance().writeProject.connect(remove_placeholders)
+        QgsProject.instance().cleared.connect(self.evt_project_cleared)
 
         # will be set False in run()
         self.first_start = True
@@ -175,95 +252,353 @@ class CsvLayersList:
                 self.tr(u'&CSV Batch Import'),
                 action)
             self.iface.removeToolBarIcon(action)
+        QgsApplication.processingRegistry().removeProvider(self.provider)
+        QgsProject.instance().writeProject.disconnect(remove_placeholders)
+        QgsProject.instance().cleared.disconnect(self.evt_project_cleared)
+        # stop a running import, the layers already loaded are kept
+        if self.layer_loader is not None:
+            self.layer_loader.cancel()
+
+    def log_message(self, message):
+        """The function writes message to the plugin tab of the QGIS message log."""
+        QgsMessageLog.logMessage(message, 'CSV Batch Import', Qgis.Info)
+
+    def start_profiler(self):
+        """The function starts the cProfile capture of the import when it's enabled in the settings."""
+        if QSettings().value('csv_batch_import/profile_imports', False, type=bool):
+            self.profiler.start()
+
+    def stop_profiler(self):
+        """The function writes the cProfile stats of the import, if it's profiled, to the QGIS profile directory."""
+        if not self.profiler.is_running:
+            return
+        stats_path = os.path.join(QgsApplication.qgisSettingsDirPath(), 'csv_batch_import', 'profiles',
+                                  time.strftime('import_%Y%m%d_%H%M%S.prof'))
+        self.profiler.stop(stats_path)
+        self.log_message(f'Profile of the import written to {stats_path}')
+
+    def add_scan_batch(self, batch):
+        """The function adds a batch of directories received from the scan task to the tree model, their
+        children inherit their check state. It also adds the full path of the checked files to the selection."""
+        for node in batch:
+            # parents are always sent before their children
+            if not self.tree_model.is_known(node):
+                continue
+            self.scan_index[node.path] = node
+            self.tree_model.add_children(node)
+            is_checked = self.tree_model.check_state(node) == Qt.Checked
+            for child in node.children:
+                self.scan_index[child.path] = child
+                # add file path to the selection
+                if is_checked and not child.is_dir:
+                    self.selection.add_file(child.path, child)
+
+    def evt_scan_batch_ready(self, task, batch):
+        """The function adds a batch received from the scan task, batches of a discarded scan are ignored."""
+        if task is self.scan_task:
+            self.add_scan_batch(batch)
+
+    def evt_scan_files_found(self, task, count):
+        """The function shows the live count of the CSV/TSV files found by the scan task."""
+        if task is self.scan_task:
+            self.dlg.scan_status_lbl.setText(f'{count} files found')
+
+    def refresh_field_combos(self):
+        """The function populates the QComboBoxes with the columns that can be used as coordinates for
+        the selected files, each one with the number of selected files containing it. The columns missing
+        from some files are greyed, those files fall back to the columns detected for them."""
+        x_field = self.dlg.xfield_cmbBox.currentData()
+        y_field = self.dlg.yfield_cmbBox.currentData()
+        self.dlg.xfield_cmbBox.clear()
+        self.dlg.yfield_cmbBox.clear()
+        if self.schema_report is None:
+            return
+
+        paths = self.selection.file_paths()
+        total = len(paths)
+        # Add the column names to the QComboBox
+        for column, count in self.schema_report.candidate_columns(paths):
+            for combo in (self.dlg.xfield_cmbBox, self.dlg.yfield_cmbBox):
+                combo.addItem(f'{column} ({count}/{total})', column)
+                if count < total:
+                    index = combo.count() - 1
+                    combo.setItemData(index, QBrush(Qt.gray), Qt.ForegroundRole)
+                    combo.setItemData(index, f'Missing from {total - count} of the {total} selected files',
+                                      Qt.ToolTipRole)
+
+        # keep the columns chosen before the refresh, or preselect the columns detected for the largest group
+        if x_field is None and y_field is None:
+            x_field, y_field = self.detected_fields(paths)
+        for combo, field in ((self.dlg.xfield_cmbBox, x_field), (self.dlg.yfield_cmbBox, y_field)):
+            index = combo.findData(field)
+            if index != -1:
+                combo.setCurrentIndex(index)
+
+    def detected_fields(self, paths):
+        """The function returns the coordinate columns detected for the largest schema group of the given
+        files, or (None, None) when they aren't known."""
+        for header in self.schema_report.groups(paths):
+            detected = self.detected_xy.get(header)
+            if detected is not None:
+                return detected
+        return None, None
+
+    def fields_for_file(self, fpath):
+        """The function returns the coordinate columns used for the given file, the columns chosen by the user
+        when the file has them, otherwise the columns detected for the schema group of the file."""
+        header = self.schema_report.headers.get(fpath) if self.schema_report is not None else None
+        return fields_for_header(header, self.x_field, self.y_field, self.detected_xy.get(header))
+
+    def start_header_analysis(self):
+        """The function starts a background task that reads the header of every scanned file."""
+        files = [(path, node.size, node.mtime) for path, node in self.scan_index.items() if not node.is_dir]
+        task = self.header_task = HeaderTask(files, self.scan_cache_path())
+        task.taskCompleted.connect(partial(self.evt_header_analysis_finished, task))
+        task.taskTerminated.connect(partial(self.evt_header_analysis_finished, task))
+        self.header_phase = self.timer.start('header analysis')
+        self.dlg.scan_status_lbl.setText(f'{len(files)} files found, reading headers...')
+        QgsApplication.taskManager().addTask(task)
+
+    def update_file_stats(self, files):
+        """The function gives the scanned files the size and mtime read again by the header analysis, a listing
+        read from the scan cache keeps the old ones of the files rewritten in place."""
+        for path, size, mtime in files:
+            node = self.scan_index.get(path)
+            if node is not None and not node.is_dir:
+                node.size = size
+                node.mtime = mtime
+
+    def evt_header_analysis_finished(self, task):
+        """The function fills the coordinate combo boxes once the headers are read, and warns the user
+        when the selected files don't share the same columns."""
+        # ignore a discarded analysis
+        if task is not self.header_task:
+            return
+        self.header_task = None
+        self.dlg.run_btn.setEnabled(True)
+        self.update_file_stats(task.files)
+        self.timer.stop(self.header_phase, files=len(task.paths),
+                        size=sum(size for path, size, mtime in task.files))
+        if task.report is None:
+            self.dlg.scan_status_lbl.setText(f'{len(task.paths)} files found')
+            if task.exception is not None:
+                self.iface.messageBar().pushMessage(f"Can't read the headers: {task.exception}", level=2)
+            return
+
+        self.schema_report = task.report
+        self.detected_xy = task.detected_xy
+        self.field_types = task.field_types
+        paths = self.selection.file_paths()
+        groups = self.schema_report.groups(paths)
+        self.dlg.scan_status_lbl.setText(f'{len(task.paths)} files found, {len(groups)} column layouts')
+        if len(groups) > 1:
+            self.iface.messageBar().pushMessage(
+                f'The selected files have {len(groups)} different column layouts, '
+                f'the number of files containing each column is shown next to it', level=1)
+        self.refresh_field_combos()
+
+    def stop_header_analysis(self):
+        """The function discards the running header analyses if any."""
+        if self.header_task is not None:
+            self.header_task.cancel()
+            self.header_task = None
+        if self.header_update_task is not None:
+            self.header_update_task.cancel()
+            self.header_update_task = None
+        self.pending_header_files = {}
+
+    def start_header_update(self):
+        """The function starts a background task reading the headers of the files added to the watched
+        directories, the files added while it runs wait for the next one."""
+        if self.header_update_task is not None or not self.pending_header_files:
+            return
+        files = [(path, node.size, node.mtime) for path, node in self.pending_header_files.items()]
+        self.pending_header_files = {}
+        task = self.header_update_task = HeaderTask(files, self.scan_cache_path())
+        task.taskCompleted.connect(partial(self.evt_header_update_finished, task))
+        task.taskTerminated.connect(partial(self.evt_header_update_finished, task))
+        QgsApplication.taskManager().addTask(task)
+
+    def evt_header_update_finished(self, task):
+        """The function merges the headers of the added files into the schema report, the new schema groups
+        get their detected coordinates and column types, then the next added files are analyzed."""
+        # ignore a discarded analysis
+        if task is not self.header_update_task:
+            return
+        self.header_update_task = None
+        self.update_file_stats(task.files)
+        if task.report is not None and self.schema_report is not None:
+            # the files may have been removed again meanwhile
+            for path in task.paths:
+                if path in self.scan_index:
+                    self.schema_report.headers[path] = task.report.headers.get(path)
+                    self.schema_report.dialects[path] = task.report.dialects.get(path)
+            # the groups known before keep the columns detected for them
+            for header, detected in task.detected_xy.items():
+                self.detected_xy.setdefault(header, detected)
+            for header, field_types in task.field_types.items():
+                self.field_types.setdefault(header, field_types)
+            self.refresh_field_combos()
+        elif task.exception is not None:
+            self.iface.messageBar().pushMessage(f"Can't read the headers: {task.exception}", level=2)
+        self.start_header_update()
+
+    def evt_scan_finished(self, task):
+        """The function is called when the scan task completes or is stopped, it restores the buttons
+        and fills the coordinate combo boxes from what has been found so far."""
+        # ignore a discarded scan
+        if task is not self.scan_task:
+            return
+        self.scan_task = None
+        self.dlg.stop_btn.setEnabled(False)
+        self.dlg.run_btn.setEnabled(True)
+        self.timer.stop(self.scan_phase, files=task.files_found,
+                        size=sum(node.size for node in self.scan_index.values() if not node.is_dir))
 
-    def get_full_path_for_tree_item(self, item):
-        """The function constructs the full_path of given item by joining
-         the remaining_path (defined in the class) with the path_to_toplevel."""
-        parents_list = []
-        parent_item = item.parent()
-
-        while parent_item is not None:
-            # insert parent_item at index 0
-            parents_list.insert(0, parent_item)
-            parent_item = parent_item.parent()
-
-        # iterating over (prnt) in parents_list and apply the expression prnt.text(0) to it to convert to text
-        text_parents_list = [prnt.text(0) for prnt in parents_list]
-
-        # get path of item to toplevel item from text_parents_list
-        path_to_toplevel = os.path.normpath(os.path.join(os.path.sep.join(text_parents_list), item.text(0)))
-        # get full path of item
-        full_path = os.path.normpath(os.path.join(self.remaining_path, path_to_toplevel))
-
-        return full_path
-
-    def get_dirs_files(self, dir_path):
-        """The function retrieve the directories and files in the given directory
-        then breaks out of the loop after the first iteration"""
-        directories_list = []
-        files_list = []
-        # loop through the given path to get its children (directories/files)
-        for root, dirs, files in os.walk(dir_path):
-            for directory in dirs:
-                directories_list.append(os.path.normpath(os.path.join(root, directory)))
-
-            for file in files:
-                files_list.append(os.path.normpath(os.path.join(root, file)))
-
-            break
-        return directories_list, files_list
-
-    def add_subdir_and_subfiles(self, item):
-        """ the function recursively adds subdirectories and files to the tree item,and set their check state and
-        background color. It also adds the full path of the files to self.csvLst if not exist.."""
-        full_path_item = self.get_full_path_for_tree_item(item)
-        # by default add all
-        self.dir_list.append(full_path_item)
-
-        dir_list, files_list = self.get_dirs_files(full_path_item)
-
-        # recursively add dir and sub dir
-        for directory in dir_list:
-            # convert directory name to item
-            child_item = QTreeWidgetItem([os.path.basename(directory)])
-            # add it to its parent in csv tree
-            item.addChild(child_item)
-            # make it check-able
-            child_item.setFlags(child_item.flags() | Qt.ItemIsUserCheckable)
-            # set it's state ny default to checked
-            child_item.setCheckState(0, Qt.Checked)
-            # set background color
-            child_item.setBackground(0, QColor(233, 236, 239))
-
-            self.add_subdir_and_subfiles(child_item)
-
-        for file in files_list:
-            # filter csv & tsv files only
-            if file.endswith(('.csv', '.tsv')):
-                # convert file name to item
-                child_item = QTreeWidgetItem([os.path.basename(file)])
-                #  add it to its parent as a child
-                item.addChild(child_item)
-                # make it check-able
-                child_item.setFlags(child_item.flags() | Qt.ItemIsUserCheckable)
-                #  set it's state to checked
-                child_item.setCheckState(0, Qt.Checked)
-                # set background color
-                child_item.setBackground(0, QColor(248, 249, 250))
-
-                # get full path child & add it to csv list
-                child_full_path = self.get_full_path_for_tree_item(child_item)
-                # add child path to csvLst if not exist
-                if child_full_path not in self.csv_lst:
-                    self.csv_lst.append(child_full_path)
+        if task.exception is not None:
+            self.iface.messageBar().pushMessage(f"Can't scan {task.root_path}: {task.exception}", level=2)
+
+        if task.isCanceled():
+            self.dlg.scan_status_lbl.setText(f'Scan stopped, {task.files_found} files found')
+        else:
+            self.dlg.scan_status_lbl.setText(f'{task.files_found} files found')
+
+        if self.dlg.watch_chkBox.isChecked():
+            self.tree_watcher.watch(self.watched_dirs())
+
+        if not self.selection:
+            # if there's no CSV/TSV files under the selected dir
+            self.iface.messageBar().pushMessage('No CSV or TSV file under this directory!', level=1)
+            return
+        # the run button is enabled again once the columns are known
+        self.dlg.run_btn.setEnabled(False)
+        self.start_header_analysis()
+
+    def scan_cache_path(self):
+        """The function returns the path of the scan cache database in the QGIS profile directory,
+        or None when the cache is disabled in the settings."""
+        if not QSettings().value('csv_batch_import/use_scan_cache', True, type=bool):
+            return None
+        return os.path.join(QgsApplication.qgisSettingsDirPath(), 'csv_batch_import', 'scan_cache.sqlite')
+
+    def watched_dirs(self):
+        """The function returns the paths of all the scanned directories."""
+        # the folders of the zip archives only exist in the archive
+        return [path for path, node in self.scan_index.items()
+                if node.is_dir and not node.is_archive and not node.in_archive()]
+
+    def evt_watch_toggled(self, checked):
+        """The function starts or stops watching the scanned directories, a running scan
+        starts the watch when it's done."""
+        self.tree_watcher.clear()
+        if checked and self.scan_task is None:
+            self.tree_watcher.watch(self.watched_dirs())
+
+    def evt_partially_watched(self, watched, missed):
+        """The function warns the user that the changes of some scanned directories won't show up."""
+        self.iface.messageBar().pushMessage(
+            f'Only {watched} directories are watched, the changes in {missed} other directories '
+            f'are not shown, scan again to see them', level=1)
+
+    def evt_directories_changed(self, dir_paths):
+        """The function applies the changes of the watched directories to the tree and the selection,
+        only the changed directories are listed again and the check states of other items are kept."""
+        for dir_path in dir_paths:
+            self.apply_directory_change(dir_path)
+        # the number of selected files containing each column changed
+        self.refresh_field_combos()
+
+    def apply_directory_change(self, dir_path):
+        """The function lists the given directory again, then removes the items of the deleted entries and
+        adds items for the new ones, new entries are selected when their directory is checked."""
+        node = self.scan_index.get(dir_path)
+        # removed with its parent, or not shown in the tree
+        if node is None or not self.tree_model.is_known(node):
+            return
+        old_children = list(node.children)
+        added, removed = rescan_directory(node)
+        # only the rows of the changed entries are removed and inserted
+        self.tree_model.apply_rescan(node, old_children, added, removed)
+
+        for child in removed:
+            self.selection.deselect_subtree(child)
+            removed_dirs = []
+            for descendant in child.iter_subtree():
+                del self.scan_index[descendant.path]
+                if descendant.is_dir:
+                    removed_dirs.append(descendant.path)
+                else:
+                    self.pending_header_files.pop(descendant.path, None)
+                    if self.schema_report is not None:
+                        self.schema_report.headers.pop(descendant.path, None)
+                        self.schema_report.dialects.pop(descendant.path, None)
+            self.tree_watcher.unwatch(removed_dirs)
+
+        is_checked = self.tree_model.check_state(node) == Qt.Checked
+        for child in added:
+            self.scan_index[child.path] = child
+            if child.is_dir:
+                # add the sub directories & files the same way the scan does
+                self.add_scan_batch([descendant for descendant in child.iter_subtree() if descendant.is_dir])
+                self.tree_watcher.watch([descendant.path for descendant in child.iter_subtree()
+                                         if descendant.is_dir and not descendant.is_archive
+                                         and not descendant.in_archive()])
+            elif is_checked:
+                self.selection.add_file(child.path, child)
+
+            # the headers are read in the background, like the ones of the scan
+            if self.schema_report is not None:
+                for descendant in child.iter_subtree():
+                    if not descendant.is_dir:
+                        self.pending_header_files[descendant.path] = descendant
+        # the directory & its parents may become checked or partially checked with the new children
+        self.tree_model.update_check_states(node)
+        self.start_header_update()
+
+    def start_scan(self, root_path):
+        """The function starts a background task that scans root_path and fills the tree as results arrive."""
+        task = self.scan_task = ScanTask(root_path, self.scan_cache_path())
+        task.batch_ready.connect(partial(self.evt_scan_batch_ready, task))
+        task.files_found_changed.connect(partial(self.evt_scan_files_found, task))
+        task.taskCompleted.connect(partial(self.evt_scan_finished, task))
+        task.taskTerminated.connect(partial(self.evt_scan_finished, task))
+
+        self.scan_phase = self.timer.start('scan')
+        self.dlg.scan_status_lbl.setText('Scanning...')
+        self.dlg.stop_btn.setEnabled(True)
+        self.dlg.run_btn.setEnabled(False)
+        QgsApplication.taskManager().addTask(self.scan_task)
+
+    def stop_scan(self, discard=False):
+        """The function cancels the running scan task if any, items already added to the tree are kept
+        unless discard is True, in which case nothing more is received from the task."""
+        if self.scan_task is not None:
+            self.scan_task.cancel()
+            if discard:
+                self.scan_task = None
+                self.dlg.stop_btn.setEnabled(False)
+                self.dlg.run_btn.setEnabled(True)
+
+    def evt_stop_btn_clicked(self):
+        """The function stops the running scan when the user clicks the Stop button."""
+        self.stop_scan()
 
     def evt_browse_btn_clicked(self):
-        """The function allows the user to select a directory, populates the csv_tree with subdirectories and files
-        under the selected directory, and gets the column names from the first CSV file to populate the QComboBoxes."""
+        """The function allows the user to select a directory, then starts a background scan that populates
+        the csv_tree with subdirectories and files under the selected directory. The QComboBoxes are
+        populated with the column names from the first CSV file once the scan is done."""
+        self.stop_scan(discard=True)
+        self.stop_header_analysis()
+        self.stop_prevalidation()
+        self.tree_watcher.clear()
+        self.schema_report = None
+        self.detected_xy = {}
+        self.field_types = {}
         self.y_field = self.dlg.yfield_cmbBox.clear()
         self.x_field = self.dlg.xfield_cmbBox.clear()
-        self.dir_list = []
-        self.csv_lst = []
+        self.selection.clear()
+        self.tree_model.clear()
+        self.scan_index = {}
         # get full path and base name and the remaining path outside tree
         selected_directory = QFileDialog.getExistingDirectory(None, 'Select Directory', self.path)
 
@@ -273,43 +608,11 @@ class CsvLayersList:
             self.path = selected_directory = os.path.normpath(selected_directory)
             # add path to edit line
             self.dlg.rootDirLineEdit.setText(selected_directory)
-            # clear previous Qtree
-            self.dlg.csv_tree.clear()
-
-            basename = os.path.basename(selected_directory)
-            self.remaining_path = os.path.dirname(self.path)
-
-            # convert directory name to item & add it as top level of tree
-            top_level_item = QTreeWidgetItem([basename])
-            self.dlg.csv_tree.addTopLevelItem(top_level_item)
-            # make it check-able
-            top_level_item.setFlags(top_level_item.flags() | Qt.ItemIsUserCheckable)
-            #  set it's state to checked
-            top_level_item.setCheckState(0, Qt.Checked)
-            # set background color to color of dir
-            top_level_item.setBackground(0, QColor(233, 236, 239))
-            # recursively add subdirectories and files to the selected dir
-            self.add_subdir_and_subfiles(top_level_item)
-
-            if not self.csv_lst:
-                # if there's no CSV/TSV files under the selected dir
-                self.iface.messageBar().pushMessage('No CSV or TSV file under this directory!', level=1)
-                return
-            else:
-                header_list = None
-                i = 0
-                while header_list is None and i < len(self.csv_lst):
-                    # if there's at least 1 CSV/TSV file open it, & get the columns names
-                    csv_file_path = self.csv_lst[i]
-                    with open(csv_file_path, "r", newline="") as file:
-                        reader = csv.reader(file)
-                        header_list = next(reader, None)
-                    i += 1
-
-                if header_list is not None:
-                    # Add the column names to the QComboBox
-                    self.dlg.xfield_cmbBox.addItems(header_list)
-                    self.dlg.yfield_cmbBox.addItems(header_list)
+            # add subdirectories and files to the selected dir in the background
+            self.start_scan(selected_directory)
+            # the selected directory is the checked top level row of the tree
+            self.tree_model.set_root(self.scan_task.root, Qt.Checked)
+            self.dlg.csv_tree.expand(self.tree_model.node_index(self.scan_task.root))
         else:
             # clear edit line
             self.dlg.rootDirLineEdit.clear()
@@ -318,152 +621,390 @@ class CsvLayersList:
             # pop up warning msg
             self.iface.messageBar().pushMessage('Please select a directory', level=1)
 
-    def file_is_valid(self, fpath):
-        """The function checks if file is valid as a layer or not, and also return a layer if it's valid"""
-        # get crs from combobox as str then convert to QgsCoordinateReferenceSystem obj then get .authid()
-        crs = QgsCoordinateReferenceSystem(self.dlg.crs_cmbBox.currentText().split(' - ')[0]).authid()
-
-        file_name = os.path.basename(fpath)
-        name = os.path.splitext(file_name)[0]
-        extension = os.path.splitext(file_name)[1]
-
-        # check file type and change delimiter accordingly
-        if extension == '.csv':
-            delimiter = ','
-        elif extension == '.tsv':
-            delimiter = '\\t'
+    def selected_crs(self):
+        """The function gets crs from combobox as str then convert to QgsCoordinateReferenceSystem obj
+        then get .authid()"""
+        return QgsCoordinateReferenceSystem(self.dlg.crs_cmbBox.currentText().split(' - ')[0]).authid()
+
+    def layer_uri(self, fpath):
+        """The function returns the layer name and the provider uri of the given file, see layer_provider"""
+        # get uri of the file
+        x_field, y_field = self.fields_for_file(fpath)
+        # the dialect sniffed by the header analysis, so the provider parses the file right the first time
+        dialect = self.schema_report.dialects.get(fpath) if self.schema_report is not None else None
+        if dialect is not None and is_compressed(fpath) and not ogr_readable(dialect):
+            # only GDAL reads the compressed files, the delimited text provider can't take them over
+            self.log_message(f'{fpath} is read by GDAL as UTF-8 with double quotes, its {dialect.encoding} '
+                             f'encoding or {dialect.quotechar} quote character may be read wrong')
+        # the column types of the schema group, so the provider doesn't read the whole file to detect them
+        field_types = None
+        if self.fast_open and self.schema_report is not None:
+            field_types = self.field_types.get(self.schema_report.headers.get(fpath))
+        return layer_name(fpath), layer_uri(fpath, self.crs, x_field, y_field, dialect, self.archives_dir(),
+                                            field_types)
 
-        # get uri & convert file to vector layer
-        uri = f"file:///{fpath}?delimiter={delimiter}&crs={crs}&xField={self.x_field}&yField={self.y_field}"
-        layer = QgsVectorLayer(uri, name, 'delimitedtext')
+    def file_is_valid(self, fpath):
+        """The function checks if file is valid as a layer or not, and also return a layer if it's valid.
+        The layer isn't registered in the project, the layer tree builder registers its layers by batch."""
+        # convert file to vector layer
+        name, uri = self.layer_uri(fpath)
+        layer = QgsVectorLayer(uri, name, layer_provider(fpath))
 
         if layer.isValid():
-            # add layer to canvas without displaying it the tree
-            QgsProject.instance().addMapLayer(layer, False)
             return True, layer
         else:
             return False, None
 
-    def build_tree_from_paths(self, paths_list):
-        """The function populates node tree based on the provided paths chosen by user,
+    def build_tree_from_paths(self, file_nodes):
+        """The function populates node tree based on the (path, node) files chosen by user,
         it creates group nodes for directories and adding vector layers for CSV/TSV files,
-        based on the hierarchical structure of the paths, using the full path as a unique identifier"""
-        # handle if only one file is selected
-        if len(self.csv_lst) == 1:
-            top_level_path = os.path.normpath(os.path.dirname(self.csv_lst[0]))
-        else:
-            # find the common path among all the paths
-            top_level_path = os.path.normpath(os.path.commonpath(self.csv_lst))
-        # get base name of path
-        top_level_name = os.path.basename(top_level_path)
-        # convert it to node
-        top_level_node = QgsLayerTreeGroup(top_level_name)
-
-        # Create a dictionary to store path as key and its node as value (node_dict[path] = node)
-        node_dict = {top_level_path: top_level_node}
-
-        # loop over each path in paths_list
-        for path in paths_list:
-            # keep a copy un-altered
-            path_copy = path
-            isvalid, layer = self.file_is_valid(path)
-            # handle if coordinates doesn't match with the file
+        based on the hierarchical structure of the paths, using the full path as a unique identifier.
+        The layers are built on the main thread by an ImportJob, in the order of the plan so every
+        node is appended to its group, the large files by background tasks. The tree is committed to
+        the project once it's done."""
+        self.tree_builder = LayerTreeBuilder([path for path, node in file_nodes], [node for path, node in file_nodes])
+        nodes = dict(file_nodes)
+
+        jobs = []
+        for path in self.tree_builder.plan.files:
+            name, uri = self.layer_uri(path)
+            node = nodes[path]
+            jobs.append((path, node.size if node is not None else 0, name, uri))
+        self.start_layer_loader(ImportJob(jobs), jobs)
+
+    def build_tree_in_parallel(self, file_nodes):
+        """The function populates node tree like build_tree_from_paths, but the layers are built and validated
+        by a bounded pool of background tasks, largest files first. Every valid layer is put in its detached group
+        as soon as it's ready, at the position it would have in build_tree_from_paths, the tree is committed to
+        the project once the last file is done."""
+        self.tree_builder = LayerTreeBuilder([path for path, node in file_nodes], [node for path, node in file_nodes])
+
+        jobs = []
+        for path, node in file_nodes:
+            name, uri = self.layer_uri(path)
+            jobs.append((path, node.size if node is not None else 0, name, uri))
+        self.start_layer_loader(ParallelLayerLoader(jobs), jobs)
+
+    def start_layer_loader(self, loader, jobs):
+        """The function starts loading the (path, size, name, uri) jobs with the loader, its progress is shown
+        in the message bar until it's finished. Canceling the feedback of the import stops the loader,
+        the layers already loaded are kept."""
+        self.layer_loader = loader
+        self.import_sizes = {path: size for path, size, name, uri in jobs}
+        self.import_failed = []
+        feedback = QgsFeedback()
+        progress = Progress(len(jobs), sum(self.import_sizes.values()))
+        self.import_progress = ImportProgressBar(self.iface.messageBar(), progress, feedback)
+        feedback.canceled.connect(loader.cancel)
+        loader.layer_loaded.connect(self.evt_layer_loaded)
+        loader.layer_failed.connect(self.evt_layer_failed)
+        loader.finished.connect(self.evt_layers_finished)
+        # clear selection
+        self.selection.clear()
+        # the groups are filled while the files are loaded
+        loader.start()
+
+    def archives_dir(self):
+        """The function returns the directory of the VRT documents reading the compressed files."""
+        return archives_dir(QgsApplication.qgisSettingsDirPath())
+
+    def union_dir(self):
+        """The function returns the directory of the VRT files of the union layers."""
+        return unions_dir(QgsApplication.qgisSettingsDirPath())
+
+    def build_union_tree(self, file_nodes, mode):
+        """The function populates node tree with one layer per schema group instead of one per file,
+        the files of each group are read in place through an OGR VRT union layer with a source_file
+        attribute telling the file of every feature. The groups are made per directory or for the
+        whole tree depending on mode."""
+        paths_list = [path for path, node in file_nodes]
+        top_level = top_level_path(paths_list)
+        headers = self.schema_report.headers if self.schema_report is not None else {}
+        dialects = self.schema_report.dialects if self.schema_report is not None else {}
+        groups = union_groups(paths_list, headers, self.fields_for_file, mode, top_level, dialects)
+
+        builder = LayerTreeBuilder([group.path for group in groups])
+        for group in groups:
+            # a file alone in its group is loaded as usual
+            if len(group.paths) == 1:
+                isvalid, layer = self.file_is_valid(group.paths[0])
+            else:
+                vrt_path = write_union_vrt(group, self.crs, self.union_dir())
+                name = f'{group.name} ({len(group.paths)} files)'
+                layer = QgsVectorLayer(f'{vrt_path}|layername={UNION_LAYER}', name, 'ogr')
+                isvalid = layer.isValid()
             if not isvalid:
-                message = f"Can't load file {path}, Please check it's coordinates"
-                self.iface.messageBar().pushMessage(message, level=1)
-            # coordinates match with the file
+                for path in group.paths:
+                    self.evt_layer_failed(path)
             else:
-                # handle if only one file is selected
-                if len(self.csv_lst) == 1:
-                    comp_lst = [os.path.basename(path_copy)]
-                else:
-                    # Split the path into components with seperator => top level path
-                    components = path.split(top_level_path)
-                    # get the part that will be added to our tree
-                    path = components[1]
-
-                    # Split the path again into components with new sep ==> \\
-                    comp_lst = list(path.split(os.path.sep))
-                    # remove '' from list to get each directory name as item [dir1, dir2, ... file.txt]
-                    comp_lst.remove('')
-
-                # handle if only one file is selected
-                # set initial root path
-                if len(self.csv_lst) == 1:
-                    comp_path = os.path.dirname(path_copy)
-                else:
-                    comp_path = top_level_path
-                # set initial node as top level
-                prnt_node = top_level_node
-                # loop over components list
-                for c in comp_lst:
-                    # join top path and comp
-                    comp_path = os.path.join(comp_path, c)
-                    # check if comp path is dir and not in node_dict
-                    if os.path.isdir(comp_path) and comp_path not in node_dict:
-                        # add path as key & node as value
-                        node_dict[comp_path] = QgsLayerTreeGroup(c)
-                        # add current node to parent node
-                        prnt_node.addChildNode(node_dict[comp_path])
-                        # set child node as parent for next loop
-                        prnt_node = node_dict[comp_path]
-                    # check if comp path is in node_dict
-                    elif comp_path in node_dict:
-                        # set child node as parent for next loop
-                        prnt_node = node_dict[comp_path]
-                    # check if comp path is file (last item in comp_lst)
-                    elif os.path.isfile(comp_path):
-                        if len(self.csv_lst) == 1:
-                            prnt_dir = top_level_path
-                        else:
-                            # get parent directory path from file path
-                            prnt_dir = os.path.dirname(path_copy)
-                        # get the corresponding value to key/(parent path) from node dic
-                        prnt_node = node_dict[prnt_dir]
-                        # convert layer to node
-                        layer_node = QgsLayerTreeLayer(layer)
-                        # add layer ti its parent directory
-                        prnt_node.addChildNode(layer_node)
-        # clear node_dict & csv_lst
-        node_dict.clear()
-        self.csv_lst = []
-        self.root_group.addChildNode(top_level_node)
+                # the union layers of the whole tree stand in the top level directory, like a file of it
+                builder.add_layer(group.path, layer)
+        # clear selection
+        self.selection.clear()
+        builder.commit(QgsProject.instance(), self.root_group, self.iface.mapCanvas())
+        self.iface.messageBar().pushMessage(f'{len(paths_list)} files loaded as {len(groups)} layers', level=0)
+
+    def build_lazy_tree(self, file_nodes):
+        """The function populates node tree like build_tree_from_paths, but every file is a placeholder node
+        until it's checked or its group is checked or expanded. The memory budget of the loaded layers,
+        in MB, is read from the settings."""
+        paths_list = [path for path, node in file_nodes]
+        builder = LayerTreeBuilder(paths_list, [node for path, node in file_nodes])
+        budget_mb = QSettings().value('csv_batch_import/lazy_memory_budget_mb', DEFAULT_BUDGET_MB, type=int)
+        lazy_tree = LazyLayerTree(builder.top_level_node, budget_mb)
+        lazy_tree.layer_failed.connect(self.evt_layer_failed)
+        lazy_tree.removed.connect(partial(self.evt_lazy_tree_removed, lazy_tree))
+
+        for path, node in file_nodes:
+            name, uri = self.layer_uri(path)
+            builder.add_node(path, lazy_tree.placeholder(path, name, uri, node.size if node is not None else 0))
+        # collapse the groups created for the placeholders
+        lazy_tree.collapse(builder.top_level_node)
+        self.lazy_trees.append(lazy_tree)
+        # clear selection
+        self.selection.clear()
+        builder.commit(QgsProject.instance(), self.root_group, self.iface.mapCanvas())
+
+    def evt_lazy_tree_removed(self, lazy_tree):
+        """The function forgets the tree imported on demand once its group is deleted."""
+        if lazy_tree in self.lazy_trees:
+            self.lazy_trees.remove(lazy_tree)
+
+    def evt_project_cleared(self):
+        """The function forgets the trees imported on demand, the project cleared their groups."""
+        self.lazy_trees = []
+
+    def evt_layer_loaded(self, path, layer):
+        """The function adds a loaded layer to its parent directory group,
+        it's registered in the project with the others once they are all loaded."""
+        self.tree_builder.add_layer(path, layer)
+        self.import_progress.advance(self.import_sizes.get(path, 0))
+
+    def evt_layer_failed(self, path):
+        """The function warns the user about a file that can't be loaded, the failures of the files of
+        the running import are reported together once it's finished. Other failures, like the
+        placeholders of an earlier lazy tree, are shown right away."""
+        if self.import_progress is not None and path in self.import_sizes:
+            self.import_failed.append(path)
+            self.import_progress.advance(self.import_sizes.get(path, 0))
+            return
+        message = f"Can't load file {path}, Please check it's coordinates"
+        self.iface.messageBar().pushMessage(message, level=1)
+
+    def evt_layers_finished(self):
+        """The function commits the tree of the import, even a canceled one, and reports its throughput
+        once all the files are done."""
+        start = time.perf_counter()
+        self.tree_builder.commit(QgsProject.instance(), self.root_group, self.iface.mapCanvas())
+        insertion = time.perf_counter() - start
+        progress = self.import_progress.progress
+        if isinstance(self.layer_loader, ImportJob):
+            self.timer.record('provider parsing', self.layer_loader.build_seconds, files=progress.files)
+        self.timer.record('layer tree insertion', insertion, files=progress.files - len(self.import_failed))
+
+        canceled = self.import_progress.is_canceled()
+        self.import_progress.close()
+        summary = progress.summary(canceled)
+        self.log_message(f'Import: {summary}')
+        for path in self.import_failed:
+            self.log_message(f"Can't load file {path}, Please check it's coordinates")
+        if self.import_failed:
+            self.iface.messageBar().pushMessage(
+                f"Can't load {len(self.import_failed)} files, Please check their coordinates, "
+                f"the files are listed in the CSV Batch Import log", level=1)
+        self.iface.messageBar().pushMessage(
+            f'{progress.files - len(self.import_failed)} layers loaded, {summary}', level=1 if canceled else 0)
+
+        self.layer_loader = None
+        self.tree_builder = None
+        self.import_progress = None
+        self.import_sizes = {}
+        self.import_failed = []
+        self.finish_import()
 
     def evt_run_btn_clicked(self):
         """The function checks if valid coordinate fields and CSV files are selected.
         If so, it uses CSV file list to build the tree structure"""
+        if self.layer_loader is not None or self.export_task is not None:
+            self.iface.messageBar().pushMessage('Please wait until the previous files are loaded', level=1)
+            return
+
         # get coordinates name in file by user
-        self.x_field = self.dlg.xfield_cmbBox.currentText()
-        self.y_field = self.dlg.yfield_cmbBox.currentText()
-
-        # if there's coordinate values & files in csvLst
-        if self.x_field and self.y_field and self.csv_lst:
-            # temp list to carry directories contain csv/tsv files
-            new_dir_list = []
-            for directory in self.dir_list:
-                # get children files for each directory in dir_list
-                files_lst = self.get_dirs_files(directory)[1]
-                # check if there is at least one file with the '.csv' or '.tsv' extension
-                if any('.csv' in file or '.tsv' in file for file in files_lst):
-                    # add directory to temp list
-                    new_dir_list.append(directory)
-
-            # set the temp list as dir_list
-            self.dir_list = new_dir_list
-            # send CSV files list (csvLst) & use it to build tree
-            self.build_tree_from_paths(self.csv_lst)
+        self.x_field = self.dlg.xfield_cmbBox.currentData()
+        self.y_field = self.dlg.yfield_cmbBox.currentData()
+        self.crs = self.selected_crs()
+        self.fast_open = self.dlg.fast_open_chkBox.isChecked()
+
+        # if there's coordinate values & selected files
+        if self.x_field and self.y_field and self.selection:
+            self.start_profiler()
+            if self.dlg.prevalidate_chkBox.isChecked():
+                if self.prevalidation_task is None:
+                    self.start_prevalidation(self.selection.file_nodes())
+            else:
+                self.start_import(self.selection.file_nodes())
         else:
-            #  # if there's no coordinate values or files in csvLst
+            #  # if there's no coordinate values or selected files
             self.iface.messageBar().pushMessage(
                 'Please make sure there\'s CSV files with valid coordinates beneath this path', level=1)
             # clear selected directories
-            self.csv_lst = []
-            self.dir_list = []
-            return
+            self.selection.clear()
+
+    def start_import(self, file_nodes):
+        """The function builds the tree of the given (path, node) files then closes the dialog."""
+        # write the files to a GeoPackage then build the tree from its tables
+        if self.dlg.target_cmbBox.currentIndex() == TARGET_GEOPACKAGE:
+            gpkg_path = QFileDialog.getSaveFileName(self.dlg, 'Save GeoPackage', self.path, 'GeoPackage (*.gpkg)')[0]
+            if not gpkg_path:
+                self.stop_profiler()
+                return
+            if not gpkg_path.lower().endswith('.gpkg'):
+                gpkg_path += '.gpkg'
+            self.start_import_phase(file_nodes)
+            self.start_geopackage_export(gpkg_path, file_nodes)
+        else:
+            self.start_import_phase(file_nodes)
+            # merge the files sharing a schema into union layers
+            if self.dlg.merge_cmbBox.currentIndex() != MERGE_NONE:
+                self.build_union_tree(file_nodes, self.dlg.merge_cmbBox.currentIndex())
+            # create the layers only when the user opens their group
+            elif self.dlg.lazy_chkBox.isChecked():
+                self.build_lazy_tree(file_nodes)
+            # send the selected CSV files & use them to build tree
+            elif self.dlg.parallel_chkBox.isChecked():
+                self.build_tree_in_parallel(file_nodes)
+            else:
+                self.build_tree_from_paths(file_nodes)
+            # the sequential & parallel imports are finished once their last layer is loaded
+            if self.layer_loader is None:
+                self.finish_import()
 
         # close dialog window
         self.dlg.close()
 
+    def start_import_phase(self, file_nodes):
+        """The function starts timing the import of the given (path, node) files."""
+        self.import_phase = self.timer.start('import')
+        self.import_phase.files = len(file_nodes)
+        self.import_phase.bytes = sum(node.size for path, node in file_nodes if node is not None)
+
+    def finish_import(self):
+        """The function reports the import phase and writes the profile of the import, if any."""
+        if self.import_phase is not None:
+            self.timer.stop(self.import_phase)
+            self.import_phase = None
+        self.stop_profiler()
+
+    def start_geopackage_export(self, gpkg_path, file_nodes):
+        """The function starts a background task that writes every given (path, node) file into its own table
+        of the GeoPackage, the layer tree is built from the tables once it's done."""
+        paths_list = [path for path, node in file_nodes]
+        tables = table_names(paths_list, top_level_path(paths_list))
+        jobs = []
+        for path in paths_list:
+            name, uri = self.layer_uri(path)
+            jobs.append((path, tables[path], name, uri))
+        index_fields = [field.strip() for field in self.dlg.index_fields_lineEdit.text().split(',') if field.strip()]
+
+        task = self.export_task = GeoPackageExportTask(gpkg_path, jobs, index_fields)
+        task.taskCompleted.connect(partial(self.evt_geopackage_export_finished, task))
+        task.taskTerminated.connect(partial(self.evt_geopackage_export_finished, task))
+        # clear selection
+        self.selection.clear()
+        QgsApplication.taskManager().addTask(task)
+
+    def evt_geopackage_export_finished(self, task):
+        """The function builds the layer tree from the GeoPackage tables written by the export task."""
+        self.export_task = None
+        self.finish_import()
+        for path, error in task.failed:
+            self.iface.messageBar().pushMessage(f"Can't load file {path}, {error}", level=1)
+        if task.exception is not None:
+            self.iface.messageBar().pushMessage(f"Can't write {task.gpkg_path}: {task.exception}", level=2)
+        if not task.written:
+            return
+
+        builder = LayerTreeBuilder([path for path, table in task.written])
+        for path, table in task.written:
+            name = layer_name(path)
+            layer = QgsVectorLayer(f'{task.gpkg_path}|layername={table}', name, 'ogr')
+            if layer.isValid():
+                builder.add_layer(path, layer)
+            else:
+                self.evt_layer_failed(path)
+        builder.commit(QgsProject.instance(), self.root_group, self.iface.mapCanvas())
+        self.iface.messageBar().pushMessage(f'{len(task.written)} files written to {task.gpkg_path}', level=0)
+
+    def crs_bounds(self):
+        """The function returns the area of use of the chosen CRS as (xmin, ymin, xmax, ymax) in the CRS units,
+        or None when it's unknown."""
+        return crs_bounds(QgsCoordinateReferenceSystem(self.crs), QgsProject.instance().transformContext())
+
+    def start_prevalidation(self, file_nodes):
+        """The function starts a background task that checks the coordinates of the given (path, node) files
+        with NumPy, the import starts once the user accepted the summary."""
+        if not prevalidation_available():
+            self.iface.messageBar().pushMessage('NumPy is not available, the coordinates are not pre-validated',
+                                                level=1)
+            self.start_import(file_nodes)
+            return
+
+        jobs = [(path,) + self.fields_for_file(path) for path, node in file_nodes]
+        dialects = self.schema_report.dialects if self.schema_report is not None else None
+        task = self.prevalidation_task = PrevalidationTask(jobs, self.crs_bounds(), dialects)
+        task.taskCompleted.connect(partial(self.evt_prevalidation_finished, task, file_nodes))
+        task.taskTerminated.connect(partial(self.evt_prevalidation_finished, task, file_nodes))
+        self.dlg.run_btn.setEnabled(False)
+        self.prevalidation_phase = self.timer.start('coordinates validation')
+        self.dlg.scan_status_lbl.setText(f'Validating coordinates of {len(jobs)} files...')
+        QgsApplication.taskManager().addTask(task)
+
+    def evt_prevalidation_finished(self, task, file_nodes):
+        """The function shows the summary of the validation and imports the files with valid coordinates
+        when the user accepts it."""
+        if task is not self.prevalidation_task:
+            return
+        self.prevalidation_task = None
+        self.dlg.run_btn.setEnabled(True)
+        self.dlg.scan_status_lbl.clear()
+        self.timer.stop(self.prevalidation_phase, files=len(task.results),
+                        size=sum(node.size for path, node in file_nodes if node is not None))
+        if task.exception is not None or len(task.results) != len(file_nodes):
+            self.iface.messageBar().pushMessage('The coordinates validation was stopped', level=1)
+            self.stop_profiler()
+            return
+
+        valid = {stats.path for stats in task.results if stats.is_valid}
+        rejected = [stats for stats in task.results if not stats.is_valid]
+        details = ''.join(f'\n{stats.path}: {stats.error or "no valid coordinates"}' for stats in rejected[:10])
+        if len(rejected) > 10:
+            details += f'\n... and {len(rejected) - 10} more'
+        if not valid:
+            QMessageBox.warning(self.dlg, 'Coordinates validation',
+                                summarize(task.results) + '\n\nNo file can be loaded.' + details)
+            self.stop_profiler()
+            return
+        answer = QMessageBox.question(
+            self.dlg, 'Coordinates validation',
+            summarize(task.results) + details + f'\n\nLoad the {len(valid)} files with valid coordinates?')
+        if answer == QMessageBox.Yes:
+            self.start_import([(path, node) for path, node in file_nodes if path in valid])
+        else:
+            self.stop_profiler()
+
+    def stop_prevalidation(self):
+        """The function discards the running validation if any."""
+        if self.prevalidation_task is not None:
+            self.prevalidation_task.cancel()
+            self.prevalidation_task = None
+            self.stop_profiler()
+
+    def evt_target_changed(self, index):
+        """The function enables the attribute index columns only for the GeoPackage target."""
+        self.dlg.index_fields_lineEdit.setEnabled(index == TARGET_GEOPACKAGE)
+        # the GeoPackage has one table per file
+        self.dlg.merge_cmbBox.setEnabled(index == TARGET_LAYERS)
+
     def evt_crs_btn_clicked(self):
         """The function allows the user to select a CRS from the QgsProjectionSelectionDialog
         and updates the combo box's current text accordingly."""
@@ -484,98 +1025,61 @@ class CsvLayersList:
                 self.dlg.crs_cmbBox.addItem(crs_authid + ' - ' + crs_description)
                 self.dlg.crs_cmbBox.setCurrentText(crs_authid + ' - ' + crs_description)
 
-    def evt_itm_selected(self, item):
-        """The function manages the selection of items in the tree and updates the corresponding
-        lists (dir_list or csvLst) based on the checked or unchecked state of the items."""
-        # get item's full path
-        full_path = self.get_full_path_for_tree_item(item)
-
-        # if item selected is a file
-        if os.path.isfile(full_path):
-            # if file is checked & its path doesn't exist in csvLst
-            if item.checkState(0) == Qt.Checked and full_path not in self.csv_lst:
-                # add its path to csvLst
-                self.csv_lst.append(full_path)
-
-            # if file is unchecked & its path exists in csvLst
-            elif item.checkState(0) == Qt.Unchecked and full_path in self.csv_lst:
-                # remove its path from csvLst
-                self.csv_lst.remove(full_path)
-
-        # if item selected is a directory
-        elif os.path.isdir(full_path):
-            # if directory is unchecked & its path exist in dir_list
-            if item.checkState(0) == Qt.Unchecked and full_path in self.dir_list:
-                # remove path & its children recursively from dir_list
-                self.dir_unchecked(item)
-
-            # if directory is checked & its path doesn't exist in dir_list
-            if item.checkState(0) == Qt.Checked and full_path not in self.dir_list:
-                # add path & its children recursively from dir_list
-                self.dir_checked(item)
-
-    def dir_checked(self, item):
-        """The function adds the checked directory and its children to the corresponding lists
-        (dir_list and csvLst) and recursively checks all child items under the directory"""
-        # get item's full path
-        item_path = self.get_full_path_for_tree_item(item)
-
-        # check if item path checked is dir and if not in dir_list
-        if os.path.isdir(item_path) and item_path not in self.dir_list:
-            # add directory path to dir_list
-            self.dir_list.append(item_path)
-
-        # loop on item's children recursively
-        for i in range(item.childCount()):
-            child_item = item.child(i)
-            # get full path of child
-            child_full_path = self.get_full_path_for_tree_item(child_item)
-
-            # if it's file add it to csv list
-            if os.path.isfile(child_full_path) and child_full_path not in self.csv_lst:
-                self.csv_lst.append(child_full_path)
-
-            # if it's directory call the function again
-            child_item.setCheckState(0, Qt.Checked)
-            self.dir_checked(child_item)
-
-    def dir_unchecked(self, item):
-        """The function remove the unchecked directory and its children from the corresponding lists
-        (dir_list and csvLst) and recursively checks all child items under the directory"""
-        # get item's full path
-        item_path = self.get_full_path_for_tree_item(item)
-
-        # check if item path unchecked is dir and if it's in dir_list
-        if os.path.isdir(item_path) and item_path in self.dir_list:
-            # remove directory path from dir_list
-            self.dir_list.remove(item_path)
-
-        # loop on item's children recursively
-        for i in range(item.childCount()):
-            child_item = item.child(i)
-            # get full path of child
-            child_full_path = self.get_full_path_for_tree_item(child_item)
-
-            # if the child is file then remove it from csv list
-            if os.path.isfile(child_full_path) and child_full_path in self.csv_lst:
-                self.csv_lst.remove(child_full_path)
-
-            # if it's directory call the function again
-            child_item.setCheckState(0, Qt.Unchecked)
-            self.dir_unchecked(child_item)
+    def evt_itm_selected(self, node, state):
+        """The function updates the selection when the user checks or unchecks a node of the tree,
+        the model already checked or unchecked the nodes under it and updated its parents.
+        A directory is selected or deselected with everything under it in one pass."""
+        # if node selected is a file
+        if not node.is_dir:
+            # if file is checked add its path to the selection
+            if state == Qt.Checked:
+                self.selection.add_file(node.path, node)
+
+            # if file is unchecked remove its path from the selection
+            elif state == Qt.Unchecked:
+                self.selection.discard_file(node.path)
+
+        # if node selected is a directory, a partially checked one may be checked again
+        elif state == Qt.Checked:
+            # add path & its children to the selection
+            self.dir_checked(node)
+
+        elif state == Qt.Unchecked:
+            # remove path & its children from the selection
+            self.dir_unchecked(node)
+
+        # the number of selected files containing each column changed
+        self.refresh_field_combos()
+
+    def dir_checked(self, node):
+        """The function adds the checked directory and its children to the selection"""
+        self.selection.select_subtree(node)
+
+    def dir_unchecked(self, node):
+        """The function removes the unchecked directory and its children from the selection"""
+        self.selection.deselect_subtree(node)
 
     def on_rejected(self):
         """The function resets the state of the dialog and clears any selected values
          or lists associated with it when the user cancels the dialog."""
         # Perform actions when the dialog is rejected (Cancel button clicked)
+        # stop a scan or a header analysis that is still running
+        self.stop_scan(discard=True)
+        self.stop_header_analysis()
+        self.stop_prevalidation()
+        self.tree_watcher.clear()
+        self.schema_report = None
+        self.detected_xy = {}
+        self.field_types = {}
         # clear tree every time you run the plugin
-        self.dlg.csv_tree.clear()
+        self.tree_model.clear()
+        self.dlg.scan_status_lbl.clear()
+        self.scan_index = {}
         self.dlg.rootDirLineEdit.clear()
         self.y_field = self.dlg.yfield_cmbBox.clear()
         self.x_field = self.dlg.xfield_cmbBox.clear()
         self.dlg.crs_cmbBox.clear()
-        self.csv_lst = []
-        self.dir_list = []
+        self.selection.clear()
         self.dlg.close()
 
     def run(self):
@@ -589,10 +1093,18 @@ class CsvLayersList:
             self.dlg = CsvLayersListDialog()
             self.dlg.browse_btn.clicked.connect(self.evt_browse_btn_clicked)
             self.dlg.crs_btn.clicked.connect(self.evt_crs_btn_clicked)
-            self.dlg.csv_tree.itemClicked.connect(self.evt_itm_selected)
+            # the tree only creates the rows of the expanded directories
+            self.tree_model = ScanTreeModel(self.dlg)
+            self.tree_model.check_state_changed.connect(self.evt_itm_selected)
+            self.dlg.csv_tree.setModel(self.tree_model)
             self.dlg.run_btn.clicked.connect(self.evt_run_btn_clicked)
+            self.dlg.stop_btn.clicked.connect(self.evt_stop_btn_clicked)
+            self.tree_watcher = TreeWatcher(self.dlg)
+            self.tree_watcher.directories_changed.connect(self.evt_directories_changed)
+            self.tree_watcher.partially_watched.connect(self.evt_partially_watched)
+            self.dlg.watch_chkBox.toggled.connect(self.evt_watch_toggled)
+            self.dlg.target_cmbBox.currentIndexChanged.connect(self.evt_target_changed)
             self.dlg.rejected.connect(self.on_rejected)
-            self.dlg.csv_tree.setHeaderLabels(['CSV Files Tree'])
             self.dlg.csv_tree.header().setDefaultAlignment(Qt.AlignCenter | Qt.AlignVCenter)
 
         # clear crs combo box every time we run plugin
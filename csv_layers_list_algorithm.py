@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ CsvTreeImportAlgorithm
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os.path
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import (QgsProcessingAlgorithm, QgsProcessingException, QgsProcessingParameterFile,
+                       QgsProcessingParameterString, QgsProcessingParameterCrs, QgsProcessingParameterBoolean,
+                       QgsProcessingParameterEnum, QgsProcessingParameterFileDestination, QgsProcessingOutputNumber,
+                       QgsVectorLayer, QgsApplication)
+
+from .core.scanner import ScanNode, iter_scan, split_patterns, match_patterns
+from .core.headers import analyze_headers
+from .core.coordinates import analyze_groups, fields_for_header
+from .core.prevalidation import is_available as prevalidation_available, validate_files, summarize
+from .core.geopackage import table_names
+from .core.uri import layer_name, layer_provider, layer_uri
+from .core.vrt import archives_dir
+from .core.timing import PhaseTimer
+from .geopackage_task import write_geopackage
+from .prevalidation_task import crs_bounds
+from .layer_tree_builder import LayerTreeBuilder
+
+# index of the output targets in the TARGET enum
+TARGET_PROJECT = 0
+TARGET_GEOPACKAGE = 1
+
+
+class CsvTreeImportAlgorithm(QgsProcessingAlgorithm):
+    """Scans a directory tree for CSV/TSV files, keeps the ones matching the include patterns, checks
+    their coordinates and loads them into the project as a group tree or writes them to a GeoPackage."""
+
+    ROOT = 'ROOT'
+    INCLUDE = 'INCLUDE'
+    X_FIELD = 'X_FIELD'
+    Y_FIELD = 'Y_FIELD'
+    CRS = 'CRS'
+    VALIDATE = 'VALIDATE'
+    FAST_OPEN = 'FAST_OPEN'
+    TARGET = 'TARGET'
+    INDEX_FIELDS = 'INDEX_FIELDS'
+    OUTPUT = 'OUTPUT'
+    FILE_COUNT = 'FILE_COUNT'
+    LOADED_COUNT = 'LOADED_COUNT'
+
+    def __init__(self):
+        super().__init__()
+        # (path, name, uri) of the files loaded into the project once the algorithm is done
+        self.layer_jobs = []
+        # outputs of processAlgorithm, the ones of postProcessAlgorithm replace them so they are returned again
+        self.results = {}
+
+    def tr(self, string):
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        return CsvTreeImportAlgorithm()
+
+    def name(self):
+        return 'importcsvtree'
+
+    def displayName(self):
+        return self.tr('Import CSV/TSV tree')
+
+    def group(self):
+        return self.tr('Import')
+
+    def groupId(self):
+        return 'import'
+
+    def shortHelpString(self):
+        return self.tr('Finds the CSV and TSV files under the root directory, gzip compressed or inside zip '
+                       'archives too, and loads them as point layers, '
+                       'in groups matching the directories, or writes them to one table each of a GeoPackage.\n'
+                       'Include patterns are glob patterns separated by semicolons, matched against the file '
+                       'name or its path relative to the root (e.g. "*.csv; 2023/*").\n'
+                       'When the X/Y fields are empty or missing from a file, the coordinate columns detected '
+                       'for its header are used.')
+
+    def initAlgorithm(self, config=None):
+        """The function declares the parameters and outputs of the algorithm."""
+        self.addParameter(QgsProcessingParameterFile(
+            self.ROOT, self.tr('Root directory'), behavior=QgsProcessingParameterFile.Folder))
+        self.addParameter(QgsProcessingParameterString(
+            self.INCLUDE, self.tr('Include patterns'), defaultValue='*.csv;*.tsv;*.csv.gz;*.tsv.gz', optional=True))
+        self.addParameter(QgsProcessingParameterString(
+            self.X_FIELD, self.tr('X field'), optional=True))
+        self.addParameter(QgsProcessingParameterString(
+            self.Y_FIELD, self.tr('Y field'), optional=True))
+        self.addParameter(QgsProcessingParameterCrs(
+            self.CRS, self.tr('Coordinates CRS'), defaultValue='EPSG:4326'))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.VALIDATE, self.tr('Skip the files without valid coordinates (needs NumPy)'), defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.FAST_OPEN, self.tr('Open the layers with the column types inferred from a sample'),
+            defaultValue=False))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.TARGET, self.tr('Output target'),
+            options=[self.tr('Layer tree of the project'), self.tr('GeoPackage')], defaultValue=TARGET_PROJECT))
+        self.addParameter(QgsProcessingParameterString(
+            self.INDEX_FIELDS, self.tr('GeoPackage indexed columns, comma separated'), optional=True))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.OUTPUT, self.tr('GeoPackage'), fileFilter='GeoPackage (*.gpkg)', optional=True,
+            createByDefault=False))
+        self.addOutput(QgsProcessingOutputNumber(self.FILE_COUNT, self.tr('Number of files found')))
+        self.addOutput(QgsProcessingOutputNumber(self.LOADED_COUNT, self.tr('Number of files loaded or written')))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        """The function runs the scan, filter, validate and import stages, each one can be canceled."""
+        root_path = os.path.normpath(self.parameterAsFile(parameters, self.ROOT, context))
+        if not os.path.isdir(root_path):
+            raise QgsProcessingException(self.tr('{} is not a directory').format(root_path))
+        patterns = split_patterns(self.parameterAsString(parameters, self.INCLUDE, context))
+        x_field = self.parameterAsString(parameters, self.X_FIELD, context)
+        y_field = self.parameterAsString(parameters, self.Y_FIELD, context)
+        crs = self.parameterAsCrs(parameters, self.CRS, context)
+        target = self.parameterAsEnum(parameters, self.TARGET, context)
+        fast_open = self.parameterAsBool(parameters, self.FAST_OPEN, context)
+        gpkg_path = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
+        if target == TARGET_GEOPACKAGE and not gpkg_path:
+            raise QgsProcessingException(self.tr('Please choose the GeoPackage to write'))
+
+        # wall time of every stage, reported in the log of the algorithm
+        timer = PhaseTimer(feedback.pushInfo)
+
+        # scan
+        feedback.setProgressText(self.tr('Scanning {}').format(root_path))
+        root = ScanNode(root_path)
+        with timer.measure('scan') as phase:
+            # the scan yields every directory once it's listed, only the finished tree is needed
+            for _ in iter_scan(root, is_canceled=feedback.isCanceled):
+                pass
+            files = list(root.iter_files())
+            phase.files = len(files)
+            phase.bytes = sum(file.size for file in files)
+        if feedback.isCanceled():
+            return {}
+        # filter
+        paths = match_patterns([file.path for file in files], root_path, patterns)
+        feedback.pushInfo(self.tr('{} files match the include patterns').format(len(paths)))
+        results = self.results = {self.FILE_COUNT: len(paths), self.LOADED_COUNT: 0, self.OUTPUT: None}
+        if not paths:
+            return results
+
+        # coordinate columns of every file
+        feedback.setProgressText(self.tr('Reading headers'))
+        with timer.measure('header analysis') as phase:
+            report = analyze_headers(paths, is_canceled=feedback.isCanceled, set_progress=feedback.setProgress)
+            phase.files = len(report.headers)
+        if feedback.isCanceled():
+            return {}
+        detected_xy, group_field_types = analyze_groups(report, paths, feedback.isCanceled)
+        if feedback.isCanceled():
+            return {}
+        fields = {}
+        # inferred (column, type) pairs of every file, when the layers are opened fast
+        field_types = {}
+        for header, group_paths in report.groups(paths).items():
+            group_fields = fields_for_header(header, x_field, y_field, detected_xy.get(header))
+            if group_fields[0] not in header or group_fields[1] not in header:
+                feedback.reportError(self.tr('No coordinate columns in {} files with columns {}').format(
+                    len(group_paths), ', '.join(header)))
+                continue
+            group_types = group_field_types.get(header) if fast_open else None
+            for path in group_paths:
+                fields[path] = group_fields
+                field_types[path] = group_types
+        paths = [path for path in paths if path in fields]
+
+        # validate
+        if self.parameterAsBool(parameters, self.VALIDATE, context) and paths:
+            if not prevalidation_available():
+                feedback.reportError(self.tr('NumPy is not available, the coordinates are not validated'))
+            else:
+                feedback.setProgressText(self.tr('Validating coordinates'))
+                with timer.measure('coordinates validation') as phase:
+                    # the same area of use check as the dialog
+                    bounds = crs_bounds(crs, context.transformContext())
+                    stats = validate_files([(path,) + fields[path] for path in paths], bounds=bounds,
+                                           is_canceled=feedback.isCanceled, set_progress=feedback.setProgress,
+                                           dialects=report.dialects)
+                    phase.files = len(stats)
+                if feedback.isCanceled():
+                    return {}
+                feedback.pushInfo(summarize(stats))
+                valid = {file_stats.path for file_stats in stats if file_stats.is_valid}
+                paths = [path for path in paths if path in valid]
+
+        # the compressed files are read through the VRT documents of the dialog
+        vrt_dir = archives_dir(QgsApplication.qgisSettingsDirPath())
+        jobs = [(path, layer_name(path),
+                 layer_uri(path, crs.authid(), *fields[path], report.dialects.get(path), vrt_dir, field_types[path]))
+                for path in paths]
+        if target == TARGET_GEOPACKAGE:
+            feedback.setProgressText(self.tr('Writing {}').format(gpkg_path))
+            tables = table_names(paths, root_path)
+            index_fields = [field.strip() for field in
+                            self.parameterAsString(parameters, self.INDEX_FIELDS, context).split(',') if field.strip()]
+            with timer.measure('GeoPackage writing') as phase:
+                written, failed = write_geopackage(
+                    gpkg_path, [(path, tables[path], name, uri) for path, name, uri in jobs], index_fields,
+                    context.transformContext(), is_canceled=feedback.isCanceled, set_progress=feedback.setProgress)
+                phase.files = len(written)
+            for path, error in failed:
+                feedback.reportError(self.tr("Can't load file {}, {}").format(path, error))
+            results[self.LOADED_COUNT] = len(written)
+            results[self.OUTPUT] = gpkg_path
+        else:
+            # the layers are created on the main thread, postProcessAlgorithm counts the valid ones
+            self.layer_jobs = jobs
+        return results
+
+    def postProcessAlgorithm(self, context, feedback):
+        """The function loads the layers into the project of the context as a group tree matching the directories.
+        QGIS returns these outputs instead of the ones of processAlgorithm, so they are the outputs of
+        processAlgorithm with LOADED_COUNT set to the number of valid layers."""
+        project = context.project()
+        if not self.layer_jobs or project is None:
+            return {}
+        loaded = 0
+        timer = PhaseTimer(feedback.pushInfo)
+        phase = timer.start('layer creation')
+        builder = LayerTreeBuilder([path for path, name, uri in self.layer_jobs])
+        for path, name, uri in self.layer_jobs:
+            layer = QgsVectorLayer(uri, name, layer_provider(path))
+            if not layer.isValid():
+                feedback.reportError(self.tr("Can't load file {}, Please check it's coordinates").format(path))
+                continue
+            builder.add_layer(path, layer)
+            loaded += 1
+        # one addMapLayers call & one layer tree insertion, the canvas isn't known to the algorithm
+        builder.commit(project, project.layerTreeRoot())
+        timer.stop(phase, files=len(self.layer_jobs))
+        return {**self.results, self.LOADED_COUNT: loaded}
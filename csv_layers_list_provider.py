@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ CsvLayersListProvider
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import QgsProcessingProvider
+
+from .csv_layers_list_algorithm import CsvTreeImportAlgorithm
+
+
+class CsvLayersListProvider(QgsProcessingProvider):
+    """Processing provider of the plugin, it makes the import usable from scripts, models and qgis_process."""
+
+    def loadAlgorithms(self):
+        """The function adds the algorithms of the provider."""
+        self.addAlgorithm(CsvTreeImportAlgorithm())
+
+    def id(self):
+        """Unique short id of the provider, used in the algorithm ids (csvbatchimport:...)."""
+        return 'csvbatchimport'
+
+    def name(self):
+        """The function returns the name of the provider shown in the Processing toolbox."""
+        return 'CSV Batch Import'
+
+    def icon(self):
+        """The function returns the icon of the plugin."""
+        return QIcon(':/plugins/csv_layers_list/icon.png')
+
+    def longName(self):
+        return self.name()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ GeoPackageExportTask
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import QgsTask, QgsVectorLayer, QgsVectorFileWriter, QgsProject
+
+from .core.geopackage import create_attribute_indexes
+from .core.uri import layer_provider
+
+
+def write_layer(layer, gpkg_path, transform_context, options):
+    """The function writes the layer with the newest writer API available, returns (error, message)."""
+    if hasattr(QgsVectorFileWriter, 'writeAsVectorFormatV3'):
+        result = QgsVectorFileWriter.writeAsVectorFormatV3(layer, gpkg_path, transform_context, options)
+    else:
+        result = QgsVectorFileWriter.writeAsVectorFormatV2(layer, gpkg_path, transform_context, options)
+    return result[0], result[1]
+
+
+def write_geopackage(gpkg_path, jobs, index_fields, transform_context, is_canceled=None, set_progress=None):
+    """The function writes the files one by one into their own table, a GeoPackage only has one writer
+    at a time. The attribute indexes are created once all the files are written.
+
+    :param jobs: List of (path, table, name, uri) of the files to write.
+    :type jobs: list
+
+    :returns: List of (path, table) of the files written and list of (path, error message) of the others.
+    :rtype: (list, list)
+    """
+    written = []
+    failed = []
+    for i, (path, table, name, uri) in enumerate(jobs):
+        if is_canceled is not None and is_canceled():
+            return written, failed
+        try:
+            layer = QgsVectorLayer(uri, name, layer_provider(path))
+            if not layer.isValid():
+                failed.append((path, "Please check it's coordinates"))
+                continue
+
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = 'GPKG'
+            options.layerName = table
+            options.layerOptions = ['SPATIAL_INDEX=YES']
+            # the first table replaces the file, the next ones are added to it
+            if written:
+                options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+            else:
+                options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteFile
+            error, message = write_layer(layer, gpkg_path, transform_context, options)
+            if error == QgsVectorFileWriter.NoError:
+                written.append((path, table))
+            else:
+                failed.append((path, message))
+        finally:
+            # the failed files count too, the progress doesn't stall on them
+            if set_progress is not None:
+                set_progress(100.0 * (i + 1) / len(jobs))
+
+    if written and index_fields:
+        create_attribute_indexes(gpkg_path, [table for path, table in written], index_fields)
+    return written, failed
+
+
+class GeoPackageExportTask(QgsTask):
+    """Background task that writes every selected file into its own table of one GeoPackage.
+
+    The GeoPackage driver inserts the features in large transactions and builds the spatial
+    index of every table, the attribute indexes are created at the end."""
+
+    def __init__(self, gpkg_path, jobs, index_fields=None):
+        """Constructor.
+
+        :param gpkg_path: Path of the GeoPackage, overwritten when it exists.
+        :type gpkg_path: str
+
+        :param jobs: List of (path, table, name, uri) of the files to write.
+        :type jobs: list
+
+        :param index_fields: Optional names of the columns to index in every table having them.
+        :type index_fields: list
+        """
+        super().__init__('Writing {} files to {}'.format(len(jobs), gpkg_path), QgsTask.CanCancel)
+        self.gpkg_path = gpkg_path
+        self.jobs = jobs
+        self.index_fields = index_fields or []
+        # the transform context belongs to the project, read it on the main thread
+        self.transform_context = QgsProject.instance().transformContext()
+        # (path, table) of the files written
+        self.written = []
+        # (path, error message) of the files that can't be written
+        self.failed = []
+        self.exception = None
+
+    def run(self):
+        """The function writes the files on the worker thread."""
+        try:
+            self.written, self.failed = write_geopackage(
+                self.gpkg_path, self.jobs, self.index_fields, self.transform_context,
+                is_canceled=self.isCanceled, set_progress=self.setProgress)
+        except Exception as e:
+            self.exception = e
+            return False
+        return not self.isCanceled()
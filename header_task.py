@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ HeaderTask
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import QgsTask
+
+from .core.headers import analyze_headers, SchemaReport
+from .core.coordinates import analyze_groups
+from .core.scan_cache import ScanCache, stat_files
+
+
+class HeaderTask(QgsTask):
+    """Background task that sniffs the dialect and reads the header of every scanned file, groups them by schema
+    and detects the coordinate columns and the column types of every schema group."""
+
+    def __init__(self, files, cache_path=None):
+        """Constructor.
+
+        :param files: List of (path, size, mtime) of the scanned CSV/TSV files.
+        :type files: list
+
+        :param cache_path: Optional path of the scan cache database, the headers of the files
+            whose size and mtime on the disk didn't change are read from it.
+        :type cache_path: str
+        """
+        super().__init__('Reading headers of {} files'.format(len(files)), QgsTask.CanCancel)
+        self.files = files
+        self.paths = [path for path, size, mtime in files]
+        self.cache_path = cache_path
+        self.report = None
+        # schema fingerprint as key and detected (x, y) column names (or None) as value
+        self.detected_xy = {}
+        # schema fingerprint as key and inferred (column, type) pairs (or None) as value
+        self.field_types = {}
+        self.exception = None
+
+    def run(self):
+        """The function reads the headers on the worker thread, with a bounded thread pool.
+        Only the files missing from the cache are read. The files are stat'ed again first, self.files
+        then holds their current size and mtime."""
+        cache = None
+        try:
+            self.files = stat_files(self.files)
+            headers = {}
+            dialects = {}
+            if self.cache_path:
+                cache = ScanCache(self.cache_path)
+                headers, dialects = cache.get_headers(self.files)
+            missing = [path for path in self.paths if path not in headers]
+            report = analyze_headers(missing, is_canceled=self.isCanceled, set_progress=self.setProgress)
+            if self.isCanceled():
+                return False
+            if cache is not None:
+                cache.put_headers(self.files, report.headers, report.dialects)
+            headers.update(report.headers)
+            dialects.update(report.dialects)
+            self.report = SchemaReport(headers, dialects)
+
+            self.detected_xy, self.field_types = analyze_groups(self.report, self.paths, self.isCanceled)
+            if self.isCanceled():
+                return False
+        except Exception as e:
+            self.exception = e
+            return False
+        finally:
+            if cache is not None:
+                cache.close()
+        return True
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ImportProgressBar
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.PyQt.QtWidgets import QProgressBar, QPushButton
+from qgis.core import Qgis
+
+
+class ImportProgressBar:
+    """Message bar item following an import: files done out of the total, throughput and time left.
+    The progress goes through the QgsFeedback of the import, its Cancel button cancels the feedback."""
+
+    def __init__(self, message_bar, progress, feedback):
+        """Constructor.
+
+        :param message_bar: Message bar the item is pushed to.
+        :type message_bar: QgsMessageBar
+
+        :param progress: Counts of the import, see core.timing.Progress.
+        :type progress: Progress
+
+        :param feedback: Feedback of the import, the loaders are canceled through it.
+        :type feedback: QgsFeedback
+        """
+        self.message_bar = message_bar
+        self.progress = progress
+        self.feedback = feedback
+        self.item = message_bar.createMessage('Importing', str(progress))
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 100)
+        self.item.layout().addWidget(self.bar)
+        cancel_btn = QPushButton('Cancel')
+        cancel_btn.setToolTip('Stop the import, the layers already loaded are kept')
+        cancel_btn.clicked.connect(feedback.cancel)
+        self.item.layout().addWidget(cancel_btn)
+        # the user may close the item, the import goes on without it
+        self.item.destroyed.connect(self.evt_item_destroyed)
+        feedback.progressChanged.connect(self.evt_progress_changed)
+        message_bar.pushWidget(self.item, Qgis.Info)
+
+    def advance(self, size=0):
+        """The function counts a file done, loaded or failed, of the given size."""
+        self.progress.advance(size)
+        self.feedback.setProgress(100.0 * self.progress.fraction)
+
+    def is_canceled(self):
+        return self.feedback.isCanceled()
+
+    def evt_progress_changed(self, value):
+        """The function shows the new progress with the counts, the throughput and the time left."""
+        if self.item is not None:
+            self.bar.setValue(int(value))
+            self.item.setText(str(self.progress))
+
+    def evt_item_destroyed(self):
+        self.item = None
+
+    def close(self):
+        """The function removes the item from the message bar."""
+        if self.item is not None:
+            self.message_bar.popWidget(self.item)
+            self.item = None
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ LayerTasks
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import time
+
+from qgis.PyQt.QtCore import QObject, QCoreApplication, QThread, QTimer, pyqtSignal
+from qgis.core import QgsApplication, QgsTask, QgsVectorLayer
+
+from .core.uri import layer_provider
+
+# milliseconds of loading between two returns to the event loop of the sequential import
+SLICE_MS = 100
+# files larger than this are parsed by background tasks during the sequential import, a single
+# file parsed on the main thread would freeze the dialog and its Cancel button until it's done
+LARGE_FILE_BYTES = 16 * 1024 * 1024
+
+
+class LayerLoadTask(QgsTask):
+    """Background task that builds and validates the delimited text layer of one file."""
+
+    def __init__(self, path, name, uri):
+        """Constructor.
+
+        :param path: Full path of the CSV/TSV file.
+        :type path: str
+
+        :param name: Name of the layer.
+        :type name: str
+
+        :param uri: Provider uri of the file, see layer_provider.
+        :type uri: str
+        """
+        super().__init__('Loading {}'.format(name), QgsTask.CanCancel)
+        self.path = path
+        self.name = name
+        self.uri = uri
+        self.layer = None
+
+    def run(self):
+        """The function parses the file on the worker thread, a valid layer is moved
+        to the main thread so it can be added to the project."""
+        if self.isCanceled():
+            return False
+        layer = QgsVectorLayer(self.uri, self.name, layer_provider(self.path))
+        if layer.isValid():
+            layer.moveToThread(QCoreApplication.instance().thread())
+            self.layer = layer
+        return True
+
+
+class ParallelLayerLoader(QObject):
+    """Loads a list of files with a bounded pool of LayerLoadTask, the largest files are
+    scheduled first so the slowest ones don't end up running alone at the end."""
+
+    # emitted on the main thread with the file path and its valid layer
+    layer_loaded = pyqtSignal(str, QgsVectorLayer)
+    # emitted on the main thread with the path of a file that isn't a valid layer
+    layer_failed = pyqtSignal(str)
+    # emitted once every scheduled file has been loaded, failed or canceled
+    finished = pyqtSignal()
+
+    def __init__(self, jobs, max_tasks=None, parent=None):
+        """Constructor.
+
+        :param jobs: List of (path, size, name, uri) tuples of the files to load.
+        :type jobs: list
+
+        :param max_tasks: Maximum number of tasks running at the same time, the number
+            of CPU cores when not given.
+        :type max_tasks: int
+        """
+        super().__init__(parent)
+        # largest files first, the list is used as a stack so it's sorted in reverse
+        self.pending = sorted(jobs, key=lambda job: job[1])
+        self.max_tasks = max_tasks or max(1, QThread.idealThreadCount())
+        self.running = set()
+        self.canceled = False
+
+    def start(self):
+        """The function starts the first batch of tasks."""
+        self.schedule()
+        if not self.running:
+            self.finished.emit()
+
+    def cancel(self):
+        """The function cancels the running tasks and drops the pending ones."""
+        self.canceled = True
+        self.pending = []
+        for task in list(self.running):
+            task.cancel()
+
+    def schedule(self):
+        """The function starts pending tasks until max_tasks are running."""
+        while self.pending and len(self.running) < self.max_tasks:
+            path, size, name, uri = self.pending.pop()
+            task = LayerLoadTask(path, name, uri)
+            task.taskCompleted.connect(lambda task=task: self.task_done(task))
+            task.taskTerminated.connect(lambda task=task: self.task_done(task))
+            self.running.add(task)
+            QgsApplication.taskManager().addTask(task)
+
+    def task_done(self, task):
+        """The function reports the result of a finished task and starts the next one."""
+        self.running.discard(task)
+        if task.layer is not None:
+            self.layer_loaded.emit(task.path, task.layer)
+        elif not self.canceled:
+            self.layer_failed.emit(task.path)
+        self.schedule()
+        if not self.running:
+            self.finished.emit()
+
+
+class ImportJob(QObject):
+    """Loads a list of files one after the other on the main thread, SLICE_MS at a time: between two
+    slices the event loop redraws the progress and handles the Cancel button. The files larger
+    than LARGE_FILE_BYTES are given to a ParallelLayerLoader instead, the clock is only checked
+    between two files. It has the signals of ParallelLayerLoader, the files loaded on the main
+    thread are loaded in the order of the jobs."""
+
+    # emitted with the file path and its valid layer
+    layer_loaded = pyqtSignal(str, QgsVectorLayer)
+    # emitted with the path of a file that isn't a valid layer
+    layer_failed = pyqtSignal(str)
+    # emitted once every file has been loaded or failed, or once the job is canceled
+    finished = pyqtSignal()
+
+    def __init__(self, jobs, parent=None):
+        """Constructor.
+
+        :param jobs: List of (path, size, name, uri) tuples of the files to load.
+        :type jobs: list
+        """
+        super().__init__(parent)
+        # the list is used as a stack so it's reversed
+        self.pending = [job for job in reversed(jobs) if job[1] <= LARGE_FILE_BYTES]
+        large_jobs = [job for job in jobs if job[1] > LARGE_FILE_BYTES]
+        self.background = None
+        if large_jobs:
+            self.background = ParallelLayerLoader(large_jobs, parent=self)
+            self.background.layer_loaded.connect(self.layer_loaded)
+            self.background.layer_failed.connect(self.layer_failed)
+            self.background.finished.connect(self.evt_background_finished)
+        self.slices_done = False
+        self.background_done = self.background is None
+        self.canceled = False
+        # time spent in the provider on the main thread, summed over the files
+        self.build_seconds = 0.0
+
+    def start(self):
+        """The function starts the tasks of the large files, and the first slice once the control is back
+        to the event loop."""
+        if self.background is not None:
+            self.background.start()
+        QTimer.singleShot(0, self.run_slice)
+
+    def cancel(self):
+        """The function drops the files not loaded yet, the job finishes at the next slice."""
+        self.canceled = True
+        self.pending = []
+        if self.background is not None:
+            self.background.cancel()
+
+    def evt_background_finished(self):
+        self.background_done = True
+        self.finish_if_done()
+
+    def finish_if_done(self):
+        """The function tells the job is finished once the slices and the background tasks are done."""
+        if self.slices_done and self.background_done:
+            self.finished.emit()
+
+    def run_slice(self):
+        """The function loads files until the slice is over, then schedules the next slice."""
+        deadline = time.perf_counter() + SLICE_MS / 1000.0
+        while self.pending and time.perf_counter() < deadline:
+            path, size, name, uri = self.pending.pop()
+            start = time.perf_counter()
+            layer = QgsVectorLayer(uri, name, layer_provider(path))
+            self.build_seconds += time.perf_counter() - start
+            if layer.isValid():
+                self.layer_loaded.emit(path, layer)
+            else:
+                self.layer_failed.emit(path)
+        if self.pending:
+            QTimer.singleShot(0, self.run_slice)
+        else:
+            self.slices_done = True
+            self.finish_if_done()
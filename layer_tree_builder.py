@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ LayerTreeBuilder
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from contextlib import contextmanager
+
+from qgis.core import QgsLayerTreeGroup, QgsLayerTreeLayer
+
+from .core.planner import ImportPlan, PlanGroup
+
+
+@contextmanager
+def frozen_canvas(canvas):
+    """The function freezes the map canvas while the block changes the project, it's refreshed once
+    at the end. Nothing is done without a canvas or when it's already frozen by the caller."""
+    if canvas is None or canvas.isFrozen():
+        yield
+        return
+    canvas.freeze(True)
+    try:
+        yield
+    finally:
+        canvas.freeze(False)
+        canvas.refresh()
+
+
+class LayerTreeBuilder:
+    """Builds the group hierarchy of the selected files, layers may be added in any order,
+    each node is inserted at the position given by the import plan so the final tree is
+    the same whichever file finishes loading first. A QgsLayerTreeGroup is created once
+    per planned directory, the paths are never split again nor checked on the disk.
+
+    The groups are built detached from the project: the layers are collected, registered
+    in the project with one addMapLayers call per batch, and the top level group is attached
+    to the layer tree once by commit, so the legend and the canvas update once."""
+
+    def __init__(self, paths_list, nodes=None):
+        """Constructor.
+
+        :param paths_list: Full paths of the selected CSV/TSV files, sorted by the import plan.
+        :type paths_list: list
+
+        :param nodes: Optional ScanNode (or None) of every path, in the same order.
+        :type nodes: list
+        """
+        self.plan = ImportPlan(paths_list, nodes)
+        self.top_level_path = self.plan.top_level_path
+        # convert base name of the top level path to node
+        self.top_level_node = QgsLayerTreeGroup(self.plan.top_level_group.name)
+        # Create a dictionary to store path as key and its node as value (node_dict[path] = node)
+        self.node_dict = {self.top_level_path: self.top_level_node}
+        # layers added to the groups and not registered in the project yet
+        self.pending_layers = []
+
+    def add_layer(self, path, layer):
+        """The function adds the layer of the file at path to its parent directory group,
+        it's registered in the project by the next register_layers or commit."""
+        self.pending_layers.append(layer)
+        # convert layer to node & add it to its parent directory
+        self.add_node(path, QgsLayerTreeLayer(layer))
+
+    def add_node(self, path, node):
+        """The function adds the layer tree node of the file at path to its parent directory group,
+        the missing groups above it are created first."""
+        for parent, index, item in self.plan.attach_file(path):
+            if isinstance(item, PlanGroup):
+                child = self.node_dict[item.path] = QgsLayerTreeGroup(item.name)
+            else:
+                child = node
+            self.node_dict[parent.path].insertChildNode(index, child)
+
+    def register_layers(self, project):
+        """The function registers the pending layers in the project with a single addMapLayers call,
+        without adding them to the legend, their nodes are already in the groups."""
+        if self.pending_layers:
+            project.addMapLayers(self.pending_layers, False)
+            self.pending_layers = []
+
+    def commit(self, project, root_group, canvas=None):
+        """The function registers the pending layers and attaches the top level group to root_group
+        in one operation, the canvas is frozen meanwhile and refreshed once."""
+        with frozen_canvas(canvas):
+            self.register_layers(project)
+            root_group.addChildNode(self.top_level_node)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ LazyLayerTree
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from functools import partial
+from itertools import count
+
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+from qgis.core import QgsLayerTree, QgsLayerTreeLayer, QgsProject
+
+from .core.memory_budget import MemoryBudget
+from .layer_tasks import ImportJob
+
+# layer id of the placeholder nodes, they don't refer to any layer of the project
+PLACEHOLDER_PREFIX = 'csv_batch_import_placeholder_'
+
+
+class LazyLayerTree(QObject):
+    """Layer tree whose files are placeholder nodes until they are needed. The layer of a placeholder
+    is created when the placeholder is checked, when a group above it is checked, or when its group
+    is expanded. The layers are built by an ImportJob, in time slices on the main thread and by
+    background tasks for the large files, every placeholder is replaced as soon as its layer is ready.
+    Layers that aren't visible are unloaded again, least recently used first, once the estimated
+    memory of the loaded layers exceeds the budget."""
+
+    # emitted with the path of a file that isn't a valid layer
+    layer_failed = pyqtSignal(str)
+    # emitted once the top level group is deleted, with its group or when the project is cleared
+    removed = pyqtSignal()
+
+    def __init__(self, top_level_node, budget_mb, parent=None):
+        """Constructor.
+
+        :param top_level_node: Group holding the placeholders.
+        :type top_level_node: QgsLayerTreeGroup
+
+        :param budget_mb: Estimated memory the loaded layers may use, in MB.
+        :type budget_mb: int
+        """
+        super().__init__(parent)
+        self.top_level_node = top_level_node
+        self.budget = MemoryBudget(budget_mb * 1024 * 1024)
+        self.ids = count()
+        # id of the placeholder or of the loaded layer as key, (path, name, uri, size) as value
+        self.placeholders = {}
+        self.loaded = {}
+        # placeholders to load once the signal that triggered them has returned
+        self.pending = []
+        # path of the file being loaded as key and its placeholder node as value
+        self.loading = {}
+        # running ImportJob of the requested placeholders
+        self.jobs = set()
+        top_level_node.visibilityChanged.connect(self.evt_visibility_changed)
+        top_level_node.expandedChanged.connect(self.evt_expanded_changed)
+        top_level_node.destroyed.connect(self.evt_destroyed)
+
+    def evt_destroyed(self):
+        """The function forgets the placeholders of the deleted tree, nothing is loaded for them anymore."""
+        self.top_level_node = None
+        self.placeholders.clear()
+        self.pending = []
+        self.loading = {}
+        for job in self.jobs:
+            job.cancel()
+        self.removed.emit()
+
+    def collapse(self, group):
+        """The function collapses and unchecks the group and all the groups under it,
+        so nothing is loaded until the user opens one."""
+        group.setExpanded(False)
+        group.setItemVisibilityChecked(False)
+        for child in group.children():
+            if QgsLayerTree.isGroup(child):
+                self.collapse(child)
+
+    def placeholder(self, path, name, uri, size):
+        """The function returns a new checked placeholder node of the file."""
+        layer_id = f'{PLACEHOLDER_PREFIX}{next(self.ids)}'
+        self.placeholders[layer_id] = (path, name, uri, size)
+        node = QgsLayerTreeLayer(layer_id, name)
+        node.setItemVisibilityChecked(True)
+        return node
+
+    def evt_visibility_changed(self, node):
+        """The function loads the checked placeholder, or all the placeholders under the checked group."""
+        if not node.itemVisibilityChecked():
+            return
+        if QgsLayerTree.isGroup(node):
+            self.request(node.findLayers())
+        else:
+            self.request([node])
+            if node.layerId() in self.loaded:
+                self.budget.touch(node.layerId())
+
+    def evt_expanded_changed(self, node, expanded):
+        """The function loads the placeholders of the expanded group."""
+        if expanded and QgsLayerTree.isGroup(node):
+            self.request(node.children())
+
+    def request(self, nodes):
+        """The function queues the placeholders among nodes, the tree can't be changed
+        while it's emitting the signal."""
+        placeholders = [node for node in nodes if QgsLayerTree.isLayer(node) and node.layerId() in self.placeholders]
+        if placeholders:
+            if not self.pending:
+                QTimer.singleShot(0, self.load_pending)
+            self.pending.extend(placeholders)
+
+    def load_pending(self):
+        """The function starts an ImportJob building the layers of the queued placeholders."""
+        pending, self.pending = self.pending, []
+        jobs = []
+        for node in pending:
+            # removed from the tree by the user
+            if sip.isdeleted(node) or node.parent() is None:
+                continue
+            job = self.placeholders.get(node.layerId())
+            # already loaded
+            if job is None:
+                continue
+            path, name, uri, size = job
+            # a placeholder may be queued twice, by its group being both checked and expanded
+            if path in self.loading:
+                continue
+            self.loading[path] = node
+            jobs.append((path, size, name, uri))
+        if not jobs:
+            return
+        import_job = ImportJob(jobs, parent=self)
+        import_job.layer_loaded.connect(self.evt_layer_loaded)
+        import_job.layer_failed.connect(self.evt_layer_failed)
+        import_job.finished.connect(partial(self.evt_job_finished, import_job))
+        self.jobs.add(import_job)
+        import_job.start()
+
+    def evt_layer_loaded(self, path, layer):
+        """The function puts the layer in place of its placeholder, the layer is dropped when the
+        placeholder was removed from the tree meanwhile."""
+        placeholder = self.loading.pop(path, None)
+        if placeholder is None or sip.isdeleted(placeholder) or placeholder.parent() is None:
+            return
+        # registered without being displayed, its node takes the place of the placeholder
+        QgsProject.instance().addMapLayer(layer, False)
+        self.load(placeholder, layer)
+
+    def evt_layer_failed(self, path):
+        if self.loading.pop(path, None) is not None:
+            self.layer_failed.emit(path)
+
+    def evt_job_finished(self, job):
+        """The function forgets the finished job, then unloads the least recently used hidden layers
+        if the budget is exceeded."""
+        self.jobs.discard(job)
+        job.deleteLater()
+        if self.top_level_node is None:
+            return
+        for layer_id in self.budget.evictions(self.is_visible):
+            self.unload(layer_id)
+
+    def load(self, placeholder, layer):
+        """The function puts the registered layer of the placeholder at the placeholder position."""
+        parent = placeholder.parent()
+        job = self.placeholders[placeholder.layerId()]
+        path, name, uri, size = job
+        node = parent.insertLayer(parent.children().index(placeholder), layer)
+        node.setItemVisibilityChecked(placeholder.itemVisibilityChecked())
+        del self.placeholders[placeholder.layerId()]
+        parent.removeChildNode(placeholder)
+        self.loaded[layer.id()] = job
+        # the file size stands for the memory of the layer, the provider keeps an index of every row
+        self.budget.touch(layer.id(), size)
+
+    def unload(self, layer_id):
+        """The function removes the layer from the project and puts a placeholder back at its position."""
+        self.budget.discard(layer_id)
+        job = self.loaded.pop(layer_id, None)
+        node = self.top_level_node.findLayer(layer_id)
+        if job is not None and node is not None and node.parent() is not None:
+            parent = node.parent()
+            placeholder = self.placeholder(*job)
+            placeholder.setItemVisibilityChecked(node.itemVisibilityChecked())
+            parent.insertChildNode(parent.children().index(node), placeholder)
+        # removing the layer also removes its node
+        QgsProject.instance().removeMapLayer(layer_id)
+
+    def is_visible(self, layer_id):
+        """The function checks if the loaded layer is shown on the canvas, those are never unloaded."""
+        node = self.top_level_node.findLayer(layer_id)
+        return node is not None and node.isVisible()
+
+
+def remove_placeholders(document):
+    """The function removes the placeholder nodes from the document of the project being written, their
+    layer ids don't refer to any layer so the saved project only keeps the loaded layers.
+
+    :param document: Project document emitted by QgsProject.writeProject.
+    :type document: QDomDocument
+    """
+    nodes = document.elementsByTagName('layer-tree-layer')
+    # removing an element changes the list, the last ones are removed first
+    for index in reversed(range(nodes.count())):
+        element = nodes.at(index).toElement()
+        if element.attribute('id').startswith(PLACEHOLDER_PREFIX):
+            element.parentNode().removeChild(element)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ PrevalidationTask
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.core import QgsTask, QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsCsException
+
+from .core.prevalidation import validate_files
+
+
+def crs_bounds(crs, transform_context):
+    """The function returns the area of use of the CRS as (xmin, ymin, xmax, ymax) in the CRS units,
+    or None when it's unknown. The dialog and the Processing algorithm check the coordinates against it.
+
+    :param crs: Coordinate reference system of the coordinates.
+    :type crs: QgsCoordinateReferenceSystem
+
+    :param transform_context: Transform context of the project, or of the processing context.
+    :type transform_context: QgsCoordinateTransformContext
+    """
+    wgs84 = QgsCoordinateReferenceSystem('EPSG:4326')
+    bounds = crs.bounds()
+    if not crs.isValid() or bounds.isEmpty():
+        return None
+    try:
+        transform = QgsCoordinateTransform(wgs84, crs, transform_context)
+        bounds = transform.transformBoundingBox(bounds)
+    except QgsCsException:
+        return None
+    return bounds.xMinimum(), bounds.yMinimum(), bounds.xMaximum(), bounds.yMaximum()
+
+
+class PrevalidationTask(QgsTask):
+    """Background task that checks the coordinate columns of the selected files before any layer is built."""
+
+    def __init__(self, jobs, bounds=None, dialects=None):
+        """Constructor.
+
+        :param jobs: List of (path, x_field, y_field) of the files to validate.
+        :type jobs: list
+
+        :param bounds: Optional (xmin, ymin, xmax, ymax) area of use of the CRS, in the CRS units.
+        :type bounds: tuple
+
+        :param dialects: Optional full path of the file as key and its sniffed Dialect as value.
+        :type dialects: dict
+        """
+        super().__init__('Validating coordinates of {} files'.format(len(jobs)), QgsTask.CanCancel)
+        self.jobs = jobs
+        self.bounds = bounds
+        self.dialects = dialects
+        self.results = []
+        self.exception = None
+
+    def run(self):
+        """The function validates the files on the worker thread."""
+        try:
+            self.results = validate_files(self.jobs, self.bounds, is_canceled=self.isCanceled,
+                                          set_progress=self.setProgress, dialects=self.dialects)
+        except Exception as e:
+            self.exception = e
+            return False
+        return not self.isCanceled()
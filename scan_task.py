@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ScanTask
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import time
+
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask
+
+from .core.scanner import ScanNode, iter_scan
+from .core.scan_cache import ScanCache
+
+# number of entries (directories + files) sent to the GUI in one batch
+BATCH_SIZE = 500
+# maximum time in seconds a batch waits before it is sent to the GUI
+BATCH_INTERVAL = 0.25
+
+
+class ScanTask(QgsTask):
+    """Background task that walks a directory tree and streams what it finds
+    to the main thread in batches, so the GUI stays responsive and the scan can
+    be canceled at any time."""
+
+    # emitted with a list of scanned directory ScanNode, parents always come before their children
+    batch_ready = pyqtSignal(list)
+    # emitted with the number of CSV/TSV files found so far
+    files_found_changed = pyqtSignal(int)
+
+    def __init__(self, root_path, cache_path=None):
+        """Constructor.
+
+        :param root_path: Normalized path of the directory to scan.
+        :type root_path: str
+
+        :param cache_path: Optional path of the scan cache database, directories whose mtime
+            didn't change since the previous scan are read from it.
+        :type cache_path: str
+        """
+        super().__init__('Scanning {}'.format(root_path), QgsTask.CanCancel)
+        self.root_path = root_path
+        self.cache_path = cache_path
+        # root of the scanned tree, its children are filled by the worker thread
+        self.root = ScanNode(root_path)
+        self.files_found = 0
+        self.exception = None
+
+    def run(self):
+        """The function scans the tree under root_path on the worker thread and emits
+        the scanned directories in batches."""
+        batch = []
+        batch_entries = 0
+        last_emit = time.monotonic()
+        cache = None
+        try:
+            # the cache connection belongs to the worker thread
+            if self.cache_path:
+                cache = ScanCache(self.cache_path)
+            for node in iter_scan(self.root, is_canceled=self.isCanceled, cache=cache):
+                batch.append(node)
+                batch_entries += len(node.children) + 1
+                self.files_found += sum(1 for child in node.children if not child.is_dir)
+
+                # send the batch when it's big enough or it waited too long
+                now = time.monotonic()
+                if batch_entries >= BATCH_SIZE or now - last_emit >= BATCH_INTERVAL:
+                    self.batch_ready.emit(batch)
+                    self.files_found_changed.emit(self.files_found)
+                    batch = []
+                    batch_entries = 0
+                    last_emit = now
+        except Exception as e:
+            self.exception = e
+            return False
+        finally:
+            if cache is not None:
+                cache.close()
+
+        # send what is left
+        if batch:
+            self.batch_ready.emit(batch)
+        self.files_found_changed.emit(self.files_found)
+        return not self.isCanceled()
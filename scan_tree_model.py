@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ ScanTreeModel
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+import os
+from array import array
+
+from qgis.PyQt.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from qgis.PyQt.QtGui import QBrush, QColor
+
+from .core.check_states import CheckStates
+
+# number of rows a directory shows each time the view asks for more
+FETCH_ROWS = 500
+
+# role of the full path of the entry, stored on its ScanNode by the scan
+PATH_ROLE = Qt.UserRole
+
+# background of the directories and the files, shared by all the rows
+DIR_BRUSH = QBrush(QColor(233, 236, 239))
+FILE_BRUSH = QBrush(QColor(248, 249, 250))
+
+
+class ScanTreeModel(QAbstractItemModel):
+    """Checkable tree of the scanned directories and files, read directly from the ScanNode tree.
+
+    No object is created per row: the view gets indexes pointing to the ScanNode, and every node
+    the dialog knows of has a position (ScanNode.index) in flat arrays holding its check state,
+    its row and the number of its children shown so far. A directory only shows its rows once
+    the view expands it, FETCH_ROWS at a time through canFetchMore/fetchMore.
+
+    The check states are kept by CheckStates, a directory with both checked and unchecked
+    entries under it is partially checked."""
+
+    # emitted with the ScanNode and its new Qt.CheckState when the user checks or unchecks it
+    check_state_changed = pyqtSignal(object, int)
+
+    def __init__(self, parent=None):
+        """Constructor."""
+        super().__init__(parent)
+        self.root = None
+        self.checks = CheckStates()
+        self.clear_arrays()
+
+    def clear_arrays(self):
+        self.checks.clear()
+        # row of every node under its parent
+        self.rows = array('l')
+        # number of children shown as rows by every directory, they are the first children of the node
+        self.fetched = array('l')
+        # 1 for the directories the view asked rows for, they show their children as soon as they are known
+        self.requested = bytearray()
+
+    def grow_arrays(self):
+        """The function makes room in the arrays of the model for the nodes registered in the check states."""
+        missing = len(self.checks) - len(self.rows)
+        if missing > 0:
+            self.rows.extend([0] * missing)
+            self.fetched.extend([0] * missing)
+            self.requested.extend(bytes(missing))
+
+    def clear(self):
+        """The function removes every row."""
+        self.beginResetModel()
+        self.root = None
+        self.clear_arrays()
+        self.endResetModel()
+
+    def set_root(self, root, state=Qt.Checked):
+        """The function shows the root directory node as the only top level row, its children
+        are added by add_children as the scan finds them."""
+        self.beginResetModel()
+        self.clear_arrays()
+        self.root = root
+        self.checks.register(root, int(state))
+        self.grow_arrays()
+        self.endResetModel()
+
+    def is_known(self, node):
+        """The function returns True when the node has a row in the model, shown or not yet."""
+        return self.checks.is_known(node)
+
+    def add_children(self, node):
+        """The function adds the children of the known directory node once they are scanned, they get
+        the check state of the directory. The rows are shown right away if the directory is expanded."""
+        self.checks.add_children(node)
+        self.grow_arrays()
+        rows = self.rows
+        for row, child in enumerate(node.children):
+            rows[child.index] = row
+        if self.requested[node.index]:
+            self.fetchMore(self.node_index(node))
+
+    def apply_rescan(self, node, old_children, added, removed):
+        """The function shows the changes of the directory node listed again by rescan_directory: only the rows
+        of the removed and added children are removed and inserted, the other rows keep their expansion
+        and selection. The removed nodes are forgotten, the added ones get the check state of the directory.
+
+        :param old_children: Children of the node before it was listed again.
+        :type old_children: list
+        """
+        i = node.index
+        if not self.checks.known[i]:
+            # the rows are added with the children once the scan reaches the directory
+            return
+        new_children = node.children
+        self.checks.add_children(node)
+        self.grow_arrays()
+        parent_index = self.node_index(node)
+        rows = self.rows
+        fetched = self.fetched
+
+        # the children are changed one row at a time, so the view always sees the rows it was told about
+        node.children = list(old_children)
+        removed_ids = {id(child) for child in removed}
+        for row in reversed(range(len(old_children))):
+            child = old_children[row]
+            if id(child) not in removed_ids:
+                continue
+            shown = row < fetched[i]
+            if shown:
+                self.beginRemoveRows(parent_index, row, row)
+            del node.children[row]
+            for next_row in range(row, len(node.children)):
+                rows[node.children[next_row].index] = next_row
+            if shown:
+                fetched[i] -= 1
+                self.endRemoveRows()
+            self.checks.forget_subtree(child)
+
+        added_ids = {id(child) for child in added}
+        for row, child in enumerate(new_children):
+            if id(child) not in added_ids:
+                continue
+            # rows past the shown ones are fetched later, the ones of a fully shown directory are shown now
+            shown = row < fetched[i] or (row == fetched[i] == len(node.children) and self.requested[i])
+            if shown:
+                self.beginInsertRows(parent_index, row, row)
+            node.children.insert(row, child)
+            for next_row in range(row, len(node.children)):
+                rows[node.children[next_row].index] = next_row
+            if shown:
+                fetched[i] += 1
+                self.endInsertRows()
+
+    def node(self, index):
+        """The function returns the ScanNode of the index."""
+        return index.internalPointer() if index.isValid() else None
+
+    def node_index(self, node):
+        """The function returns the index of the known node."""
+        if node is self.root:
+            return self.createIndex(0, 0, node)
+        return self.createIndex(self.rows[node.index], 0, node)
+
+    def check_state(self, node):
+        return self.checks.state(node)
+
+    def is_shown(self, node):
+        """The function returns True when the known node is a row of its parent."""
+        return node is self.root or self.rows[node.index] < self.fetched[node.parent.index]
+
+    def emit_state_changed(self, node):
+        """The function tells the view the check state of the shown node changed."""
+        if self.is_shown(node):
+            index = self.node_index(node)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+
+    def set_check_state(self, node, state):
+        """The function sets the check state of the node and of all the known nodes under it in one pass,
+        then updates the states of its parents. No signal is sent while the states change, the view
+        is told once per expanded directory of the subtree instead of once per node."""
+        fetched = self.fetched
+        dirs = self.checks.set_subtree(node, int(state))
+        self.emit_state_changed(node)
+        for current in dirs:
+            if fetched[current.index]:
+                parent_index = self.node_index(current)
+                self.dataChanged.emit(self.index(0, 0, parent_index),
+                                      self.index(fetched[current.index] - 1, 0, parent_index), [Qt.CheckStateRole])
+        for parent in self.checks.update_parents(node):
+            self.emit_state_changed(parent)
+
+    def update_check_states(self, node):
+        """The function recomputes the check states of the directory node and of its parents
+        after its children changed, the view is told about the ones that changed."""
+        for current in self.checks.update_dir(node):
+            self.emit_state_changed(current)
+
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.root)
+        return self.createIndex(row, column, parent.internalPointer().children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None:
+            return QModelIndex()
+        return self.node_index(parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return 1 if self.root is not None else 0
+        return self.fetched[parent.internalPointer().index]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self.root is not None
+        node = parent.internalPointer()
+        # the directories not scanned yet may have children
+        return node.is_dir and (not self.checks.known[node.index] or bool(node.children))
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        node = parent.internalPointer()
+        i = node.index
+        return node.is_dir and (not self.checks.known[i] or self.fetched[i] < len(node.children))
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            return
+        node = parent.internalPointer()
+        i = node.index
+        self.requested[i] = 1
+        if not self.checks.known[i]:
+            return
+        first = self.fetched[i]
+        last = min(len(node.children), first + FETCH_ROWS) - 1
+        if last < first:
+            return
+        self.beginInsertRows(parent, first, last)
+        self.fetched[i] = last + 1
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            # the root node name is its full path
+            return os.path.basename(node.name) if node is self.root else node.name
+        if role == Qt.CheckStateRole:
+            return self.checks.states[node.index]
+        if role == Qt.BackgroundRole:
+            return DIR_BRUSH if node.is_dir else FILE_BRUSH
+        if role == PATH_ROLE:
+            return node.path
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        node = index.internalPointer()
+        state = int(value)
+        self.set_check_state(node, state)
+        self.check_state_changed.emit(node, state)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return 'CSV Files Tree'
+        return None
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""Compressed inputs test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import zipfile
+import xml.etree.ElementTree as ET
+
+from core.archives import split_archive_path, gdal_path, strip_extension
+from core.headers import analyze_file
+from core.scanner import ScanNode, iter_scan
+from core.uri import layer_name, layer_provider
+from core.vrt import file_vrt
+
+
+class ArchivesTest(unittest.TestCase):
+    """Test the gzip files and the zip members are scanned and read in place."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+        with gzip.open(os.path.join(self.root_path, 'top.csv.gz'), 'wt') as file:
+            file.write('lon;lat\n1;2\n')
+        self.zip_path = os.path.join(self.root_path, 'bundle.zip')
+        with zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('a.csv', 'x,y\n1,2\n')
+            archive.writestr('2023/05/b.tsv', 'x\ty\n1\t2\n')
+            archive.writestr('2023/c.tsv.gz', gzip.compress(b'x\ty\n1\t2\n'))
+            archive.writestr('2023/notes.txt', 'not a csv')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_scan(self):
+        """Test the archive is a directory and its folders are yielded like directories."""
+        root = ScanNode(self.root_path)
+        dirs = [node.path for node in iter_scan(root)]
+        self.assertEqual(dirs, [self.root_path, self.zip_path, os.path.join(self.zip_path, '2023'),
+                                os.path.join(self.zip_path, '2023', '05')])
+        paths = sorted(node.path for node in root.iter_files())
+        self.assertEqual(paths, [os.path.join(self.zip_path, '2023', '05', 'b.tsv'),
+                                 os.path.join(self.zip_path, '2023', 'c.tsv.gz'),
+                                 os.path.join(self.zip_path, 'a.csv'),
+                                 os.path.join(self.root_path, 'top.csv.gz')])
+        archive = root.children[0]
+        self.assertTrue(archive.is_archive)
+        self.assertTrue(archive.children[0].in_archive())
+        self.assertFalse(archive.in_archive())
+
+    def test_read(self):
+        """Test the headers of the compressed files are read without extracting them."""
+        header, dialect = analyze_file(os.path.join(self.root_path, 'top.csv.gz'))
+        self.assertEqual((header, dialect.delimiter), (('lon', 'lat'), ';'))
+        header, dialect = analyze_file(os.path.join(self.zip_path, '2023', '05', 'b.tsv'))
+        self.assertEqual((header, dialect.delimiter), (('x', 'y'), '\t'))
+        header, dialect = analyze_file(os.path.join(self.zip_path, '2023', 'c.tsv.gz'))
+        self.assertEqual(header, ('x', 'y'))
+        self.assertIsNone(analyze_file(os.path.join(self.zip_path, 'missing.csv'))[0])
+
+    def test_gdal_path(self):
+        """Test the GDAL paths and the layer names of the compressed files."""
+        member = os.path.join(self.zip_path, '2023', 'c.tsv.gz')
+        list(iter_scan(ScanNode(self.root_path)))
+        # the archive found by the scanner isn't stat'ed again
+        with mock.patch('core.archives.os.path.isfile') as isfile:
+            self.assertEqual(split_archive_path(member), (self.zip_path, '2023/c.tsv.gz'))
+        self.assertFalse(isfile.called)
+        self.assertEqual(gdal_path(member), '/vsigzip//vsizip/{}/2023/c.tsv.gz'.format(self.zip_path))
+        self.assertEqual(gdal_path(os.path.join(self.root_path, 'top.csv.gz')),
+                         '/vsigzip/' + os.path.join(self.root_path, 'top.csv.gz'))
+        self.assertEqual(strip_extension('c.tsv.gz'), 'c')
+        self.assertEqual(layer_name(member), 'c')
+        self.assertEqual(layer_provider(member), 'ogr')
+        self.assertEqual(layer_provider(os.path.join(self.root_path, 'plain.csv')), 'delimitedtext')
+        layer = ET.fromstring(file_vrt(member, 'EPSG:4326', 'x', 'y')).find('OGRVRTLayer')
+        self.assertEqual(layer.find('SrcDataSource').text, gdal_path(member))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ArchivesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
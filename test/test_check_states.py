@@ -0,0 +1,100 @@
+# coding=utf-8
+"""Check states test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import unittest
+
+from core.check_states import CheckStates, CHECKED, PARTIALLY_CHECKED, UNCHECKED
+from core.scanner import ScanNode
+
+
+class CheckStatesTest(unittest.TestCase):
+    """Test the check states are propagated down and up the tree."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root = ScanNode('/data')
+        self.a = ScanNode('a', self.root)
+        self.b = ScanNode('b', self.a)
+        self.one = ScanNode('1.csv', self.a, False)
+        self.two = ScanNode('2.csv', self.b, False)
+        self.three = ScanNode('3.csv', self.b, False)
+        self.root.children = [self.a]
+        self.a.children = [self.b, self.one]
+        self.b.children = [self.two, self.three]
+        self.checks = CheckStates()
+        self.checks.register(self.root, CHECKED)
+        for node in (self.root, self.a, self.b):
+            self.checks.add_children(node)
+
+    def states(self):
+        return [self.checks.state(node) for node in self.root.iter_subtree()]
+
+    def test_inherited(self):
+        """Test the children get the state of their directory."""
+        self.assertEqual(len(self.checks), 6)
+        self.assertEqual(self.states(), [CHECKED] * 6)
+
+    def test_subtree(self):
+        """Test a directory is unchecked with everything under it and its parents are partially checked."""
+        dirs = self.checks.set_subtree(self.b, UNCHECKED)
+        self.assertEqual(dirs, [self.b])
+        self.assertEqual(self.checks.update_parents(self.b), [self.a, self.root])
+        self.assertEqual(self.states(), [PARTIALLY_CHECKED, PARTIALLY_CHECKED, UNCHECKED, UNCHECKED, UNCHECKED,
+                                         CHECKED])
+
+    def test_parents(self):
+        """Test the parents are computed bottom-up and stop at the first unchanged one."""
+        self.checks.set_subtree(self.root, UNCHECKED)
+        self.checks.set_subtree(self.two, CHECKED)
+        self.assertEqual(self.checks.update_parents(self.two), [self.b, self.a, self.root])
+        self.checks.set_subtree(self.three, CHECKED)
+        self.assertEqual(self.checks.update_parents(self.three), [self.b])
+        self.assertEqual(self.checks.state(self.b), CHECKED)
+        self.assertEqual(self.checks.state(self.a), PARTIALLY_CHECKED)
+
+    def test_partial_children(self):
+        """Test the new entries of a partially checked directory are unchecked."""
+        self.checks.set_subtree(self.one, UNCHECKED)
+        self.checks.update_parents(self.one)
+        new = ScanNode('4.csv', self.a, False)
+        self.a.children.append(new)
+        self.checks.add_children(self.a)
+        self.assertEqual(self.checks.state(new), UNCHECKED)
+
+    def test_update_dir(self):
+        """Test a directory listed again gets its state from its new children, and so do its parents."""
+        self.checks.set_subtree(self.three, UNCHECKED)
+        self.checks.update_parents(self.three)
+        self.assertEqual(self.checks.state(self.root), PARTIALLY_CHECKED)
+        # the unchecked file was removed from the directory
+        self.b.children = [self.two]
+        self.assertEqual(self.checks.update_dir(self.b), [self.b, self.a, self.root])
+        self.assertEqual(self.checks.state(self.root), CHECKED)
+        self.assertEqual(self.checks.update_dir(self.b), [])
+
+    def test_forget_subtree(self):
+        """Test a removed directory is forgotten with everything under it."""
+        self.a.children = [self.one]
+        self.checks.forget_subtree(self.b)
+        for node in (self.b, self.two, self.three):
+            self.assertFalse(self.checks.is_known(node))
+            self.assertEqual(node.index, -1)
+        self.assertTrue(self.checks.is_known(self.one))
+        self.assertEqual(self.checks.nodes.count(None), 3)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(CheckStatesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,74 @@
+# coding=utf-8
+"""Coordinate columns detection test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.coordinates import analyze_groups, detect_xy, fields_for_header
+from core.field_types import INTEGER, DOUBLE
+from core.headers import analyze_headers
+
+
+class CoordinatesTest(unittest.TestCase):
+    """Test the coordinate columns are detected."""
+
+    def test_geographic_names(self):
+        """Test longitude/latitude columns are detected from their names and values."""
+        header = ('id', 'Latitude', 'Longitude', 'name')
+        rows = [['1', '48.85', '2.35', 'Paris'], ['2', '51.50', '-0.12', 'London']]
+        self.assertEqual(detect_xy(header, rows), ('Longitude', 'Latitude'))
+
+    def test_swapped_values(self):
+        """Test geographic names holding values out of range are not used."""
+        header = ('lon', 'lat', 'easting', 'northing')
+        rows = [['500000', '4649776', '500000', '4649776'], ['500100', '4649876', '500100', '4649876']]
+        self.assertEqual(detect_xy(header, rows), ('easting', 'northing'))
+
+    def test_non_numeric(self):
+        """Test columns holding text are not used."""
+        header = ('x', 'y', 'X_COORD', 'Y_COORD')
+        rows = [['a', 'b', '10.5', '20.5'], ['c', 'd', '11.5', '21.5']]
+        self.assertEqual(detect_xy(header, rows), ('X_COORD', 'Y_COORD'))
+        self.assertIsNone(detect_xy(('id', 'name'), [['1', 'a']]))
+
+    def test_fields_for_header(self):
+        """Test the chosen columns win when the file has them, the detected ones otherwise."""
+        self.assertEqual(fields_for_header(('x', 'y'), 'x', 'y', ('lon', 'lat')), ('x', 'y'))
+        self.assertEqual(fields_for_header(('lon', 'lat'), 'x', 'y', ('lon', 'lat')), ('lon', 'lat'))
+        self.assertEqual(fields_for_header(('a', 'b'), 'x', 'y', None), ('x', 'y'))
+        self.assertEqual(fields_for_header(None, 'x', 'y', ('lon', 'lat')), ('x', 'y'))
+
+    def test_analyze_groups(self):
+        """Test the coordinates and the types of every schema group are found from its first file."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, content in (('a.csv', 'id,lon,lat\n1,2.5,48.5\n'), ('b.csv', 'id,lon,lat\n2,3.5,49.5\n'),
+                                  ('c.csv', 'id,name\n1,a\n')):
+                paths.append(os.path.join(temp_dir, name))
+                with open(paths[-1], 'w') as file:
+                    file.write(content)
+            detected_xy, field_types = analyze_groups(analyze_headers(paths), paths)
+            self.assertEqual(detected_xy, {('id', 'lon', 'lat'): ('lon', 'lat'), ('id', 'name'): None})
+            self.assertEqual(field_types[('id', 'lon', 'lat')], (('id', INTEGER), ('lon', DOUBLE), ('lat', DOUBLE)))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(CoordinatesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,56 @@
+# coding=utf-8
+"""Field types inference test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import unittest
+
+from core.field_types import infer_field_types, INTEGER, LONGLONG, DOUBLE, TEXT
+from core.uri import delimited_text_uri
+
+
+class FieldTypesTest(unittest.TestCase):
+    """Test the column types are inferred from the sampled rows."""
+
+    def test_infer(self):
+        """Test every column gets the narrowest type holding all its values."""
+        header = ('id', 'big', 'lon', 'name', 'empty')
+        rows = [['1', '1', '2', 'a', ''], ['2', '9000000000', '2.5', '3', ''], [' 3 ', '', '-1e3', 'nan']]
+        self.assertEqual(infer_field_types(header, rows),
+                         (('id', INTEGER), ('big', LONGLONG), ('lon', DOUBLE), ('name', TEXT), ('empty', TEXT)))
+        self.assertEqual(infer_field_types(('x',), [['1.5'], ['inf']]), (('x', TEXT),))
+        self.assertIsNone(infer_field_types(header, []))
+
+    def test_uri(self):
+        """Test the inferred types turn off the type detection of the provider."""
+        uri = delimited_text_uri('/data/a.csv', 'EPSG:4326', 'x', 'y', None, (('x', DOUBLE), ('a:b', TEXT)))
+        self.assertIn('&field=x:double&field=a%3Ab:text', uri)
+        self.assertIn('&detectTypes=no&spatialIndex=yes&watchFile=no', uri)
+        self.assertNotIn('detectTypes', delimited_text_uri('/data/a.csv', 'EPSG:4326', 'x', 'y'))
+
+    def test_coordinate_types(self):
+        """Test the coordinate columns are double even when the sample only holds whole numbers."""
+        field_types = infer_field_types(('id', 'lon', 'lat'), [['1', '2', '45'], ['2', '3', '46']])
+        uri = delimited_text_uri('/data/a.csv', 'EPSG:4326', 'lon', 'lat', None, field_types)
+        self.assertIn('&field=id:integer&field=lon:double&field=lat:double', uri)
+
+    def test_quoted_coordinates(self):
+        """Test the coordinate column names are quoted in the uri."""
+        uri = delimited_text_uri('/data/a.csv', 'EPSG:4326', 'lon #1', 'lat&y', None, (('lon #1', INTEGER),))
+        self.assertIn('&xField=lon%20%231&yField=lat%26y', uri)
+        self.assertIn('&field=lon%20%231:double', uri)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(FieldTypesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,65 @@
+# coding=utf-8
+"""GeoPackage helpers test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from core.geopackage import table_names, create_attribute_indexes
+
+
+class GeoPackageTest(unittest.TestCase):
+    """Test the GeoPackage helpers work."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_table_names(self):
+        """Test every file gets a unique valid table name from its relative path."""
+        root = os.path.join(self.root_path, 'data')
+        paths = [os.path.join(root, '2020', 'a b.csv'),
+                 os.path.join(root, '2020_a_b.csv'),
+                 os.path.join(root, 'x.csv')]
+        names = table_names(paths, root)
+        self.assertEqual(names[paths[0]], 't_2020_a_b')
+        self.assertEqual(names[paths[1]], 't_2020_a_b_2')
+        self.assertEqual(names[paths[2]], 'x')
+
+    def test_attribute_indexes(self):
+        """Test indexes are only created on the tables having the column."""
+        gpkg_path = os.path.join(self.root_path, 'out.gpkg')
+        connection = sqlite3.connect(gpkg_path)
+        connection.execute('CREATE TABLE a (fid INTEGER PRIMARY KEY, station TEXT)')
+        connection.execute('CREATE TABLE b (fid INTEGER PRIMARY KEY, other TEXT)')
+        connection.commit()
+        connection.close()
+
+        self.assertEqual(create_attribute_indexes(gpkg_path, ['a', 'b'], ['station']), 1)
+        connection = sqlite3.connect(gpkg_path)
+        indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        connection.close()
+        self.assertEqual(indexes, ['idx_a_station'])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GeoPackageTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
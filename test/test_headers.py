@@ -0,0 +1,64 @@
+# coding=utf-8
+"""Header analysis test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.headers import analyze_headers
+
+
+class HeadersTest(unittest.TestCase):
+    """Test the header analysis works."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+        self.paths = []
+        for name, content in (('a.csv', 'lon,lat,id\n1,2,3\n'),
+                              ('b.csv', 'lon,lat,id\n4,5,6\n'),
+                              ('c.tsv', 'lon\tlat\tname\n1\t2\tx\n'),
+                              ('empty.csv', '')):
+            path = os.path.join(self.root_path, name)
+            with open(path, 'w') as file:
+                file.write(content)
+            self.paths.append(path)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_groups(self):
+        """Test files are grouped by schema fingerprint, largest group first."""
+        report = analyze_headers(self.paths, max_workers=2)
+        groups = report.groups(self.paths)
+        self.assertEqual(list(groups), [('lon', 'lat', 'id'), ('lon', 'lat', 'name')])
+        self.assertEqual(len(groups[('lon', 'lat', 'id')]), 2)
+        self.assertIsNone(report.headers[self.paths[3]])
+
+    def test_candidate_columns(self):
+        """Test every column is offered with the number of files containing it, the common ones first."""
+        report = analyze_headers(self.paths, max_workers=2)
+        self.assertEqual(report.candidate_columns(self.paths[:2]), [('lon', 2), ('lat', 2), ('id', 2)])
+        self.assertEqual(report.candidate_columns(self.paths[:3]), [('lon', 3), ('lat', 3), ('id', 2), ('name', 1)])
+        # no column is common when the empty file is selected
+        self.assertEqual(report.candidate_columns(self.paths),
+                         [('lon', 3), ('lat', 3), ('id', 2), ('name', 1)])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(HeadersTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
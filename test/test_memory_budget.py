@@ -0,0 +1,49 @@
+# coding=utf-8
+"""Memory budget test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import unittest
+
+from core.memory_budget import MemoryBudget
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    """Test the least recently used layers are unloaded first."""
+
+    def test_evictions(self):
+        """Test the evictions free enough memory, least recently used first."""
+        budget = MemoryBudget(100)
+        budget.touch('a', 60)
+        budget.touch('b', 30)
+        budget.touch('c', 40)
+        self.assertEqual(budget.used, 130)
+        # a becomes the most recently used layer
+        budget.touch('a')
+        self.assertEqual(budget.evictions(), ['b'])
+        budget.discard('b')
+        self.assertEqual(budget.used, 100)
+        self.assertEqual(budget.evictions(), [])
+
+    def test_pinned(self):
+        """Test pinned layers are skipped."""
+        budget = MemoryBudget(50)
+        budget.touch('a', 60)
+        budget.touch('b', 30)
+        self.assertEqual(budget.evictions(lambda key: key == 'a'), ['b'])
+        self.assertEqual(budget.evictions(lambda key: True), [])
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(MemoryBudgetTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
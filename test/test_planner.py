@@ -0,0 +1,120 @@
+# coding=utf-8
+"""Import planner test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import random
+import unittest
+
+from core.planner import ImportPlan, PlanGroup, plan_key, plan_keys, top_level_path
+from core.scanner import ScanNode
+from core.union import MERGE_TREE, union_groups
+
+
+def build(plan, order):
+    """Attaches the files in the given order to nested lists and returns the top level list."""
+    children = {plan.top_level_path: []}
+    for path in order:
+        for parent, index, item in plan.attach_file(path):
+            if isinstance(item, PlanGroup):
+                children[item.path] = []
+                children[parent.path].insert(index, (item.name, children[item.path]))
+            else:
+                children[parent.path].insert(index, item.name)
+    return children[plan.top_level_path]
+
+
+class PlannerTest(unittest.TestCase):
+    """Test the plan of the layer tree."""
+
+    def setUp(self):
+        """Runs before each test."""
+        root = os.path.join(os.sep, 'data')
+        self.paths = [os.path.join(root, 'a', 'one.csv'),
+                      os.path.join(root, 'a', 'b', 'two.csv'),
+                      os.path.join(root, 'three.tsv'),
+                      os.path.join(root, 'c', 'd', 'four.csv')]
+
+    def test_top_level_path(self):
+        """Test the top level group is the common directory, or the directory of a single file."""
+        self.assertEqual(top_level_path(self.paths), os.path.join(os.sep, 'data'))
+        self.assertEqual(top_level_path(self.paths[1:2]), os.path.join(os.sep, 'data', 'a', 'b'))
+
+    def test_plan(self):
+        """Test every file gets its group and rank."""
+        plan = ImportPlan(self.paths)
+        self.assertEqual(plan.files[self.paths[1]].group.path, os.path.dirname(self.paths[1]))
+        self.assertEqual(plan.files[self.paths[1]].name, 'two')
+        self.assertEqual(plan.groups[os.path.join(os.sep, 'data', 'c')].rank, 2)
+
+    def test_attach_in_any_order(self):
+        """Test the tree is the same whichever order the files are attached in."""
+        expected = [('a', [('b', ['two']), 'one']), ('c', [('d', ['four'])]), 'three']
+        self.assertEqual(build(ImportPlan(self.paths), self.paths), expected)
+        order = list(self.paths)
+        random.Random(0).shuffle(order)
+        self.assertEqual(build(ImportPlan(self.paths), order), expected)
+
+    def test_missing_files(self):
+        """Test a directory without attached file doesn't show up."""
+        self.assertEqual(build(ImportPlan(self.paths), self.paths[:3]), [('a', [('b', ['two']), 'one']), 'three'])
+
+    def test_sorted_directories(self):
+        """Test every directory gets one group and the directories are sorted by name like the dialog shows them,
+        even when a sibling sorts between a directory and its sub directories as a string."""
+        root = os.path.join(os.sep, 'data', 'ab')
+        paths = [os.path.join(root, 'a', 'b', 'two.csv'),
+                 os.path.join(root, 'a b', 'three.csv'),
+                 os.path.join(root, 'a', 'one.csv'),
+                 os.path.join(os.sep, 'data', 'ac', 'four.csv')]
+        plan = ImportPlan(paths)
+        self.assertEqual(plan.top_level_path, os.path.join(os.sep, 'data'))
+        self.assertEqual(sorted(plan.groups), sorted([os.path.join(os.sep, 'data'), root,
+                                                      os.path.join(root, 'a'), os.path.join(root, 'a', 'b'),
+                                                      os.path.join(root, 'a b'), os.path.join(os.sep, 'data', 'ac')]))
+        self.assertEqual(build(plan, paths),
+                         [('ab', [('a', [('b', ['two']), 'one']), ('a b', ['three'])]), ('ac', ['four'])])
+
+    def test_scan_nodes(self):
+        """Test the keys read from the ScanNode chains are the ones of the paths."""
+        root = ScanNode(os.path.join(os.sep, 'data'))
+        nodes = {}
+        for path in self.paths:
+            parent = root
+            for name in os.path.relpath(os.path.dirname(path), root.path).split(os.sep):
+                if name != os.curdir:
+                    parent = nodes.setdefault(os.path.join(parent.path, name), ScanNode(name, parent))
+            nodes[path] = ScanNode(os.path.basename(path), parent, False)
+        file_nodes = [nodes[path] for path in self.paths]
+        self.assertEqual(plan_keys(self.paths, file_nodes), [plan_key(path) for path in self.paths])
+        self.assertEqual(plan_keys(self.paths), [plan_key(path) for path in self.paths])
+        plan = ImportPlan(self.paths, file_nodes)
+        self.assertEqual(list(plan.files), list(ImportPlan(self.paths).files))
+        self.assertEqual(build(plan, self.paths[::-1]), [('a', [('b', ['two']), 'one']), ('c', [('d', ['four'])]),
+                                                         'three'])
+
+    def test_union_layers(self):
+        """Test the union layers of the whole tree and the files left alone share one plan."""
+        headers = {path: ('x', 'y') for path in self.paths[:2]}
+        groups = union_groups(self.paths, headers, lambda path: ('x', 'y'), MERGE_TREE, top_level_path(self.paths))
+        paths = [group.path for group in groups]
+        self.assertEqual(paths, [os.path.join(os.sep, 'data', 'data')] + self.paths[2:])
+        expected = [('c', [('d', ['four'])]), 'data', 'three']
+        self.assertEqual(build(ImportPlan(paths), paths), expected)
+        self.assertEqual(build(ImportPlan(paths), paths[::-1]), expected)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(PlannerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
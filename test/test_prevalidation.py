@@ -0,0 +1,60 @@
+# coding=utf-8
+"""Coordinate pre-validation test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.prevalidation import is_available, validate_file
+
+
+@unittest.skipUnless(is_available(), 'NumPy is not available')
+class PrevalidationTest(unittest.TestCase):
+    """Test the coordinates are validated without building a layer."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.root_path, 'points.csv')
+        with open(self.path, 'w') as file:
+            file.write('lon,lat\n2.35,48.85\n-0.12,51.5\nabc,1\n,3\nnan,4\n500,10\n')
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_counts(self):
+        """Test bad values are counted and the bounding box covers the valid ones."""
+        stats = validate_file(self.path, 'lon', 'lat', bounds=(-180, -90, 180, 90), chunk_rows=2)
+        self.assertIsNone(stats.error)
+        self.assertEqual(stats.rows, 6)
+        self.assertEqual(stats.non_numeric, 1)
+        self.assertEqual(stats.nan, 2)
+        self.assertEqual(stats.out_of_bounds, 1)
+        self.assertEqual(stats.valid_rows, 2)
+        self.assertEqual(stats.bbox, (-0.12, 48.85, 2.35, 51.5))
+        self.assertTrue(stats.is_valid)
+
+    def test_missing_column(self):
+        """Test a file without the chosen columns is rejected."""
+        stats = validate_file(self.path, 'x', 'lat')
+        self.assertFalse(stats.is_valid)
+        self.assertEqual(stats.error, 'missing column x')
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(PrevalidationTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
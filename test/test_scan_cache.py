@@ -0,0 +1,67 @@
+# coding=utf-8
+"""Scan cache test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.scan_cache import ScanCache, stat_files
+from core.sniffing import Dialect
+
+
+class ScanCacheTest(unittest.TestCase):
+    """Test the headers are cached while the files don't change."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.root_path, 'a.csv')
+        with open(self.path, 'w') as file:
+            file.write('x;y\n1;2\n')
+        self.cache = ScanCache(os.path.join(self.root_path, 'cache', 'scan_cache.sqlite'))
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.close()
+        shutil.rmtree(self.root_path)
+
+    def test_headers(self):
+        """Test the stored headers and dialects are returned for the unchanged files only."""
+        missing = os.path.join(self.root_path, 'missing.csv')
+        files = stat_files([(self.path, 0, 0.0), (missing, 0, 0.0)])
+        dialect = Dialect(';')
+        self.cache.put_headers(files, {self.path: ('x', 'y'), missing: None}, {self.path: dialect})
+        headers, dialects = self.cache.get_headers(files)
+        self.assertEqual(headers, {self.path: ('x', 'y')})
+        self.assertEqual(dialects, {self.path: dialect})
+
+    def test_stale_headers(self):
+        """Test a file rewritten in place isn't served the header of its previous content."""
+        scanned = stat_files([(self.path, 0, 0.0)])
+        self.cache.put_headers(scanned, {self.path: ('x', 'y')}, {self.path: Dialect(';')})
+        with open(self.path, 'w') as file:
+            file.write('lon,lat,name\n1,2,a\n')
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 10 ** 9))
+        # the listing read from the cache still has the size and mtime of the scan
+        self.assertEqual(self.cache.get_headers(scanned)[0], {self.path: ('x', 'y')})
+        current = stat_files(scanned)
+        self.assertNotEqual(current, scanned)
+        self.assertEqual(self.cache.get_headers(current), ({}, {}))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ScanCacheTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,151 @@
+# coding=utf-8
+"""Scanner test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from core.scanner import CSV_EXTENSIONS, ScanNode, iter_scan, rescan_directory, split_patterns, match_patterns
+from core.scan_cache import ScanCache
+
+
+class ScannerTest(unittest.TestCase):
+    """Test the single pass scanner works."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root_path, 'a', 'b'))
+        os.makedirs(os.path.join(self.root_path, 'empty'))
+        for path, content in (('top.csv', 'x,y\n1,2\n'),
+                              (os.path.join('a', 'one.tsv'), 'x\ty\n1\t2\n'),
+                              (os.path.join('a', 'b', 'two.csv'), 'x,y\n'),
+                              (os.path.join('a', 'notes.txt'), 'not a csv')):
+            with open(os.path.join(self.root_path, path), 'w') as file:
+                file.write(content)
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_scan_tree(self):
+        """Test every directory is yielded once and only CSV/TSV files are kept."""
+        root = ScanNode(self.root_path)
+        scanned = list(iter_scan(root))
+
+        self.assertIs(scanned[0], root)
+        self.assertEqual(
+            sorted(node.path for node in scanned),
+            sorted([self.root_path,
+                    os.path.join(self.root_path, 'a'),
+                    os.path.join(self.root_path, 'a', 'b'),
+                    os.path.join(self.root_path, 'empty')]))
+        self.assertEqual(
+            sorted(node.path for node in root.iter_files()),
+            sorted([os.path.join(self.root_path, 'top.csv'),
+                    os.path.join(self.root_path, 'a', 'one.tsv'),
+                    os.path.join(self.root_path, 'a', 'b', 'two.csv')]))
+
+    def test_file_stat(self):
+        """Test the size of the files is recorded by the scan."""
+        root = ScanNode(self.root_path)
+        list(iter_scan(root))
+        top = [node for node in root.children if node.name == 'top.csv'][0]
+        self.assertFalse(top.is_dir)
+        self.assertEqual(top.size, len('x,y\n1,2\n'))
+        self.assertGreater(top.mtime, 0)
+
+    def test_cancel(self):
+        """Test the scan stops when it's canceled."""
+        root = ScanNode(self.root_path)
+        scanned = list(iter_scan(root, is_canceled=lambda: True))
+        self.assertEqual(scanned, [])
+
+    def test_cache(self):
+        """Test an unchanged directory is read from the cache and a changed one is listed again."""
+        cache = ScanCache(os.path.join(self.root_path, 'cache', 'scan_cache.sqlite'))
+        try:
+            first = ScanNode(self.root_path)
+            list(iter_scan(first, cache=cache))
+            cached = cache.get_listing(self.root_path, os.stat(self.root_path).st_mtime_ns, CSV_EXTENSIONS)
+            self.assertIn(['top.csv', 0, len('x,y\n1,2\n'), os.stat(os.path.join(self.root_path, 'top.csv')).st_mtime],
+                          cached)
+
+            second = ScanNode(self.root_path)
+            with mock.patch('core.scanner.os.scandir', wraps=os.scandir) as scandir:
+                list(iter_scan(second, cache=cache))
+            # every directory listing came from the cache
+            self.assertEqual(scandir.call_count, 0)
+            self.assertEqual(sorted(node.path for node in first.iter_subtree()),
+                             sorted(node.path for node in second.iter_subtree()))
+
+            # a new file changes the mtime of its directory
+            sub_dir = os.path.join(self.root_path, 'a', 'b')
+            with open(os.path.join(sub_dir, 'new.csv'), 'w') as file:
+                file.write('x,y\n')
+            os.utime(sub_dir, ns=(0, os.stat(sub_dir).st_mtime_ns + 10 ** 9))
+            third = ScanNode(self.root_path)
+            with mock.patch('core.scanner.os.scandir', wraps=os.scandir) as scandir:
+                list(iter_scan(third, cache=cache))
+            self.assertEqual([call.args[0] for call in scandir.call_args_list], [sub_dir])
+            self.assertIn(os.path.join(sub_dir, 'new.csv'), [node.path for node in third.iter_files()])
+        finally:
+            cache.close()
+
+    def test_rescan(self):
+        """Test a directory listed again keeps its unchanged nodes and reports the differences."""
+        root = ScanNode(self.root_path)
+        list(iter_scan(root))
+        a_dir = [node for node in root.children if node.name == 'a'][0]
+        one = [node for node in a_dir.children if node.name == 'one.tsv'][0]
+
+        os.remove(os.path.join(self.root_path, 'a', 'b', 'two.csv'))
+        os.rmdir(os.path.join(self.root_path, 'a', 'b'))
+        os.makedirs(os.path.join(self.root_path, 'a', 'c'))
+        with open(os.path.join(self.root_path, 'a', 'c', 'three.csv'), 'w') as file:
+            file.write('x,y\n')
+
+        added, removed = rescan_directory(a_dir)
+        self.assertEqual([node.name for node in added], ['c'])
+        self.assertEqual([node.name for node in removed], ['b'])
+        self.assertEqual([node.name for node in a_dir.children], ['c', 'one.tsv'])
+        self.assertIs(a_dir.children[1], one)
+        self.assertEqual([node.path for node in added[0].iter_files()],
+                         [os.path.join(self.root_path, 'a', 'c', 'three.csv')])
+
+    def test_rescan_error(self):
+        """Test a directory that can't be listed again keeps its children."""
+        root = ScanNode(self.root_path)
+        list(iter_scan(root))
+        b_dir = [node for node in root.iter_subtree() if node.name == 'b'][0]
+        children = list(b_dir.children)
+        shutil.rmtree(os.path.join(self.root_path, 'a', 'b'))
+        self.assertEqual(rescan_directory(b_dir), ([], []))
+        self.assertEqual(b_dir.children, children)
+
+    def test_match_patterns(self):
+        """Test the files are filtered on their name or relative path."""
+        paths = [os.path.join(self.root_path, 'a', 'one.tsv'), os.path.join(self.root_path, 'a', 'b', 'two.csv')]
+        self.assertEqual(split_patterns('*.tsv; a/b/*'), ['*.tsv', 'a/b/*'])
+        self.assertEqual(match_patterns(paths, self.root_path, ['*.tsv']), paths[:1])
+        self.assertEqual(match_patterns(paths, self.root_path, ['a/b/*']), paths[1:])
+        self.assertEqual(match_patterns(paths, self.root_path, []), paths)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ScannerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
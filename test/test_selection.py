@@ -0,0 +1,66 @@
+# coding=utf-8
+"""Selection test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import unittest
+
+from core.scanner import ScanNode
+from core.selection import Selection
+
+
+class SelectionTest(unittest.TestCase):
+    """Test the selection model works."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root = ScanNode(os.path.join(os.path.sep, 'data'))
+        sub_dir = ScanNode('sub', self.root)
+        sub_dir.children = [ScanNode('b.csv', sub_dir, False), ScanNode('c.csv', sub_dir, False)]
+        self.root.children = [sub_dir, ScanNode('a.csv', self.root, False)]
+        self.selection = Selection()
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.selection = None
+
+    def test_insertion_order(self):
+        """Test the files keep the order they were selected in and are not added twice."""
+        self.selection.add_file('z.csv')
+        self.selection.add_file('a.csv')
+        self.selection.add_file('z.csv')
+        self.assertEqual(self.selection.file_paths(), ['z.csv', 'a.csv'])
+        self.selection.discard_file('z.csv')
+        self.selection.discard_file('missing.csv')
+        self.assertEqual(self.selection.file_paths(), ['a.csv'])
+
+    def test_subtree(self):
+        """Test the files under a directory are selected and deselected together."""
+        root_path = self.root.path
+        sub_path = os.path.join(root_path, 'sub')
+        self.selection.select_subtree(self.root)
+        self.assertEqual(self.selection.file_paths(), [
+            os.path.join(sub_path, 'b.csv'),
+            os.path.join(sub_path, 'c.csv'),
+            os.path.join(root_path, 'a.csv')])
+
+        self.selection.deselect_subtree(self.root.children[0])
+        self.assertNotIn(os.path.join(sub_path, 'b.csv'), self.selection)
+        self.assertEqual(self.selection.file_paths(), [os.path.join(root_path, 'a.csv')])
+        self.assertEqual(len(self.selection), 1)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(SelectionTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
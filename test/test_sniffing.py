@@ -0,0 +1,90 @@
+# coding=utf-8
+"""Dialect sniffing test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.headers import read_header
+from core.sniffing import Dialect, sniff_file
+from core.uri import delimited_text_uri
+
+
+class SniffingTest(unittest.TestCase):
+    """Test the dialect of the files is detected from their first bytes."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def write(self, name, content, encoding='utf-8'):
+        path = os.path.join(self.root_path, name)
+        with open(path, 'w', encoding=encoding, newline='') as file:
+            file.write(content)
+        return path
+
+    def test_delimiters(self):
+        """Test semicolon and pipe files are told apart from the comma ones."""
+        path = self.write('a.csv', 'lon;lat;name\n1,5;2,5;"a;b"\n3,5;4,5;c\n')
+        dialect = sniff_file(path)
+        self.assertEqual(dialect.delimiter, ';')
+        self.assertEqual(read_header(path, dialect), ('lon', 'lat', 'name'))
+        path = self.write('b.csv', 'lon|lat|name\n1|2|a\n3|4|b\n')
+        self.assertEqual(sniff_file(path).delimiter, '|')
+        path = self.write('c.tsv', 'lon\tlat\n1\t2\n')
+        self.assertEqual(sniff_file(path).delimiter, '\t')
+
+    def test_encodings(self):
+        """Test the byte order marks and latin-1 files are detected."""
+        path = self.write('a.csv', 'lon,lat,nom\n1,2,été\n', 'utf-16')
+        dialect = sniff_file(path)
+        self.assertEqual((dialect.encoding, dialect.delimiter), ('utf-16', ','))
+        self.assertEqual(read_header(path, dialect), ('lon', 'lat', 'nom'))
+        path = self.write('b.csv', 'lon,lat\n1,2\n', 'utf-8-sig')
+        dialect = sniff_file(path)
+        self.assertEqual(dialect.encoding, 'utf-8-sig')
+        self.assertEqual(read_header(path, dialect), ('lon', 'lat'))
+        path = self.write('c.csv', 'lon,lat,nom\n1,2,été\n', 'latin-1')
+        self.assertEqual(sniff_file(path).encoding, 'latin-1')
+
+    def test_no_header(self):
+        """Test a first line of numbers is taken as data."""
+        path = self.write('a.csv', '1.5,2.5,3\n4,5,6\n')
+        dialect = sniff_file(path)
+        self.assertFalse(dialect.has_header)
+        self.assertEqual(read_header(path, dialect), ('field_1', 'field_2', 'field_3'))
+
+    def test_bounded_read(self):
+        """Test only the first bytes are read, the cut last line is left out."""
+        path = self.write('a.csv', 'x;y\n' + '1;2\n' * 10000)
+        self.assertEqual(sniff_file(path, read_bytes=64), Dialect(';'))
+
+    def test_uri(self):
+        """Test the dialect is passed to the provider."""
+        uri = delimited_text_uri('/data/a.csv', 'EPSG:4326', 'x', 'y', Dialect(';', "'", 'utf-16', False))
+        self.assertIn('delimiter=%3B', uri)
+        self.assertIn('quote=%27', uri)
+        self.assertIn('encoding=UTF-16', uri)
+        self.assertIn('useHeader=no', uri)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(SniffingTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
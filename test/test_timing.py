@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Phase timing test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from core.timing import PhaseTimer, Progress, RunProfiler, format_bytes, format_duration
+
+
+class TimingTest(unittest.TestCase):
+    """Test the phases are timed and reported."""
+
+    def test_phases(self):
+        """Test every finished phase is logged with its counts."""
+        messages = []
+        timer = PhaseTimer(messages.append)
+        with timer.measure('scan') as phase:
+            phase.files = 3
+            phase.bytes = 2048
+        timer.record('provider parsing', 1.5, files=2)
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(messages[0].startswith('scan: '))
+        self.assertTrue(messages[0].endswith(', 3 files, 2.0 KB'))
+        self.assertEqual(messages[1], 'provider parsing: 1.500 s, 2 files')
+        self.assertEqual(timer.summary(), '\n'.join(messages))
+
+    def test_format_bytes(self):
+        """Test the sizes are shown with their unit."""
+        self.assertEqual(format_bytes(512), '512 B')
+        self.assertEqual(format_bytes(3 * 1024 ** 2), '3.0 MB')
+
+    def test_progress(self):
+        """Test the throughput and the time left are measured from the bytes done."""
+        now = [100.0]
+        progress = Progress(4, 4 * 1024 ** 2, clock=lambda: now[0])
+        self.assertIsNone(progress.eta())
+        now[0] = 102.0
+        progress.advance(1024 ** 2)
+        self.assertEqual(progress.fraction, 0.25)
+        self.assertEqual(progress.eta(), 6.0)
+        self.assertEqual(str(progress), '1/4 files, 512.0 KB/s, 6 s left')
+        progress.advance(3 * 1024 ** 2, files=3)
+        self.assertEqual(progress.summary(canceled=True),
+                         '4 of 4 files, 4.0 MB in 2 s (2.0 MB/s, 2.0 files/s), canceled')
+        self.assertEqual(format_duration(3725), '1 h 02 min')
+
+    def test_profiler(self):
+        """Test the profile is written as a pstats file."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            profiler = RunProfiler()
+            profiler.start()
+            sorted(range(1000), key=lambda value: -value)
+            stats_path = profiler.stop(os.path.join(temp_dir, 'profiles', 'run.prof'))
+            self.assertFalse(profiler.is_running)
+            self.assertTrue(pstats.Stats(stats_path).total_calls > 0)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(TimingTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
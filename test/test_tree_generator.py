@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Benchmark tree generator test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark.tree_generator import TreeSpec, generate_tree, synthetic_paths
+from core.scanner import ScanNode, iter_scan
+
+
+class TreeGeneratorTest(unittest.TestCase):
+    """Test the generated trees match their spec."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Runs after each test."""
+        shutil.rmtree(self.root_path)
+
+    def test_generate_tree(self):
+        """Test the scanner finds every generated file."""
+        spec = TreeSpec(depth=2, fan_out=3, files_per_dir=4, broken_ratio=0.5)
+        paths, broken = generate_tree(self.root_path, spec)
+        self.assertEqual(len(paths), spec.file_count())
+        self.assertTrue(set(broken) < set(paths))
+        root = ScanNode(self.root_path)
+        list(iter_scan(root))
+        self.assertEqual(sorted(node.path for node in root.iter_files()), paths)
+
+    def test_same_seed_same_tree(self):
+        """Test a spec always generates the same tree."""
+        spec = TreeSpec(depth=1, fan_out=2, files_per_dir=3, broken_ratio=0.3, seed=7)
+        first = generate_tree(os.path.join(self.root_path, 'a'), spec)
+        second = generate_tree(os.path.join(self.root_path, 'b'), spec)
+        self.assertEqual([os.path.relpath(path, os.path.join(self.root_path, 'a')) for path in first[1]],
+                         [os.path.relpath(path, os.path.join(self.root_path, 'b')) for path in second[1]])
+
+    def test_synthetic_paths(self):
+        """Test the synthetic paths are unique."""
+        self.assertEqual(len(set(synthetic_paths(1000))), 1000)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(TreeGeneratorTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
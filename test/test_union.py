@@ -0,0 +1,89 @@
+# coding=utf-8
+"""Union layers test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'contact@fajr.tech'
+__date__ = '2023-05-27'
+__copyright__ = 'Copyright 2023, fajr.tech'
+
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+from core.sniffing import Dialect
+from core.union import MERGE_DIRECTORY, MERGE_TREE, SOURCE_FIELD, union_groups, union_vrt
+
+
+class UnionTest(unittest.TestCase):
+    """Test the files sharing a schema are merged."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.root = os.path.join(os.sep, 'data')
+        self.paths = [os.path.join(self.root, 'a', '1.csv'),
+                      os.path.join(self.root, 'a', '2.csv'),
+                      os.path.join(self.root, 'a', '3.csv'),
+                      os.path.join(self.root, 'b', '4.csv'),
+                      os.path.join(self.root, 'b', '5.csv')]
+        self.headers = {self.paths[0]: ('x', 'y', 'v'),
+                        self.paths[1]: ('x', 'y', 'v'),
+                        self.paths[2]: ('x', 'y', 'w'),
+                        self.paths[3]: ('x', 'y', 'v')}
+
+    def fields_for_file(self, path):
+        return 'x', 'y'
+
+    def test_groups_per_directory(self):
+        """Test the groups are made per directory and header, unknown headers stay alone."""
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_DIRECTORY, self.root)
+        self.assertEqual([group.paths for group in groups],
+                         [self.paths[:2], [self.paths[2]], [self.paths[3]], [self.paths[4]]])
+        self.assertEqual(groups[0].name, 'a')
+        self.assertEqual(groups[0].path, os.path.join(self.root, 'a', 'a'))
+        self.assertEqual(groups[2].path, self.paths[3])
+
+    def test_groups_per_tree(self):
+        """Test the groups span directories in tree mode."""
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root)
+        self.assertEqual(groups[0].paths, [self.paths[0], self.paths[1], self.paths[3]])
+        self.assertEqual(groups[0].name, 'data')
+
+    def test_union_names(self):
+        """Test only the union layers of a directory are numbered."""
+        self.headers[self.paths[4]] = ('x', 'y', 'w')
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root)
+        self.assertEqual([group.name for group in groups], ['data', 'data #2'])
+        self.headers[self.paths[4]] = ('x', 'y', 'z')
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root)
+        self.assertEqual([len(group.paths) for group in groups], [3, 1, 1])
+        self.assertEqual(groups[0].name, 'data')
+
+    def test_other_encodings(self):
+        """Test the files the OGR CSV driver can't read right stay alone."""
+        dialects = {self.paths[1]: Dialect(encoding='latin-1'), self.paths[3]: Dialect(encoding='utf-8-sig')}
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root, dialects)
+        self.assertEqual([group.paths for group in groups],
+                         [[self.paths[0], self.paths[3]], [self.paths[1]], [self.paths[2]], [self.paths[4]]])
+        dialects = {self.paths[1]: Dialect(quotechar="'")}
+        groups = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root, dialects)
+        self.assertEqual(groups[1].paths, [self.paths[1]])
+
+    def test_union_vrt(self):
+        """Test every file is a source layer of the union."""
+        group = union_groups(self.paths, self.headers, self.fields_for_file, MERGE_TREE, self.root)[0]
+        union = ET.fromstring(union_vrt(group, 'EPSG:4326')).find('OGRVRTUnionLayer')
+        self.assertEqual([layer.get('name') for layer in union.findall('OGRVRTLayer')], group.paths)
+        self.assertEqual(union.find('SourceLayerFieldName').text, SOURCE_FIELD)
+        self.assertEqual(union.find('OGRVRTLayer/GeometryField').get('x'), 'x')
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(UnionTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
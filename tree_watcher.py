@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ TreeWatcher
+                                 A QGIS plugin
+ list all csv and tsv files and load them into QGIS canvas
+                             -------------------
+        begin                : 2023-05-27
+        copyright            : (C) 2023 by fajr.tech
+        email                : contact@fajr.tech
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+from qgis.PyQt.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# time in milliseconds without any filesystem event before the changed directories are reported
+DEBOUNCE_MS = 500
+# directories watched at most, every one takes an inotify watch and the default limit is 8192 per user
+MAX_WATCHED_DIRS = 4096
+
+
+class TreeWatcher(QObject):
+    """Watches the scanned directories and reports the ones whose entries changed. Bursts of
+    filesystem events are collected until the directories are quiet for DEBOUNCE_MS.
+
+    At most max_dirs directories are watched, the first ones given, so the system limit of the
+    watches isn't reached. The directories that can't be watched are reported once until clear."""
+
+    # emitted with the list of the changed directory paths
+    directories_changed = pyqtSignal(list)
+    # emitted with the number of watched directories and the number of directories that aren't watched
+    partially_watched = pyqtSignal(int, int)
+
+    def __init__(self, parent=None, max_dirs=MAX_WATCHED_DIRS):
+        """Constructor.
+
+        :param max_dirs: Maximum number of watched directories.
+        :type max_dirs: int
+        """
+        super().__init__(parent)
+        self.max_dirs = max_dirs
+        self.watched = set()
+        # number of directories given to watch that aren't watched, since the last clear
+        self.missed = 0
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.evt_directory_changed)
+        self.pending = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.evt_timeout)
+
+    def watch(self, dir_paths):
+        """The function starts watching the given directories, up to max_dirs. The user is told through
+        partially_watched the first time some directories can't be watched."""
+        dir_paths = [path for path in dir_paths if path not in self.watched]
+        if not dir_paths:
+            return
+        accepted = dir_paths[:max(0, self.max_dirs - len(self.watched))]
+        # addPaths returns the paths it couldn't watch, for instance once the system limit is reached
+        failed = set(self.watcher.addPaths(accepted)) if accepted else set()
+        self.watched.update(path for path in accepted if path not in failed)
+        missed = len(dir_paths) - len(accepted) + len(failed)
+        if missed:
+            if not self.missed:
+                self.partially_watched.emit(len(self.watched), missed)
+            self.missed += missed
+
+    def unwatch(self, dir_paths):
+        """The function stops watching the given directories."""
+        dir_paths = [path for path in dir_paths if path in self.watched]
+        if dir_paths:
+            self.watcher.removePaths(dir_paths)
+            self.watched.difference_update(dir_paths)
+
+    def clear(self):
+        """The function stops watching every directory and drops the pending changes."""
+        self.unwatch(list(self.watched))
+        self.missed = 0
+        self.pending.clear()
+        self.timer.stop()
+
+    def evt_directory_changed(self, path):
+        """The function collects the changed directory and restarts the debounce timer."""
+        self.pending.add(path)
+        self.timer.start()
+
+    def evt_timeout(self):
+        """The function reports the directories changed during the burst, parents first."""
+        changed = sorted(self.pending)
+        self.pending.clear()
+        self.directories_changed.emit(changed)